@@ -0,0 +1,130 @@
+from bisect import bisect_left, insort
+
+from model import DiagramModel, ModelChange, Node, is_dense, port_positions
+
+ALIGN_THRESHOLD = 6
+REBUILD_THRESHOLD = 2000
+Key = tuple[float, str]
+Match = tuple[str, float, list[str]]
+
+
+class AlignmentIndex:
+    def __init__(self, model: DiagramModel):
+        self.model = model
+        self._xs: list[Key] = []
+        self._ys: list[Key] = []
+        self._ports: list[Key] = []
+        self._keys: dict[str, tuple[list[Key], list[Key], list[Key]]] = {}
+        self._stale: set[str] = set()
+        self.rebuild()
+        model.subscribe(self._on_changes)
+
+    def close(self):
+        self.model.unsubscribe(self._on_changes)
+
+    def rebuild(self):
+        self._keys.clear()
+        self._stale.clear()
+        for node in self.model.nodes.values():
+            self._keys[node.name] = _node_keys(node)
+        self._xs = sorted(key for keys in self._keys.values() for key in keys[0])
+        self._ys = sorted(key for keys in self._keys.values() for key in keys[1])
+        self._ports = sorted(key for keys in self._keys.values() for key in keys[2])
+
+    def _on_changes(self, changes: list[ModelChange]):
+        for change in changes:
+            if change.node is not None:
+                self._stale.add(change.node)
+
+    def _refresh(self, exclude: set[str]):
+        names = self._stale - exclude if exclude else set(self._stale)
+        if len(names) > REBUILD_THRESHOLD:
+            self.rebuild()
+            return
+        self._stale -= names
+        for name in names:
+            old = self._keys.pop(name, None)
+            if old is not None:
+                for table, keys in zip((self._xs, self._ys, self._ports), old):
+                    for key in keys:
+                        del table[bisect_left(table, key)]
+            node = self.model.nodes.get(name)
+            if node is None:
+                continue
+            self._keys[name] = new = _node_keys(node)
+            for table, keys in zip((self._xs, self._ys, self._ports), new):
+                for key in keys:
+                    insort(table, key)
+
+    def snap_node(
+        self, node: Node, x: float, y: float, exclude: set[str], threshold: float = ALIGN_THRESHOLD
+    ) -> tuple[float | None, float | None, list[Match]]:
+        self._refresh(exclude)
+        matches: list[Match] = []
+        best_x = _nearest(self._xs, [(x, 0.0), (x, node.width / 2), (x, node.width)], exclude, threshold)
+        if best_x is not None:
+            x = best_x[1] - best_x[0]
+            matches.append(("x", best_x[1], best_x[2]))
+        targets = [(y, 0.0), (y, node.height / 2), (y, node.height)]
+        best_y = _nearest(self._ys, targets, exclude, threshold)
+        if not is_dense(node):
+            offsets = [(y, py - node.y) for _port, _px, py in port_positions(node)]
+            best_port = _nearest(self._ports, offsets, exclude, threshold)
+            if best_port is not None and (best_y is None or abs(best_port[3]) < abs(best_y[3])):
+                best_y = best_port
+        if best_y is not None:
+            y = best_y[1] - best_y[0]
+            matches.append(("y", best_y[1], best_y[2]))
+        return (
+            x if best_x is not None else None,
+            y if best_y is not None else None,
+            matches,
+        )
+
+    def snap_edge(
+        self, axis: str, value: float, exclude: set[str], threshold: float = ALIGN_THRESHOLD
+    ) -> Match | None:
+        self._refresh(exclude)
+        best = _nearest(self._xs if axis == "x" else self._ys, [(value, 0.0)], exclude, threshold)
+        return (axis, best[1], best[2]) if best is not None else None
+
+
+def _node_keys(node: Node) -> tuple[list[Key], list[Key], list[Key]]:
+    name = node.name
+    xs = [(node.x, name), (node.x + node.width / 2, name), (node.x + node.width, name)]
+    ys = [(node.y, name), (node.y + node.height / 2, name), (node.y + node.height, name)]
+    ports = [] if is_dense(node) else [(py, name) for _port, _px, py in port_positions(node)]
+    return xs, ys, ports
+
+
+def _nearest(
+    table: list[Key], targets: list[tuple[float, float]], exclude: set[str], threshold: float
+) -> tuple[float, float, list[str], float] | None:
+    best = None
+    for origin, offset in targets:
+        target = origin + offset
+        idx = bisect_left(table, (target - threshold,))
+        while idx < len(table) and table[idx][0] <= target + threshold:
+            coord, name = table[idx]
+            idx += 1
+            if name in exclude:
+                continue
+            delta = coord - target
+            if best is None or abs(delta) < abs(best[3]):
+                best = (offset, coord, [name], delta)
+            elif coord == best[1] and name not in best[2]:
+                best[2].append(name)
+    return best
+
+
+def guide_lines(rect: tuple[float, float, float, float], matches: list[Match], nodes: dict[str, Node]):
+    lines = []
+    for axis, coord, names in matches:
+        x1, y1, x2, y2 = rect
+        for name in names:
+            node = nodes.get(name)
+            if node is not None:
+                x1, y1 = min(x1, node.x), min(y1, node.y)
+                x2, y2 = max(x2, node.x + node.width), max(y2, node.y + node.height)
+        lines.append((coord, y1, coord, y2) if axis == "x" else (x1, coord, x2, coord))
+    return lines
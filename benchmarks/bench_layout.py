@@ -0,0 +1,63 @@
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram import parse_blocks, parse_connections  # noqa: E402
+from layout import layout  # noqa: E402
+from synth import write_design  # noqa: E402
+
+_NAME_RE = re.compile(r"\b([BG])(\d+)\b")
+
+
+def write_clusters(directory: Path, clusters: int, blocks: int, gates: int, nets: int) -> tuple[Path, Path]:
+    blocks_path = directory / "input.txt"
+    connections_path = directory / "connections.txt"
+    with blocks_path.open("w", encoding="utf-8") as blocks_out, connections_path.open(
+        "w", encoding="utf-8"
+    ) as connections_out:
+        for idx in range(clusters):
+            part_blocks, part_connections = write_design(
+                directory / f"c{idx}", blocks=blocks, gates=gates, nets=nets, seed=idx
+            )
+            rename = lambda match, idx=idx: f"C{idx}{match.group(1)}{match.group(2)}"  # noqa: E731
+            blocks_out.write(_NAME_RE.sub(rename, part_blocks.read_text(encoding="utf-8")))
+            connections_out.write(_NAME_RE.sub(rename, part_connections.read_text(encoding="utf-8")))
+    return blocks_path, connections_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="layout() scaling over worker counts")
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--gates", type=int, default=120)
+    parser.add_argument("--nets", type=int, default=160)
+    parser.add_argument("--workers", type=int, nargs="*", default=None)
+    args = parser.parse_args()
+    counts = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as tmp:
+        blocks_path, connections_path = write_clusters(Path(tmp), args.clusters, args.blocks, args.gates, args.nets)
+        print(f"clusters={args.clusters} blocks/cluster={args.blocks} gates/cluster={args.gates}")
+        reference = None
+        serial = None
+        for workers in counts:
+            nodes = parse_blocks(blocks_path)
+            connections = parse_connections(connections_path, nodes)
+            start = time.perf_counter()
+            routes = layout(nodes, connections, workers)
+            elapsed = time.perf_counter() - start
+            positions = {name: (node.x, node.y) for name, node in nodes.items()}
+            positions["routes"] = [routes.get(id(connection)) for connection in connections]
+            reference = reference or positions
+            serial = serial or elapsed
+            same = "same" if positions == reference else "DIFFERENT"
+            print(f"workers={workers:3d} {elapsed * 1000:10.1f} ms  speedup {serial / elapsed:5.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram import parse_blocks, parse_connections  # noqa: E402
+from verilog_import import parse_verilog  # noqa: E402
+
+
+def write_designs(directory: Path, gates: int, inputs: int) -> tuple[Path, Path, Path]:
+    verilog_path = directory / "design.v"
+    blocks_path = directory / "input.txt"
+    connections_path = directory / "connections.txt"
+    with verilog_path.open("w", encoding="utf-8") as handle:
+        ports = [f"i{idx}" for idx in range(inputs)] + [f"y{idx}" for idx in range(gates)]
+        handle.write(f"module top ({', '.join(ports)});\n")
+        for idx in range(inputs):
+            handle.write(f"  input i{idx};\n")
+        for idx in range(gates):
+            handle.write(f"  output y{idx};\n")
+        for idx in range(gates):
+            a = (2 * idx) % inputs
+            b = (2 * idx + 1) % inputs
+            handle.write(f"  AND2 g{idx} (.A(i{a}), .B(i{b}), .Y(y{idx}));\n")
+        handle.write("endmodule\n")
+    blocks_path.write_text(
+        f"[top_IN]\nin = 0\nout = {inputs}\n\n[top_OUT]\nin = {gates}\nout = 0\n",
+        encoding="utf-8",
+    )
+    with connections_path.open("w", encoding="utf-8") as handle:
+        for idx in range(gates):
+            a = (2 * idx) % inputs + 1
+            b = (2 * idx + 1) % inputs + 1
+            handle.write(f"AND2 g{idx}: top_IN.out{a}, top_IN.out{b} -> top_OUT.in{idx + 1} | y{idx}\n")
+    return verilog_path, blocks_path, connections_path
+
+
+def measure(func) -> tuple[float, float, object]:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse_verilog vs parse_blocks/parse_connections")
+    parser.add_argument("--gates", type=int, default=20000)
+    parser.add_argument("--inputs", type=int, default=256)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        verilog_path, blocks_path, connections_path = write_designs(Path(tmp), args.gates, args.inputs)
+
+        def run_dsl():
+            nodes = parse_blocks(blocks_path)
+            return nodes, parse_connections(connections_path, nodes)
+
+        rows = [
+            ("parse_verilog", verilog_path.stat().st_size, *measure(lambda: parse_verilog(verilog_path))),
+            (
+                "parse_blocks+parse_connections",
+                blocks_path.stat().st_size + connections_path.stat().st_size,
+                *measure(run_dsl),
+            ),
+        ]
+    print(f"gates={args.gates} inputs={args.inputs}")
+    for name, size, elapsed, peak, (nodes, connections) in rows:
+        print(
+            f"{name:32s} {size / 1024:10.1f} KiB {elapsed * 1000:10.1f} ms "
+            f"{peak:8.1f} MiB peak  nodes={len(nodes)} connections={len(connections)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
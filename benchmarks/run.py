@@ -0,0 +1,195 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import diagram  # noqa: E402
+from graph_export import write_dot, write_json  # noqa: E402
+from synth import write_design  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _peak_mb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+class Suite:
+    def __init__(self):
+        self.results: dict[str, dict[str, float]] = {}
+
+    def time(self, name: str, func, repeat: int = 1, memory: bool = False):
+        best = None
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.results[name] = {"seconds": best}
+        line = f"{name:24s} {best * 1000:10.1f} ms"
+        if memory:
+            self.results[name]["peak_mb"] = _peak_mb(func)
+            line += f" {self.results[name]['peak_mb']:10.1f} MiB peak"
+        print(line)
+        return result
+
+
+def run_parse(suite: Suite, blocks_path: Path, connections_path: Path, log_path: Path, repeat: int):
+    nodes = suite.time("parse_blocks", lambda: diagram.parse_blocks(blocks_path), repeat, memory=True)
+    connections = suite.time(
+        "parse_connections", lambda: diagram.parse_connections(connections_path, nodes), repeat, memory=True
+    )
+    suite.time(
+        "validate_connections", lambda: diagram.validate_connections(nodes, connections, log_path), repeat, memory=True
+    )
+    return nodes, connections
+
+
+def run_export(suite: Suite, nodes, connections, directory: Path, repeat: int):
+    dot_path, json_path = directory / "diagram.dot", directory / "diagram.json"
+    suite.time("export_dot", lambda: write_dot(nodes.values(), connections, dot_path), repeat, memory=True)
+    suite.time("export_json", lambda: write_json(nodes.values(), connections, json_path), repeat, memory=True)
+
+
+def run_gui(suite: Suite, nodes, connections, output_path: Path, steps: int):
+    try:
+        app = suite.time(
+            "build_ui",
+            lambda: diagram.DiagramApp(nodes, connections, output_path, autosave=False),
+        )
+    except diagram.tk.TclError as exc:
+        print(f"GUI 단계를 건너뜁니다 (디스플레이 없음: {exc}). xvfb-run으로 실행하세요.")
+        return
+    app.root.update()
+    node = next(node for node in app.nodes.values() if node.kind == "BLOCK")
+
+    def drag():
+        internal, boundary = app._incident_wires({node.name})
+        wires = internal + boundary
+        app._raise_node_and_wires(node.name)
+        app._drag_data.update(node=node, x=node.x, y=node.y, group=False, internal=None, boundary=wires)
+        app._begin_static_cache({node.name}, wires)
+        for step in range(1, steps + 1):
+            app._on_motion(SimpleNamespace(x=node.x + 10 * step, y=node.y + 10 * step))
+            app.root.update_idletasks()
+        app._on_release(None)
+        app.root.update()
+
+    def resize():
+        node.resize_enabled = True
+        app._resize_data["node"] = node
+        app._resize_data["mode"] = "right"
+        app._resize_data["x"] = node.x + node.width
+        app._resize_data["y"] = node.y
+        app._resize_data["orig"] = (node.x, node.y, node.width, node.height)
+        internal, boundary = app._incident_wires({node.name})
+        app._resize_data["wires"] = internal + boundary
+        app._begin_static_cache({node.name}, internal + boundary)
+        for step in range(1, steps + 1):
+            app._on_resize_motion(SimpleNamespace(x=node.x + node.width + 10 * step, y=node.y))
+            app.root.update_idletasks()
+        app._on_resize_release(None)
+        node.resize_enabled = False
+        app.root.update()
+
+    suite.time("drag", drag)
+    suite.time("resize", resize)
+    suite.time("save_diagram", lambda: app.save_diagram(output_path))
+    app.root.destroy()
+
+
+def compare(results: dict, baseline: dict, config: dict, tolerance: float) -> bool:
+    if baseline.get("config") != config:
+        print("기준값의 설정이 달라 비교하지 않습니다. --update-baseline으로 새로 저장하세요.")
+        return True
+    ok = True
+    for name, values in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:24s} 기준값 없음")
+            continue
+        status = "OK"
+        report = []
+        for key, unit in (("seconds", "time"), ("peak_mb", "memory")):
+            if key not in values or not base.get(key):
+                continue
+            ratio = values[key] / base[key]
+            report.append(f"{unit} {ratio:6.2f}x")
+            if ratio > 1 + tolerance:
+                status = "REGRESSION"
+                ok = False
+        print(f"{name:24s} {'  '.join(report)} baseline  {status}")
+    for name in baseline.get("results", {}).keys() - results.keys():
+        print(f"{name:24s} 측정되지 않음 (기준값에만 있음)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-design benchmarks for diagram.py")
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--ports", type=int, default=8)
+    parser.add_argument("--gates", type=int, default=400)
+    parser.add_argument("--nets", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--block-format", choices=("ini", "jsonl", "csv"), default="ini")
+    parser.add_argument("--steps", type=int, default=50, help="motion events for drag/resize")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions for parse phases (best is kept)")
+    parser.add_argument("--no-gui", action="store_true")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    config = {
+        "blocks": args.blocks,
+        "ports": args.ports,
+        "gates": args.gates,
+        "nets": args.nets,
+        "seed": args.seed,
+        "steps": args.steps,
+    }
+    if args.block_format != "ini":
+        config["block_format"] = args.block_format
+    suite = Suite()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        blocks_path, connections_path = write_design(
+            tmp_path,
+            blocks=args.blocks,
+            ports=args.ports,
+            gates=args.gates,
+            nets=args.nets,
+            seed=args.seed,
+            block_format=args.block_format,
+        )
+        nodes, connections = run_parse(suite, blocks_path, connections_path, tmp_path / "error.log", args.repeat)
+        run_export(suite, nodes, connections, tmp_path, args.repeat)
+        if not args.no_gui:
+            run_gui(suite, nodes, connections, tmp_path / "diagram.png", args.steps)
+    if args.update_baseline:
+        results = suite.results
+        if args.baseline.exists():
+            previous = json.loads(args.baseline.read_text())
+            if previous.get("config") == config:
+                results = {**previous.get("results", {}), **suite.results}
+        args.baseline.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        print(f"기준값을 저장했습니다: {args.baseline}")
+        return
+    if args.baseline.exists():
+        if not compare(suite.results, json.loads(args.baseline.read_text()), config, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
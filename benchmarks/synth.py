@@ -0,0 +1,52 @@
+import json
+import random
+from pathlib import Path
+
+from diagram import GATE_DEFINITIONS
+
+
+def write_design(
+    directory: Path,
+    blocks: int = 100,
+    ports: int = 8,
+    gates: int = 200,
+    nets: int = 400,
+    gate_mix: dict[str, float] | None = None,
+    seed: int = 0,
+    block_format: str = "ini",
+) -> tuple[Path, Path]:
+    rng = random.Random(seed)
+    mix = gate_mix or {kind: 1.0 for kind in GATE_DEFINITIONS}
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    directory.mkdir(parents=True, exist_ok=True)
+    blocks_path = directory / {"ini": "input.txt", "jsonl": "input.jsonl", "csv": "input.csv"}[block_format]
+    connections_path = directory / "connections.txt"
+    inputs = [f"in{idx}" for idx in range(1, ports + 1)]
+    outputs = [f"out{idx}" for idx in range(1, ports + 1)]
+    with blocks_path.open("w", encoding="utf-8") as handle:
+        if block_format == "csv":
+            handle.write("name,kind,in,out,x,y\n")
+        for idx in range(blocks):
+            x, y = 80 + (idx % 100) * 260, 80 + (idx // 100) * 160
+            if block_format == "jsonl":
+                record = {"name": f"B{idx}", "kind": "BLOCK", "in": inputs, "out": outputs, "x": x, "y": y}
+                handle.write(json.dumps(record) + "\n")
+            elif block_format == "csv":
+                handle.write(f"B{idx},BLOCK,{' '.join(inputs)},{' '.join(outputs)},{x},{y}\n")
+            else:
+                handle.write(f"[B{idx}]\nin = {ports}\nout = {ports}\n\n")
+
+    def endpoint(kind: str) -> str:
+        return f"B{rng.randrange(blocks)}.{kind}{rng.randrange(ports) + 1}"
+
+    with connections_path.open("w", encoding="utf-8") as handle:
+        for idx in range(gates):
+            kind = rng.choices(kinds, weights)[0]
+            sources = ", ".join(endpoint("out") for _ in range(GATE_DEFINITIONS[kind]["inputs"]))
+            handle.write(f"{kind} G{idx}: {sources} -> {endpoint('in')} | g{idx}\n")
+        for idx in range(nets):
+            width = rng.choice((1, 4, 8, 16, 32))
+            label = f"n{idx}" if width == 1 else f"n{idx}[{width - 1}:0]"
+            handle.write(f"{endpoint('out')} -> {endpoint('in')} | {label}\n")
+    return blocks_path, connections_path
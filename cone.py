@@ -0,0 +1,81 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+from model import Connection, DiagramModel, ModelChange
+
+Endpoint = tuple[str, str]
+
+
+@dataclass
+class Cone:
+    nodes: set[str] = field(default_factory=set)
+    connections: list[Connection] = field(default_factory=list)
+
+
+class ConnectivityGraph:
+    def __init__(self, model: DiagramModel):
+        self.model = model
+        self._fanout: dict[Endpoint, list[Connection]] = {}
+        self._fanin: dict[Endpoint, list[Connection]] = {}
+        self.rebuild()
+        model.subscribe(self._on_changes)
+
+    def close(self):
+        self.model.unsubscribe(self._on_changes)
+
+    def rebuild(self):
+        self._fanout.clear()
+        self._fanin.clear()
+        for connection in self.model.connections:
+            self._add(connection)
+
+    def _add(self, connection: Connection):
+        if connection.src:
+            self._fanout.setdefault(connection.src, []).append(connection)
+        if connection.dst:
+            self._fanin.setdefault(connection.dst, []).append(connection)
+
+    def _discard(self, connection: Connection):
+        for table, endpoint in ((self._fanout, connection.src), (self._fanin, connection.dst)):
+            wires = table.get(endpoint) if endpoint else None
+            if not wires:
+                continue
+            wires[:] = [wire for wire in wires if wire is not connection]
+            if not wires:
+                del table[endpoint]
+
+    def _on_changes(self, changes: list[ModelChange]):
+        for change in changes:
+            if change.op == "add_connection":
+                self._add(change.connection)
+            elif change.op == "remove_connection":
+                self._discard(change.connection)
+
+    def cone(self, node_name: str, port_name: str, kind: str, direction: str, stop_at_dff: bool = False) -> Cone:
+        forward = direction == "out"
+        edges = self._fanout if forward else self._fanin
+        cone = Cone({node_name})
+        start = self.model.nodes[node_name]
+        expanded: set[str] = set()
+        if (kind == "out") == forward:
+            queue = deque([(node_name, port_name)])
+        else:
+            expanded.add(node_name)
+            queue = deque((node_name, port.name) for port in (start.outputs if forward else start.inputs))
+        seen = set(queue)
+        while queue:
+            for connection in edges.get(queue.popleft(), ()):
+                cone.connections.append(connection)
+                endpoint = connection.dst if forward else connection.src
+                if endpoint is None:
+                    continue
+                cone.nodes.add(endpoint[0])
+                node = self.model.nodes.get(endpoint[0])
+                if node is None or node.name in expanded or (stop_at_dff and node.kind == "DFF"):
+                    continue
+                expanded.add(node.name)
+                for port in node.outputs if forward else node.inputs:
+                    if (node.name, port.name) not in seen:
+                        seen.add((node.name, port.name))
+                        queue.append((node.name, port.name))
+        return cone
@@ -1,62 +1,189 @@
 import configparser
+import csv
+import functools
+import gc
+import io
+import json
 import re
 import sys
+import time
 import tkinter as tk
 from dataclasses import dataclass, field
 from pathlib import Path
 
-
-@dataclass
-class Port:
-    name: str
-    kind: str
-    canvas_id: int | None = None
-    connected: bool = True
-    manual_y: float | None = None
-    color: str = "black"
+from align import AlignmentIndex, guide_lines
+from cone import ConnectivityGraph
+from minimap import Minimap
+from model import (
+    GATE_DEFINITIONS,
+    PORT_SIDES,
+    ChildRef,
+    Connection,
+    DiagramModel,
+    ModelChange,
+    Node,
+    Port,
+    is_dense,
+    is_packed,
+    make_block,
+    make_gate,
+    port_groups,
+    port_positions,
+)
+from search import DiagramSearch
+from spatial import SpatialGrid, rects_intersect
+from timing import STRUCTURE_OPS, TimingGraph, parse_delays
 
 
 @dataclass
-class Node:
-    name: str
-    kind: str
-    inputs: list[Port]
-    outputs: list[Port]
-    x: int
-    y: int
-    width: int = 160
-    height: int = 100
-    base_height: int = 100
-    items: list[int] = field(default_factory=list)
-    resize_enabled: bool = False
+class HandlerStats:
+    count: int = 0
+    total: float = 0.0
+    last: float = 0.0
+    worst: float = 0.0
+    tk_calls: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * 32)
+
+
+class PerfStats:
+    def __init__(self):
+        self.handlers: dict[str, HandlerStats] = {}
+        self.tk_calls = 0
+
+    def record(self, name: str, seconds: float, tk_calls: int = 0):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        stats.count += 1
+        stats.total += seconds
+        stats.last = seconds
+        stats.worst = max(stats.worst, seconds)
+        stats.tk_calls += tk_calls
+        micros = int(seconds * 1_000_000)
+        stats.buckets[min(micros.bit_length(), 31)] += 1
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for name, stats in sorted(self.handlers.items()):
+            avg = stats.total / stats.count if stats.count else 0.0
+            tk_per_call = stats.tk_calls / stats.count if stats.count else 0.0
+            lines.append(
+                f"{name:20s} n={stats.count:<6d} last={stats.last * 1000:7.2f}ms "
+                f"avg={avg * 1000:7.2f}ms max={stats.worst * 1000:7.2f}ms tk={tk_per_call:7.1f}"
+            )
+        return lines
+
+    def dump(self, path: Path):
+        lines = self.summary_lines()
+        lines.append("")
+        for name, stats in sorted(self.handlers.items()):
+            lines.append(f"[{name}]")
+            for bucket, count in enumerate(stats.buckets):
+                if not count:
+                    continue
+                low = 0 if bucket == 0 else 1 << (bucket - 1)
+                high = 1 << bucket
+                lines.append(f"  {low:>9d}-{high:<9d}us {count:8d} {'#' * min(count, 60)}")
+        lines.append("")
+        lines.append(f"tk calls total: {self.tk_calls}")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class _CountingTk:
+    def __init__(self, tkapp, perf: PerfStats):
+        self._tkapp = tkapp
+        self._perf = perf
+
+    def call(self, *args):
+        self._perf.tk_calls += 1
+        return self._tkapp.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tkapp, name)
+
+
+def _timed(name: str, frame: bool = False):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            perf = self._perf
+            if perf is None:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            calls = perf.tk_calls
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                perf.record(name, time.perf_counter() - start, perf.tk_calls - calls)
+                if frame:
+                    self._mark_frame(start)
+
+        return wrapper
+
+    return decorator
 
 
 @dataclass
-class Connection:
-    src: tuple[str, str] | None
-    dst: tuple[str, str] | None
+class Bus:
+    src_node: str
+    dst_node: str
+    connections: list[Connection]
     line_id: int | None = None
-    manual_mid_x: float | None = None
-    label: str | None = None
     label_id: int | None = None
+    expanded: bool = False
+    manual_mid_x: float | None = None
 
 
 class DiagramApp:
     GRID_STEP = 10
     MID_STEP = 5
     PORT_RADIUS = 5
+    BUS_MIN_NETS = 2
+    BUS_WIDTH = 5
+    LABEL_CHAR_WIDTH = 5
+    LABEL_LINE_HEIGHT = 9
+    LABEL_GAP = 4
+    TRACK_PITCH = 10
+    WIRE_COLOR = "#333333"
+    CHUNK_BUDGET = 0.008
+    REDRAW_THRESHOLD = 200
+    SEARCH_LIMIT = 50
+    SEARCH_MARK_COLOR = "#ff8c00"
+    TRACE_COLOR = "#9400d3"
+    CRITICAL_COLOR = "#d7191c"
+    GUIDE_COLOR = "#ff00ff"
+    SIM_HIGH_COLOR = "#00a000"
+    SIM_LOW_COLOR = "#1f4e9e"
+    SIM_MIXED_COLOR = "#e8a317"
+    SIM_STRUCTURE_OPS = frozenset(
+        ("add_node", "remove_node", "add_port", "remove_port", "add_connection", "remove_connection")
+    )
+    RASTER_MIN_ITEMS = 2000
 
     def __init__(
         self,
         nodes: dict[str, Node],
         connections: list[Connection],
         output_path: Path,
+        master: tk.Misc | None = None,
+        autosave: bool = True,
+        child_apps: dict[ChildRef, "DiagramApp"] | None = None,
+        progressive: bool = False,
+        startup_report: float | None = None,
+        node_colors: dict[str, str] | None = None,
+        wire_colors: dict[int, str] | None = None,
+        raster_drag: bool = False,
+        gate_delays: dict[str, float] | None = None,
+        critical_paths: int = 5,
     ):
-        self.nodes = nodes
-        self.connections = connections
+        self.startup_marks: dict[str, float] = {"app": time.perf_counter()}
+        self.model = DiagramModel(nodes, connections)
         self.output_path = output_path
-        self.root = tk.Tk()
+        self.root = tk.Toplevel(master) if master is not None else tk.Tk()
         self.root.title("Block Diagram")
+        self._autosave = autosave
+        self._child_apps = child_apps if child_apps is not None else {}
+        self._shown = True
         self.toolbar = tk.Frame(self.root)
         self.toolbar.pack(fill=tk.X)
         self.new_button = tk.Button(self.toolbar, text="NEW", command=self._open_new_block)
@@ -71,33 +198,311 @@ class DiagramApp:
         self.bring_front_button.pack(side=tk.LEFT, padx=4, pady=4)
         self.send_back_button = tk.Button(self.toolbar, text="SEND BACK", command=self._send_active_back)
         self.send_back_button.pack(side=tk.LEFT, padx=4, pady=4) 
+        self.bus_button = tk.Button(self.toolbar, text="EXPAND/COLLAPSE BUS", command=self._toggle_buses)
+        self.bus_button.pack(side=tk.LEFT, padx=4, pady=4)
+        self.child_button = tk.Button(self.toolbar, text="EXPAND/COLLAPSE BLOCK", command=self._toggle_active_child)
+        self.child_button.pack(side=tk.LEFT, padx=4, pady=4)
+        self.trace_dff_var = tk.BooleanVar(value=True)
+        self.trace_dff_check = tk.Checkbutton(
+            self.toolbar, text="STOP AT DFF", variable=self.trace_dff_var, command=self._draw_trace
+        )
+        self.trace_dff_check.pack(side=tk.LEFT, padx=4, pady=4)
+        self.align_var = tk.BooleanVar(value=True)
+        self.align_check = tk.Checkbutton(self.toolbar, text="ALIGN", variable=self.align_var)
+        self.align_check.pack(side=tk.LEFT, padx=4, pady=4)
+        self.sim_label = tk.Label(self.toolbar, text="")
+        self.sim_label.pack(side=tk.LEFT, padx=4, pady=4)
+        self.critical_label = tk.Label(self.toolbar, text="")
+        self.critical_label.pack(side=tk.LEFT, padx=4, pady=4)
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(self.toolbar, textvariable=self.search_var, width=28)
+        self.search_entry.pack(side=tk.RIGHT, padx=4, pady=4)
+        tk.Label(self.toolbar, text="FIND").pack(side=tk.RIGHT)
         self.canvas = tk.Canvas(self.root, width=1200, height=800, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self._drag_data = {"node": None, "x": 0, "y": 0}
+        self.search_list = tk.Listbox(self.root, width=40, activestyle="none")
+        self._drag_data = {"node": None, "x": 0, "y": 0, "group": False, "internal": None, "boundary": None}
+        self._selection: set[str] = set()
+        self._band: dict = {"start": None, "item": None}
         self._drag_wire = {"connection": None, "offset": 0.0, "mode": None, "port": None, "node": None}
-        self._resize_data = {"node": None, "mode": None, "x": 0, "y": 0, "orig": None}
+        self._resize_data = {"node": None, "mode": None, "x": 0, "y": 0, "orig": None, "wires": None}
         self._mode = "normal"
         self._show_ports = True
         self._port_items: dict[int, tuple[str, str]] = {}
+        self._port_groups: dict[int, tuple[str, list[Port]]] = {}
+        self._dense_ports: dict[str, tuple[tuple, dict[tuple[str, str], tuple[float, float]]]] = {}
         self._selected_ports: list[tuple[str, str]] = []
         self._active_node_name: str | None = None
+        self._buses: list[Bus] = []
+        self._perf: PerfStats | None = None
+        self._perf_stats: PerfStats | None = None
+        self._perf_after: str | None = None
+        self._frame_pending = False
+        self._label_index = SpatialGrid()
+        self._label_routes: dict[int, tuple[tuple[float, ...], str]] = {}
+        self._label_groups: dict[int, list[Connection]] = {}
+        self._channel_router = None
+        self._routed: dict[int, Connection | Bus] = {}
+        self._progressive = progressive
+        self._loading = False
+        self._draw_generation = 0
+        self._startup_report = startup_report
+        self._node_colors: dict[str, str] = dict(node_colors or {})
+        self._wire_colors: dict[int, str] = dict(wire_colors or {})
+        self._search: DiagramSearch | None = None
+        self._search_results: list[tuple[str, tuple]] = []
+        self._graph: ConnectivityGraph | None = None
+        self._trace: tuple[str, str, str, str] | None = None
+        self._trace_wires: list[Connection | Bus] = []
+        self._trace_pending = False
+        self._raster_drag = raster_drag
+        self._static_cache: tk.PhotoImage | None = None
+        self._simulator = None
+        self._sim = None
+        self._sim_cycle = 0
+        self._sim_values = None
+        self._sim_wires: list[Connection | Bus] = []
+        self._sim_labels: dict[int, str] = {}
+        self._sim_pending = False
+        self._minimap: Minimap | None = None
+        self._align: AlignmentIndex | None = None
+        self._timing: TimingGraph | None = None
+        self._gate_delays = gate_delays
+        self._critical_paths = critical_paths
+        self._critical = False
+        self._critical_wires: list[Connection | Bus] = []
+        self._critical_pending = False
+        self.model.subscribe(self._on_model_changes)
+        self.model.subscribe(self._on_trace_changes)
+        self.model.subscribe(self._on_sim_changes)
+        self.model.subscribe(self._on_critical_changes)
         self._build_ui()
 
+    @property
+    def nodes(self) -> dict[str, Node]:
+        return self.model.nodes
+
+    @property
+    def connections(self) -> list[Connection]:
+        return self.model.connections
+
     def _build_ui(self):
-        for node in self.nodes.values():
-            self._draw_node(node)
-        for connection in self.connections:
-            self._draw_connection(connection)
+        if self._progressive:
+            self.root.update()
+            self._mark_startup("window")
+            self._draw_progressively()
+        else:
+            self._draw_all()
         self.canvas.tag_bind("node", "<ButtonPress-1>", self._on_press)
         self.canvas.tag_bind("node", "<ButtonRelease-1>", self._on_release)
         self.canvas.tag_bind("node", "<B1-Motion>", self._on_motion)
         self.canvas.tag_bind("node", "<Double-Button-1>", self._on_toggle_resize)
+        self.canvas.tag_bind("node", "<Shift-ButtonPress-1>", self._on_shift_press)
+        self.canvas.bind("<ButtonPress-1>", self._on_canvas_press)
+        self.canvas.bind("<B1-Motion>", self._on_canvas_motion)
+        self.canvas.bind("<ButtonRelease-1>", self._on_canvas_release)
+        self.root.bind("<Escape>", lambda _event: self._set_selection(set()))
         self.canvas.tag_bind("port", "<ButtonPress-1>", self._on_port_press)
+        self.canvas.tag_bind("port", "<Control-ButtonPress-1>", lambda event: self._on_port_trace(event, "out"))
+        self.canvas.tag_bind("port", "<Control-Shift-ButtonPress-1>", lambda event: self._on_port_trace(event, "in"))
+        self.root.bind("<Escape>", lambda _event: self.clear_trace(), add="+")
+        self.root.bind("<Escape>", lambda _event: self.clear_simulation(), add="+")
+        self.root.bind("<Escape>", lambda _event: self.clear_critical(), add="+")
+        self.root.bind("<bracketleft>", lambda _event: self.show_cycle(self._sim_cycle - 1))
+        self.root.bind("<bracketright>", lambda _event: self.show_cycle(self._sim_cycle + 1))
         self.canvas.tag_bind("wire", "<ButtonPress-1>", self._on_wire_press)
         self.canvas.tag_bind("wire", "<B1-Motion>", self._on_wire_motion)
         self.canvas.tag_bind("wire", "<ButtonRelease-1>", self._on_wire_release)
+        self.canvas.tag_bind("wire", "<Double-Button-1>", self._on_wire_double_click)
+        self.canvas.tag_bind("bus", "<ButtonPress-1>", self._on_bus_press)
+        self.canvas.tag_bind("bus", "<Double-Button-1>", self._on_bus_double_click)
         self.root.bind("s", lambda _event: self.save_diagram(self.output_path))
-        self.root.after(300, lambda: self.save_diagram(self.output_path))
+        self.root.bind("e", lambda _event: self.export_poster(self.output_path.with_suffix(".poster.png")))
+        self.root.bind("g", lambda _event: self.export_graph(self.output_path.with_suffix(".dot")))
+        self.root.bind("j", lambda _event: self.export_graph(self.output_path.with_suffix(".json")))
+        self.root.bind("p", lambda _event: self._toggle_perf_overlay())
+        self.root.bind("h", lambda _event: self._dump_perf())
+        self.root.bind("m", lambda _event: self._toggle_minimap())
+        self.root.bind("t", lambda _event: self._toggle_critical())
+        self.canvas.bind("<Configure>", lambda _event: self._update_minimap_view())
+        self.search_entry.bindtags((self.search_entry, "Entry", "all"))
+        self.search_list.bindtags((self.search_list, "Listbox", "all"))
+        self.search_var.trace_add("write", lambda *_args: self._on_search_changed())
+        self.search_entry.bind("<Return>", lambda _event: self._jump_to_result(0))
+        self.search_entry.bind("<Down>", lambda _event: self._focus_search_list())
+        self.search_entry.bind("<Escape>", lambda _event: self._clear_search())
+        self.search_list.bind("<Return>", lambda _event: self._jump_to_selected())
+        self.search_list.bind("<Double-Button-1>", lambda _event: self._jump_to_selected())
+        self.search_list.bind("<Escape>", lambda _event: self._clear_search())
+        self.root.bind("<Control-f>", lambda _event: self.search_entry.focus_set())
+        if not self._progressive:
+            self._finish_loading()
+
+    @property
+    def _router(self):
+        if self._channel_router is None:
+            from routing import ChannelRouter
+
+            self._channel_router = ChannelRouter(self.TRACK_PITCH)
+        return self._channel_router
+
+    def _draw_all(self):
+        for node in self.nodes.values():
+            self._draw_node(node)
+        for wire, ends in self._prepare_wires():
+            self._draw_wire(wire, ends)
+
+    def _prepare_wires(self) -> list[tuple[Connection | Bus, tuple | None]]:
+        self._buses = self._find_buses()
+        self._label_groups = self._find_label_groups()
+        bundled = {id(connection) for bus in self._buses for connection in bus.connections}
+        endpoints: dict[int, tuple] = {}
+        for connection in self.connections:
+            if id(connection) in bundled:
+                continue
+            ends = self._connection_endpoints(connection)
+            if ends:
+                endpoints[id(connection)] = ends
+                self._register_route(connection, ends)
+        for bus in self._buses:
+            ends = self._bus_endpoints(bus)
+            if ends:
+                endpoints[id(bus)] = ends
+                self._register_route(bus, ends)
+        self._router.take_changed()
+        wires: list[tuple[Connection | Bus, tuple | None]] = [
+            (connection, endpoints[id(connection)]) for connection in self.connections if id(connection) in endpoints
+        ]
+        wires.extend((bus, endpoints.get(id(bus))) for bus in self._buses)
+        return wires
+
+    def _draw_wire(self, wire: Connection | Bus, endpoints: tuple | None):
+        if isinstance(wire, Bus):
+            self._draw_bus(wire, endpoints)
+        else:
+            self._draw_connection(wire, endpoints)
+
+    def _canvas_size(self) -> tuple[int, int]:
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return int(self.canvas.cget("width")), int(self.canvas.cget("height"))
+        return width, height
+
+    def _canvas_point(self, event) -> tuple[float, float]:
+        return self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+
+    def _view_rect(self) -> tuple[float, float, float, float]:
+        width, height = self._canvas_size()
+        return (self.canvas.canvasx(0), self.canvas.canvasy(0), self.canvas.canvasx(width), self.canvas.canvasy(height))
+
+    def _draw_progressively(self):
+        self._loading = True
+        self._draw_generation += 1
+        view = self._view_rect()
+
+        def node_rank(node: Node) -> tuple[bool, bool]:
+            rect = (node.x, node.y, node.x + node.width, node.y + node.height)
+            return not rects_intersect(rect, view), node.kind != "BLOCK"
+
+        nodes = sorted(self.nodes.values(), key=node_rank)
+        self._draw_in_chunks(iter(nodes), self._draw_node, self._draw_wires_progressively, self._draw_generation)
+
+    def _draw_wires_progressively(self):
+        view = self._view_rect()
+
+        def wire_rank(item: tuple[Connection | Bus, tuple | None]) -> bool:
+            _wire, ends = item
+            return not any(
+                point and view[0] <= point[0] <= view[2] and view[1] <= point[1] <= view[3] for point in ends or ()
+            )
+
+        wires = sorted(self._prepare_wires(), key=wire_rank)
+        self._mark_startup("nodes")
+        self._draw_in_chunks(
+            iter(wires), lambda item: self._draw_wire(*item), self._finish_loading, self._draw_generation
+        )
+
+    def _draw_in_chunks(self, items, draw, done, generation: int):
+        if generation != self._draw_generation:
+            return
+        deadline = time.perf_counter() + self.CHUNK_BUDGET
+        for item in items:
+            draw(item)
+            if time.perf_counter() >= deadline:
+                self._mark_startup("first_chunk")
+                self.root.after(1, self._draw_in_chunks, items, draw, done, generation)
+                return
+        self._mark_startup("first_chunk")
+        done()
+
+    def _finish_loading(self):
+        self._loading = False
+        self._mark_startup("complete")
+        if self._startup_report is not None:
+            self.root.update()
+            self._mark_startup("shown")
+            origin = self._startup_report
+            for name, stamp in self.startup_marks.items():
+                print(f"{name:12s} {(stamp - origin) * 1000:10.1f} ms")
+            print(f"canvas items {len(self.canvas.find_all()):10d}")
+            self.root.destroy()
+            return
+        self._search = DiagramSearch(self.model)
+        self._graph = ConnectivityGraph(self.model)
+        if self._autosave:
+            self.root.after(300, lambda: self.save_diagram(self.output_path))
+
+    def _mark_startup(self, name: str):
+        self.startup_marks.setdefault(name, time.perf_counter())
+
+    def _redraw_all(self):
+        self._loading = False
+        self._draw_generation += 1
+        self.canvas.delete("all")
+        self._static_cache = None
+        for node in self.nodes.values():
+            node.items.clear()
+        for connection in self.connections:
+            connection.line_id = None
+            connection.label_id = None
+        self._port_items.clear()
+        self._port_groups.clear()
+        self._dense_ports.clear()
+        self._label_index.clear()
+        self._label_routes.clear()
+        self._channel_router = None
+        self._routed.clear()
+        self._selection = {name for name in self._selection if name in self.nodes}
+        self._draw_all()
+        self._refresh_selection()
+
+    def _on_model_changes(self, changes: list[ModelChange]):
+        changes = [change for change in changes if change.origin is not self]
+        if not changes:
+            return
+        if self._loading or len(changes) > self.REDRAW_THRESHOLD:
+            self._redraw_all()
+            return
+        redraw: dict[str, None] = {}
+        for change in changes:
+            if change.op == "add_node":
+                self._draw_node(self.nodes[change.node])
+            elif change.op == "remove_node":
+                redraw.pop(change.node, None)
+                self._forget_ports(change.node, self.canvas.find_withtag(f"node:{change.node}"))
+                self.canvas.delete(f"node:{change.node}")
+                self._label_index.remove(("node", change.node))
+                self._router.remove_block(change.node)
+                self._selection.discard(change.node)
+            elif change.op == "add_connection":
+                self._add_connection_wire(change.connection)
+            elif change.op == "remove_connection":
+                self._forget_connection(change.connection)
+            elif change.node in self.nodes:
+                redraw[change.node] = None
+        for name in redraw:
+            self._redraw_node(self.nodes[name])
+        self._update_connections()
 
     def _draw_node(self, node: Node):
         x1, y1 = node.x, node.y
@@ -125,53 +530,109 @@ class DiagramApp:
                 anchor="nw",
             )
             node.items.append(label)
+            if node.child is not None:
+                marker = self.canvas.create_text(
+                    x2 - 6,
+                    y1 + 6,
+                    text="[-]" if self._child_open(node.child) else "[+]",
+                    font=("Arial", 10, "bold"),
+                    anchor="ne",
+                )
+                node.items.append(marker)
 
-        inputs = node.inputs
-        outputs = node.outputs
-        if node.kind == "BLOCK":
-            port_gap = max(node.base_height - 60, 40)
-            if inputs:
-                input_step = port_gap // max(len(inputs), 1)
-                for idx, port in enumerate(inputs, start=1):
-                    px, py = x1, y1 + 50 + idx * input_step
-                    py = port.manual_y if port.manual_y is not None else py
-                    port_id = self._create_port_oval(px, py, port.color)
-                    port.canvas_id = port_id
-                    node.items.append(port_id)
-                    self._register_port(node.name, port)
-            if outputs:
-                output_step = port_gap // max(len(outputs), 1)
-                for idx, port in enumerate(outputs, start=1):
-                    px, py = x2, y1 + 50 + idx * output_step
-                    py = port.manual_y if port.manual_y is not None else py
-                    port_id = self._create_port_oval(px, py, port.color)
-                    port.canvas_id = port_id
-                    node.items.append(port_id)
-                    self._register_port(node.name, port)
+        color = self._node_colors.get(node.name)
+        if color:
+            halo = self.canvas.create_rectangle(x1 - 4, y1 - 4, x2 + 4, y2 + 4, outline=color, width=3)
+            node.items.append(halo)
+
+        if is_dense(node):
+            self._draw_port_groups(node)
         else:
-            if inputs:
-                for idx, port in enumerate(inputs, start=1):
-                    py = y1 + (idx / (len(inputs) + 1)) * (y2 - y1)
-                    py = port.manual_y if port.manual_y is not None else py
-                    port_id = self._create_port_oval(x1, py, port.color)
-                    port.canvas_id = port_id
-                    node.items.append(port_id)
-                    self._register_port(node.name, port)
-            if outputs:
-                for idx, port in enumerate(outputs, start=1):
-                    py = y1 + (idx / (len(outputs) + 1)) * (y2 - y1)
-                    py = port.manual_y if port.manual_y is not None else py
-                    port_id = self._create_port_oval(x2, py, port.color)
-                    port.canvas_id = port_id
-                    node.items.append(port_id)
-                    self._register_port(node.name, port)
+            for port, px, py in port_positions(node):
+                port_id = self._create_port_oval(px, py, port.color)
+                port.canvas_id = port_id
+                node.items.append(port_id)
+                self._register_port(node.name, port)
 
         for item in node.items:
             self.canvas.addtag_withtag("node", item)
             self.canvas.addtag_withtag(f"node:{node.name}", item)
+        self._index_node(node)
+
+    def _index_node(self, node: Node):
+        self._label_index.insert(("node", node.name), (node.x, node.y, node.x + node.width, node.y + node.height))
+        self._router.set_block(node.name, node.x, node.x + node.width)
+
+    def _draw_port_groups(self, node: Node):
+        for side, entries in port_groups(node):
+            if is_packed(entries):
+                x1, y1 = entries[0][1:]
+                x2, y2 = entries[-1][1:]
+                pad = self.PORT_RADIUS - 2
+                item = self._create_port_bar(x1 - pad, y1 - pad, x2 + pad, y2 + pad, entries[0][0].color)
+                ports = [port for port, _px, _py in entries]
+                for port in ports:
+                    port.canvas_id = item
+                node.items.append(item)
+                self._port_groups[item] = (node.name, ports)
+                self.canvas.addtag_withtag("port", item)
+                continue
+            for port, px, py in entries:
+                port.canvas_id = self._create_port_oval(px, py, port.color)
+                node.items.append(port.canvas_id)
+                self._register_port(node.name, port)
+        self._dense_ports.pop(node.name, None)
+        self._dense_points(node)
+
+    def _create_port_bar(self, x1: float, y1: float, x2: float, y2: float, color: str) -> int:
+        hidden = not self._show_ports and color == "black"
+        return self.canvas.create_rectangle(
+            x1, y1, x2, y2, fill="" if hidden else color, outline="" if hidden else color, width=0 if hidden else 1
+        )
 
-    def _draw_connection(self, connection: Connection):
-        coords = self._connection_line_coords(connection)
+    def _dense_points(self, node: Node) -> dict[tuple[str, str], tuple[float, float]]:
+        geometry = (node.x, node.y, node.width, node.height)
+        cached = self._dense_ports.get(node.name)
+        if cached is None or cached[0] != geometry:
+            points = {(port.kind, port.name): (px, py) for port, px, py in port_positions(node)}
+            cached = self._dense_ports[node.name] = (geometry, points)
+        return cached[1]
+
+    def _forget_ports(self, node_name: str, items: list[int] | tuple[int, ...]):
+        for item in items:
+            self._port_items.pop(item, None)
+            self._port_groups.pop(item, None)
+        self._dense_ports.pop(node_name, None)
+
+    def _port_point(self, node_name: str, port_name: str, kind: str) -> tuple[float, float] | None:
+        if node_name in self._dense_ports:
+            return self._dense_points(self.nodes[node_name]).get((kind, port_name))
+        canvas_id = self._get_port_canvas_id(node_name, port_name, kind)
+        return self._port_center(canvas_id) if canvas_id else None
+
+    def _port_at(self, item: int, x: float, y: float) -> tuple[Node, Port] | None:
+        group = self._port_groups.get(item)
+        if group is not None:
+            node = self.nodes.get(group[0])
+            if node is None:
+                return None
+            points = self._dense_points(node)
+            x, y = self.canvas.canvasx(x), self.canvas.canvasy(y)
+
+            def distance(port: Port) -> float:
+                px, py = points[(port.kind, port.name)]
+                return abs(px - x) + abs(py - y)
+
+            return node, min(group[1], key=distance)
+        port_info = self._port_items.get(item)
+        node = self.nodes.get(port_info[0]) if port_info else None
+        if node is None:
+            return None
+        port = next((port for port in node.inputs + node.outputs if port.canvas_id == item), None)
+        return (node, port) if port else None
+
+    def _draw_connection(self, connection: Connection, endpoints: tuple | None = None):
+        coords = self._connection_line_coords(connection, endpoints)
         if not coords:
             return
         line = self.canvas.create_line(
@@ -179,20 +640,270 @@ class DiagramApp:
             smooth=False,
             arrow=tk.LAST,
             width=2,
-            fill="#333333",
+            fill=self._wire_colors.get(id(connection), self.WIRE_COLOR),
         )
         self.canvas.addtag_withtag("wire", line)
         connection.line_id = line
-        if connection.label:
-            label_x, label_y = self._label_position(coords)
-            label_id = self.canvas.create_text(
-                label_x,
-                label_y,
-                text=connection.label,
-                font=("Arial", 6),
-                anchor="s",
-            )
-            connection.label_id = label_id
+        if connection.label and not self._label_shared(connection):
+            self._create_label(connection, connection.label, coords)
+
+    def _find_label_groups(self) -> dict[int, list[Connection]]:
+        parent = list(range(len(self.connections)))
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        owners: dict[tuple, int] = {}
+        for index, connection in enumerate(self.connections):
+            if not connection.label:
+                continue
+            tokens: list[tuple] = []
+            if connection.src:
+                tokens.append(("port", connection.src))
+            for end in (connection.src, connection.dst):
+                node = self.nodes.get(end[0]) if end else None
+                if node and node.kind != "BLOCK":
+                    tokens.append(("gate", node.name))
+            for token in tokens:
+                other = owners.setdefault((connection.label, token), index)
+                if other != index:
+                    parent[find(index)] = find(other)
+        groups: dict[int, list[Connection]] = {}
+        for index, connection in enumerate(self.connections):
+            if connection.label:
+                groups.setdefault(find(index), []).append(connection)
+        return {id(conn): members for members in groups.values() if len(members) > 1 for conn in members}
+
+    def _label_shared(self, connection: Connection) -> bool:
+        members = self._label_groups.get(id(connection), [])
+        return any(other is not connection and other.label_id for other in members)
+
+    def _handover_label(self, connection: Connection):
+        for other in self._label_groups.get(id(connection), []):
+            if other is connection or not other.line_id or other.label_id or not other.label:
+                continue
+            coords = self._connection_line_coords(other)
+            if coords:
+                self._create_label(other, other.label, coords)
+                return
+
+    def _create_label(self, wire: Connection | Bus, text: str, coords: list[float]):
+        label_x, label_y, anchor = self._place_label(wire, text, coords)
+        wire.label_id = self.canvas.create_text(
+            label_x,
+            label_y,
+            text=text,
+            font=("Arial", 6),
+            anchor=anchor,
+        )
+
+    def _label_size(self, text: str) -> tuple[float, float]:
+        lines = text.split("\n")
+        return (
+            max(len(line) for line in lines) * self.LABEL_CHAR_WIDTH + 2,
+            len(lines) * self.LABEL_LINE_HEIGHT,
+        )
+
+    def _label_candidates(self, coords: list[float]) -> list[tuple[float, float, str]]:
+        points = list(zip(coords[0::2], coords[1::2]))
+        segments = [(a, b) for a, b in zip(points, points[1:]) if a != b]
+        gap = self.LABEL_GAP
+        candidates: list[tuple[float, float, str]] = []
+        for t in (0.5, 0.25, 0.75):
+            for (xa, ya), (xb, yb) in segments:
+                x = xa + (xb - xa) * t
+                y = ya + (yb - ya) * t
+                if ya == yb:
+                    candidates.append((x, y - gap, "s"))
+                    candidates.append((x, y + gap, "n"))
+                else:
+                    candidates.append((x - gap, y, "e"))
+                    candidates.append((x + gap, y, "w"))
+        return candidates
+
+    @staticmethod
+    def _anchored_rect(x: float, y: float, width: float, height: float, anchor: str):
+        if anchor == "s":
+            return (x - width / 2, y - height, x + width / 2, y)
+        if anchor == "n":
+            return (x - width / 2, y, x + width / 2, y + height)
+        if anchor == "e":
+            return (x - width, y - height / 2, x, y + height / 2)
+        return (x, y - height / 2, x + width, y + height / 2)
+
+    def _place_label(self, wire: Connection | Bus, text: str, coords: list[float]) -> tuple[float, float, str]:
+        key = ("label", id(wire))
+        self._label_index.remove(key)
+        width, height = self._label_size(text)
+        best = None
+        for x, y, anchor in self._label_candidates(coords):
+            rect = self._anchored_rect(x, y, width, height, anchor)
+            overlaps = len(self._label_index.query(rect))
+            if best is None or overlaps < best[0]:
+                best = (overlaps, x, y, anchor, rect)
+                if not overlaps:
+                    break
+        if best is None:
+            return coords[0], coords[1] - self.LABEL_GAP, "s"
+        _overlaps, x, y, anchor, rect = best
+        self._label_index.insert(key, rect)
+        self._label_routes[id(wire)] = (tuple(coords), anchor)
+        return x, y, anchor
+
+    def _find_buses(self) -> list[Bus]:
+        groups: dict[tuple[str, str], list[Connection]] = {}
+        for connection in self.connections:
+            if not connection.src or not connection.dst or connection.manual_mid_x is not None:
+                continue
+            if connection.src[0] == connection.dst[0] or id(connection) in self._wire_colors:
+                continue
+            groups.setdefault((connection.src[0], connection.dst[0]), []).append(connection)
+        buses: list[Bus] = []
+        for (src_node, dst_node), members in groups.items():
+            if len(members) < self.BUS_MIN_NETS or not self._routes_parallel(members):
+                continue
+            buses.append(Bus(src_node=src_node, dst_node=dst_node, connections=members))
+        return buses
+
+    def _routes_parallel(self, connections: list[Connection]) -> bool:
+        shapes = set()
+        for connection in connections:
+            ends = self._connection_endpoints(connection)
+            if not ends:
+                return False
+            coords = self._connection_coords(*ends)
+            shapes.add((len(coords), coords[2] if len(coords) >= 8 else None))
+        return len(shapes) == 1
+
+    def _bus_endpoints(self, bus: Bus) -> tuple[tuple[float, float], tuple[float, float]] | None:
+        first = self._connection_endpoints(bus.connections[0])
+        last = self._connection_endpoints(bus.connections[-1])
+        if not first or not last:
+            return None
+        (first_start, first_end), (last_start, last_end) = first, last
+        start = ((first_start[0] + last_start[0]) / 2, (first_start[1] + last_start[1]) / 2)
+        end = ((first_end[0] + last_end[0]) / 2, (first_end[1] + last_end[1]) / 2)
+        return start, end
+
+    def _bus_coords(self, bus: Bus, endpoints: tuple | None = None) -> list[float] | None:
+        ends = endpoints or self._bus_endpoints(bus)
+        if not ends:
+            return None
+        self._register_route(bus, ends)
+        return self._route_coords(bus, ends)
+
+    def _bus_label(self, bus: Bus) -> str:
+        labels = list(dict.fromkeys(conn.label for conn in bus.connections if conn.label))
+        return "\n".join([f"{len(bus.connections)} nets", *labels])
+
+    def _draw_bus(self, bus: Bus, endpoints: tuple | None = None):
+        coords = self._bus_coords(bus, endpoints)
+        if not coords:
+            return
+        line = self.canvas.create_line(
+            *coords,
+            smooth=False,
+            arrow=tk.LAST,
+            width=self.BUS_WIDTH,
+            fill=self.WIRE_COLOR,
+        )
+        self.canvas.addtag_withtag("bus", line)
+        bus.line_id = line
+        self._create_label(bus, self._bus_label(bus), coords)
+
+    def _delete_wire_items(self, wire: Connection | Bus):
+        had_label = bool(wire.label_id)
+        if wire.line_id:
+            self.canvas.delete(wire.line_id)
+        if wire.label_id:
+            self.canvas.delete(wire.label_id)
+            self._label_index.remove(("label", id(wire)))
+            self._label_routes.pop(id(wire), None)
+        wire.line_id = None
+        wire.label_id = None
+        self._router.remove(id(wire))
+        self._routed.pop(id(wire), None)
+        if had_label and isinstance(wire, Connection):
+            self._handover_label(wire)
+
+    def _expand_bus(self, bus: Bus):
+        if bus.expanded:
+            return
+        self._delete_wire_items(bus)
+        bus.expanded = True
+        for connection in bus.connections:
+            self._draw_connection(connection)
+            if self._mode == "disconnect" and connection.line_id:
+                self.canvas.itemconfig(connection.line_id, fill="red")
+        self._update_connections([], [])
+        self._schedule_sim_refresh()
+
+    def _collapse_bus(self, bus: Bus):
+        if not bus.expanded:
+            return
+        for connection in bus.connections:
+            self._delete_wire_items(connection)
+        bus.expanded = False
+        self._draw_bus(bus)
+        self._update_connections([], [])
+        self._schedule_sim_refresh()
+
+    def _bus_for_line(self, line_id: int) -> Bus | None:
+        return next((bus for bus in self._buses if bus.line_id == line_id), None)
+
+    def _bus_for_connection(self, connection: Connection) -> Bus | None:
+        for bus in self._buses:
+            if any(conn is connection for conn in bus.connections):
+                return bus
+        return None
+
+    def _toggle_buses(self):
+        if self._mode != "normal":
+            return
+        if any(not bus.expanded for bus in self._buses):
+            for bus in self._buses:
+                self._expand_bus(bus)
+        else:
+            for bus in self._buses:
+                self._collapse_bus(bus)
+
+    def _on_bus_press(self, _event):
+        if self._mode != "disconnect":
+            return
+        item = self.canvas.find_withtag("current")
+        if not item:
+            return
+        bus = self._bus_for_line(item[0])
+        if bus:
+            self._expand_bus(bus)
+
+    def _on_bus_double_click(self, _event):
+        if self._mode != "normal":
+            return
+        item = self.canvas.find_withtag("current")
+        if not item:
+            return
+        bus = self._bus_for_line(item[0])
+        if bus:
+            self._expand_bus(bus)
+            self._raise_node_and_wires(bus.src_node)
+
+    def _on_wire_double_click(self, _event):
+        if self._mode != "normal":
+            return
+        item = self.canvas.find_withtag("current")
+        if not item:
+            return
+        connection = next((conn for conn in self.connections if conn.line_id == item[0]), None)
+        if not connection:
+            return
+        bus = self._bus_for_connection(connection)
+        if bus:
+            self._on_wire_release(None)
+            self._collapse_bus(bus)
 
     def _get_port_canvas_id(self, node_name: str, port_name: str, kind: str) -> int | None:
         node = self.nodes.get(node_name)
@@ -209,6 +920,7 @@ class DiagramApp:
         return ((x1 + x2) / 2, (y1 + y2) / 2)
 
     def _on_press(self, event):
+        x, y = self._canvas_point(event)
         if self._mode != "normal":
             return
         item = self.canvas.find_withtag("current")
@@ -221,37 +933,62 @@ class DiagramApp:
         node_name = node_tag.split(":", 1)[1]
         node = self.nodes[node_name]
         self._active_node_name = node.name
+        if node.name in self._selection and not node.resize_enabled:
+            internal, boundary = self._selection_wires()
+            self._tag_selected(internal)
+            self.canvas.tag_raise("selected")
+            self._drag_data.update(
+                node=node, x=x, y=y, group=True, internal=internal, boundary=boundary
+            )
+            self._begin_static_cache(self._selection, internal + boundary)
+            return
+        if self._selection and node.name not in self._selection:
+            self._set_selection(set())
         self._raise_node_and_wires(node.name)
+        internal, boundary = self._incident_wires({node.name})
+        wires = internal + boundary
         if node.resize_enabled:
-            resize_mode = self._hit_test_edge(node, event.x, event.y)
+            resize_mode = self._hit_test_edge(node, x, y)
             if resize_mode:
                 self._resize_data["node"] = node
                 self._resize_data["mode"] = resize_mode
-                self._resize_data["x"] = event.x
-                self._resize_data["y"] = event.y
+                self._resize_data["x"] = x
+                self._resize_data["y"] = y
                 self._resize_data["orig"] = (node.x, node.y, node.width, node.height)
-                self.canvas.bind("<B1-Motion>", self._on_resize_motion)
-                self.canvas.bind("<ButtonRelease-1>", self._on_resize_release)
+                self._resize_data["wires"] = wires
+                self._begin_static_cache({node.name}, wires)
             return
-        resize_mode = self._hit_test_edge(node, event.x, event.y)
+        resize_mode = self._hit_test_edge(node, x, y)
         if resize_mode:
             self._resize_data["node"] = node
             self._resize_data["mode"] = resize_mode
-            self._resize_data["x"] = event.x
-            self._resize_data["y"] = event.y
+            self._resize_data["x"] = x
+            self._resize_data["y"] = y
             self._resize_data["orig"] = (node.x, node.y, node.width, node.height)
+            self._resize_data["wires"] = wires
+            self._begin_static_cache({node.name}, wires)
             return
         self._drag_data["node"] = node
-        self._drag_data["x"] = event.x
-        self._drag_data["y"] = event.y
+        self._drag_data["x"] = x
+        self._drag_data["y"] = y
+        self._drag_data["boundary"] = wires
+        self._begin_static_cache({node.name}, wires)
 
     def _on_release(self, _event):
         self._drag_data["node"] = None
+        self._drag_data["group"] = False
+        self._drag_data["internal"] = None
+        self._drag_data["boundary"] = None
         self._resize_data["node"] = None
         self._resize_data["mode"] = None
         self._resize_data["orig"] = None
+        self._resize_data["wires"] = None
+        self.canvas.delete("align_guide")
+        self._end_static_cache()
 
+    @_timed("_on_motion", frame=True)
     def _on_motion(self, event):
+        x, y = self._canvas_point(event)
         if self._mode != "normal":
             return
         if self._resize_data["node"] is not None:
@@ -260,25 +997,51 @@ class DiagramApp:
         node = self._drag_data["node"]
         if not node:
             return
-        dx = event.x - self._drag_data["x"]
-        dy = event.y - self._drag_data["y"]
+        dx = x - self._drag_data["x"]
+        dy = y - self._drag_data["y"]
         target_x = node.x + dx
         target_y = node.y + dy
         snapped_x = self._snap_value(target_x)
         snapped_y = self._snap_value(target_y)
+        matches = []
+        alignment = self._alignment()
+        if alignment is not None:
+            exclude = self._selection if self._drag_data["group"] else {node.name}
+            aligned_x, aligned_y, matches = alignment.snap_node(node, target_x, target_y, exclude)
+            if aligned_x is not None:
+                snapped_x = int(round(aligned_x))
+            if aligned_y is not None:
+                snapped_y = int(round(aligned_y))
         dx = snapped_x - node.x
         dy = snapped_y - node.y
         if dx == 0 and dy == 0:
             return
-        self._drag_data["x"] = event.x
-        self._drag_data["y"] = event.y
+        self._draw_guides((snapped_x, snapped_y, snapped_x + node.width, snapped_y + node.height), matches)
+        self._drag_data["x"] = x
+        self._drag_data["y"] = y
+        if self._drag_data["group"]:
+            self._move_selection(dx, dy)
+            return
         self.canvas.move(f"node:{node.name}", dx, dy)
-        node.x += dx
-        node.y += dy
-        for port in node.inputs + node.outputs:
-            if port.manual_y is not None:
-                port.manual_y += dy
-        self._update_connections()
+        self.model.move_nodes([node.name], dx, dy, connections=(), origin=self)
+        self._index_node(node)
+        self._update_wires(self._drag_data["boundary"])
+
+    def _alignment(self) -> AlignmentIndex | None:
+        if not self.align_var.get():
+            return None
+        if self._align is None:
+            self._align = AlignmentIndex(self.model)
+        return self._align
+
+    def _draw_guides(self, rect: tuple[float, float, float, float], matches: list):
+        self.canvas.delete("align_guide")
+        for line in guide_lines(rect, matches, self.nodes):
+            self.canvas.create_line(*line, fill=self.GUIDE_COLOR, dash=(4, 2), tags="align_guide")
+
+    def _edge_match(self, axis: str, value: float, node: Node):
+        alignment = self._alignment()
+        return alignment.snap_edge(axis, value, {node.name}) if alignment is not None else None
 
     def _hit_test_edge(self, node: Node, x: float, y: float, threshold: float = 6.0) -> str | None:
         if node.kind != "BLOCK" or not node.resize_enabled:
@@ -316,54 +1079,318 @@ class DiagramApp:
         self._redraw_node(node)
         self._update_connections()
 
+    @_timed("_on_resize_motion", frame=True)
     def _on_resize_motion(self, event):
+        x, y = self._canvas_point(event)
         node = self._resize_data["node"]
         mode = self._resize_data["mode"]
         orig = self._resize_data["orig"]
         if not node or not mode or not orig:
             return
         orig_x, orig_y, orig_width, orig_height = orig
-        dx = event.x - self._resize_data["x"]
-        dy = event.y - self._resize_data["y"]
+        dx = x - self._resize_data["x"]
+        dy = y - self._resize_data["y"]
         min_width = 80
         min_height = 60
         old_port_positions = []
         for port in node.inputs + node.outputs:
-            if port.canvas_id:
+            if port.canvas_id and node.name not in self._dense_ports:
                 old_port_positions.append((port, self._port_center(port.canvas_id)))
-        if mode == "left":
-            new_width = max(min_width, orig_width - dx)
-            new_width = self._snap_value(new_width, min_width)
-            node.x = orig_x + (orig_width - new_width)
-            node.width = new_width
-        elif mode == "right":
-            node.width = self._snap_value(max(min_width, orig_width + dx), min_width)
-        elif mode == "top":
-            new_height = max(min_height, orig_height - dy)
-            new_height = self._snap_value(new_height, min_height)
-            node.y = orig_y + (orig_height - new_height)
-            node.height = new_height
-            for port, prev in old_port_positions:
-                port.manual_y = prev[1]
-        elif mode == "bottom":
-            node.height = self._snap_value(max(min_height, orig_height + dy), min_height)
-        self._redraw_node(node)
-        self._update_connections()
+        match = None
+        with self.model.batch():
+            if mode == "left":
+                raw_width = max(min_width, orig_width - dx)
+                new_width = self._snap_value(raw_width, min_width)
+                match = self._edge_match("x", orig_x + orig_width - raw_width, node)
+                if match is not None:
+                    new_width = max(min_width, int(round(orig_x + orig_width - match[1])))
+                self.model.resize_node(node.name, x=orig_x + (orig_width - new_width), width=new_width, origin=self)
+            elif mode == "right":
+                raw_width = max(min_width, orig_width + dx)
+                width = self._snap_value(raw_width, min_width)
+                match = self._edge_match("x", orig_x + raw_width, node)
+                if match is not None:
+                    width = max(min_width, int(round(match[1] - orig_x)))
+                self.model.resize_node(node.name, width=width, origin=self)
+            elif mode == "top":
+                raw_height = max(min_height, orig_height - dy)
+                new_height = self._snap_value(raw_height, min_height)
+                match = self._edge_match("y", orig_y + orig_height - raw_height, node)
+                if match is not None:
+                    new_height = max(min_height, int(round(orig_y + orig_height - match[1])))
+                self.model.resize_node(node.name, y=orig_y + (orig_height - new_height), height=new_height, origin=self)
+                for port, prev in old_port_positions:
+                    self.model.move_port(node.name, port.kind, port.name, prev[1], origin=self)
+            elif mode == "bottom":
+                raw_height = max(min_height, orig_height + dy)
+                height = self._snap_value(raw_height, min_height)
+                match = self._edge_match("y", orig_y + raw_height, node)
+                if match is not None:
+                    height = max(min_height, int(round(match[1] - orig_y)))
+                self.model.resize_node(node.name, height=height, origin=self)
+        rect = (node.x, node.y, node.x + node.width, node.y + node.height)
+        self._draw_guides(rect, [match] if match is not None else [])
+        self._redraw_node(node, self._resize_data["wires"])
+        self._update_wires(self._resize_data["wires"])
 
     def _on_resize_release(self, _event):
         self._resize_data["node"] = None
         self._resize_data["mode"] = None
         self._resize_data["orig"] = None
-        self.canvas.unbind("<B1-Motion>")
-        self.canvas.unbind("<ButtonRelease-1>")
+        self._resize_data["wires"] = None
+        self.canvas.delete("align_guide")
+        self._end_static_cache()
+
+    def _on_shift_press(self, _event):
+        if self._mode != "normal":
+            return
+        item = self.canvas.find_withtag("current")
+        if not item:
+            return
+        tags = self.canvas.gettags(item[0])
+        node_tag = next((tag for tag in tags if tag.startswith("node:")), None)
+        if not node_tag:
+            return
+        node_name = node_tag.split(":", 1)[1]
+        self._active_node_name = node_name
+        self._set_selection(self._selection ^ {node_name})
+
+    def _on_canvas_press(self, event):
+        x, y = self._canvas_point(event)
+        if self._mode != "normal":
+            return
+        if self.canvas.find_overlapping(x - 1, y - 1, x + 1, y + 1):
+            return
+        if not event.state & 0x0001:
+            self._set_selection(set())
+        self._band["start"] = (x, y)
+        self._band["item"] = self.canvas.create_rectangle(
+            x, y, x, y, outline="#1e90ff", dash=(4, 2)
+        )
 
-    def _redraw_node(self, node: Node):
+    def _on_canvas_motion(self, event):
+        x, y = self._canvas_point(event)
+        if self._resize_data["node"] is not None:
+            self._on_resize_motion(event)
+            return
+        if self._band["item"] is None:
+            return
+        x0, y0 = self._band["start"]
+        self.canvas.coords(self._band["item"], x0, y0, x, y)
+
+    def _on_canvas_release(self, event):
+        x, y = self._canvas_point(event)
+        if self._resize_data["node"] is not None:
+            self._on_resize_release(event)
+            return
+        if self._band["item"] is None:
+            return
+        x0, y0 = self._band["start"]
+        self.canvas.delete(self._band["item"])
+        self._band["item"] = None
+        self._band["start"] = None
+        left, right = sorted((x0, x))
+        top, bottom = sorted((y0, y))
+        picked = set(self._selection)
+        for key in self._label_index.query((left, top, right, bottom)):
+            if key[0] != "node":
+                continue
+            x1, y1, x2, y2 = self._label_index.get(key)
+            if left <= x1 and x2 <= right and top <= y1 and y2 <= bottom:
+                picked.add(key[1])
+        self._set_selection(picked)
+
+    def _set_selection(self, names: set[str]):
+        self._selection = {name for name in names if name in self.nodes}
+        self._refresh_selection()
+
+    def _refresh_selection(self):
+        self.canvas.delete("selection_mark")
+        self.canvas.dtag("selected", "selected")
+        for name in self._selection:
+            node = self.nodes[name]
+            mark = self.canvas.create_rectangle(
+                node.x - 4,
+                node.y - 4,
+                node.x + node.width + 4,
+                node.y + node.height + 4,
+                outline="#1e90ff",
+                dash=(4, 2),
+            )
+            self.canvas.addtag_withtag("selection_mark", mark)
+            self.canvas.addtag_withtag("selected", mark)
+            self.canvas.addtag_withtag("selected", f"node:{name}")
+        self._tag_selected(self._selection_wires()[0])
+
+    def _tag_selected(self, wires: list[Connection | Bus]):
+        for wire in wires:
+            for item in (wire.line_id, wire.label_id):
+                if item:
+                    self.canvas.addtag_withtag("selected", item)
+
+    def _selection_wires(self) -> tuple[list[Connection | Bus], list[Connection | Bus]]:
+        return self._incident_wires(self._selection)
+
+    def _incident_wires(self, names: set[str]) -> tuple[list[Connection | Bus], list[Connection | Bus]]:
+        internal: list[Connection | Bus] = []
+        boundary: list[Connection | Bus] = []
+        if not names:
+            return internal, boundary
+        for connection in self.connections:
+            ends = [end[0] in names for end in (connection.src, connection.dst) if end]
+            if ends and all(ends):
+                internal.append(connection)
+            elif any(ends):
+                boundary.append(connection)
+        for bus in self._buses:
+            ends = [bus.src_node in names, bus.dst_node in names]
+            if all(ends):
+                internal.append(bus)
+            elif any(ends):
+                boundary.append(bus)
+        return internal, boundary
+
+    def _move_selection(self, dx: float, dy: float):
+        self.canvas.move("selected", dx, dy)
+        internal = self._drag_data["internal"] or []
+        self.model.move_nodes(
+            self._selection, dx, dy, [wire for wire in internal if isinstance(wire, Connection)], origin=self
+        )
+        for name in self._selection:
+            self._index_node(self.nodes[name])
+        for wire in internal:
+            if isinstance(wire, Bus) and wire.manual_mid_x is not None:
+                wire.manual_mid_x += dx
+            self._router.translate(id(wire), dx, dy)
+            self._translate_label(wire, dx, dy)
+        boundary = self._drag_data["boundary"] or []
+        self._update_connections(
+            [wire for wire in boundary if isinstance(wire, Connection)],
+            [wire for wire in boundary if isinstance(wire, Bus)],
+        )
+
+    def _update_wires(self, wires: list[Connection | Bus] | None):
+        if wires is None:
+            self._update_connections()
+            return
+        self._update_connections(
+            [wire for wire in wires if isinstance(wire, Connection)],
+            [wire for wire in wires if isinstance(wire, Bus)],
+        )
+
+    def _static_wires(self, live: set[int], view: tuple[float, float, float, float]) -> list[tuple]:
+        positions: dict[str, dict[tuple[str, str], tuple[float, float]]] = {}
+
+        def position(endpoint: tuple[str, str], kind: str) -> tuple[float, float] | None:
+            ports = positions.get(endpoint[0])
+            if ports is None:
+                node = self.nodes.get(endpoint[0])
+                ports = {(port.kind, port.name): (px, py) for port, px, py in port_positions(node)} if node else {}
+                positions[endpoint[0]] = ports
+            return ports.get((kind, endpoint[1]))
+
+        def endpoints(connection: Connection) -> tuple | None:
+            start = position(connection.src, "out") if connection.src else None
+            end = position(connection.dst, "in") if connection.dst else None
+            if (connection.src and start is None) or (connection.dst and end is None) or not (start or end):
+                return None
+            return start, end
+
+        lines = {wire.line_id: wire for wire in [*self.connections, *self._buses] if wire.line_id}
+        visible: dict[int, Connection | Bus] = {}
+        for item in self.canvas.find_overlapping(*view):
+            wire = lines.get(item)
+            if wire is not None:
+                visible[id(wire)] = wire
+        traced = {id(wire) for wire in self._trace_wires}
+        critical = {id(wire) for wire in self._critical_wires}
+        wires = []
+        for key, wire in visible.items():
+            if key in live:
+                continue
+            if isinstance(wire, Bus):
+                first = endpoints(wire.connections[0])
+                last = endpoints(wire.connections[-1])
+                if not first or not last or not all(first) or not all(last):
+                    continue
+                ends = tuple(((a[0] + b[0]) / 2, (a[1] + b[1]) / 2) for a, b in zip(first, last))
+                label, width, color = self._bus_label(wire), self.BUS_WIDTH, self.WIRE_COLOR
+            else:
+                ends = endpoints(wire)
+                if not ends:
+                    continue
+                label, width = wire.label, 2
+                color = self._wire_colors.get(id(wire), self.WIRE_COLOR)
+            if id(wire) in traced:
+                color = self.TRACE_COLOR
+            elif id(wire) in critical:
+                color = self.CRITICAL_COLOR
+            rect = self._label_index.get(("label", id(wire))) if wire.label_id else None
+            wires.append((self._route_coords(wire, ends), label if rect else None, color, width, rect))
+        return wires
+
+    def _begin_static_cache(self, names: set[str], wires: list[Connection | Bus]):
+        if not self._raster_drag or self._static_cache is not None:
+            return
+        if len(self.nodes) + len(self.connections) < self.RASTER_MIN_ITEMS:
+            return
+        try:
+            from export import DiagramRenderer
+        except ImportError:
+            return
+        x1, y1, x2, y2 = view = tuple(int(value) for value in self._view_rect())
+        nodes = {
+            key[1]: self.nodes[key[1]]
+            for key in self._label_index.query(view)
+            if key[0] == "node" and key[1] not in names and key[1] in self.nodes
+        }
+        static_wires = self._static_wires({id(wire) for wire in wires}, view)
+        renderer = DiagramRenderer(nodes, [], node_colors=self._node_colors, wires=static_wires, clip=view)
+        buffer = io.BytesIO()
+        renderer.render_rect(x1, y1, x2, y2).save(buffer, "PNG", compress_level=1)
+        self._static_cache = tk.PhotoImage(master=self.canvas, data=buffer.getvalue(), format="png")
+        self.canvas.addtag_withtag("static", "all")
+        for name in names:
+            self.canvas.dtag(f"node:{name}", "static")
+        for wire in wires:
+            for item in (wire.line_id, wire.label_id):
+                if item:
+                    self.canvas.dtag(item, "static")
+        self.canvas.dtag("selection_mark||search_mark||trace_mark||critical_mark||perf_overlay", "static")
+        image = self.canvas.create_image(x1, y1, image=self._static_cache, anchor="nw")
+        self.canvas.addtag_withtag("static_cache", image)
+        self.canvas.tag_lower("static_cache")
+        self.canvas.itemconfigure("static", state="hidden")
+
+    def _end_static_cache(self):
+        if self._static_cache is None:
+            return
+        self.canvas.delete("static_cache")
+        self.canvas.itemconfigure("static", state="normal")
+        self.canvas.dtag("static", "static")
+        self._static_cache = None
+
+    def _translate_label(self, wire: Connection | Bus, dx: float, dy: float):
+        key = ("label", id(wire))
+        rect = self._label_index.get(key)
+        if rect is not None:
+            self._label_index.insert(key, (rect[0] + dx, rect[1] + dy, rect[2] + dx, rect[3] + dy))
+        cached = self._label_routes.get(id(wire))
+        if cached is not None:
+            route, anchor = cached
+            moved = tuple(value + (dx if idx % 2 == 0 else dy) for idx, value in enumerate(route))
+            self._label_routes[id(wire)] = (moved, anchor)
+
+    @_timed("_redraw_node")
+    def _redraw_node(self, node: Node, wires: list[Connection | Bus] | None = None):
         for item in node.items:
             self.canvas.delete(item)
+        self._forget_ports(node.name, node.items)
         node.items.clear()
-        self._port_items = {key: value for key, value in self._port_items.items() if value[0] != node.name}
         self._draw_node(node)
-        self._raise_node_and_wires(node.name)
+        self._raise_node_and_wires(node.name, wires)
+        if node.name in self._selection:
+            self._refresh_selection()
 
     def _snap_value(self, value: float, min_value: int | None = None) -> int:
         snapped = int(round(value / self.GRID_STEP) * self.GRID_STEP)
@@ -375,21 +1402,28 @@ class DiagramApp:
     def _snap_to_step(value: float, step: int) -> float:
         return round(value / step) * step
 
-    def _raise_node_and_wires(self, node_name: str):
+    def _raise_node_and_wires(self, node_name: str, wires: list[Connection | Bus] | None = None):
         self.canvas.tag_raise(f"node:{node_name}")
+        if wires is not None:
+            for wire in wires:
+                self._raise_connection(wire)
+            return
         for connection in self.connections:
             if connection.src and connection.src[0] == node_name:
                 self._raise_connection(connection)
             if connection.dst and connection.dst[0] == node_name:
                 self._raise_connection(connection)
+        for bus in self._buses:
+            if node_name in (bus.src_node, bus.dst_node):
+                self._raise_connection(bus)
 
-    def _raise_connection(self, connection: Connection):
+    def _raise_connection(self, connection: Connection | Bus):
         if connection.line_id:
             self.canvas.tag_raise(connection.line_id)
         if connection.label_id:
             self.canvas.tag_raise(connection.label_id)
 
-    def _lower_connection(self, connection: Connection):
+    def _lower_connection(self, connection: Connection | Bus):
         if connection.line_id:
             self.canvas.tag_lower(connection.line_id)
         if connection.label_id:
@@ -418,18 +1452,39 @@ class DiagramApp:
         self.canvas.addtag_withtag("port", port.canvas_id)
         self.canvas.addtag_withtag(f"port:{node_name}:{port.name}", port.canvas_id)
 
-    def _update_connections(self):
-        for connection in self.connections:
+    @_timed("_update_connections")
+    def _update_connections(
+        self,
+        connections: list[Connection] | None = None,
+        buses: list[Bus] | None = None,
+    ):
+        routes: list[tuple[Connection | Bus, tuple]] = []
+        for connection in self.connections if connections is None else connections:
             if not connection.line_id:
                 continue
-            coords = self._connection_line_coords(connection)
-            if not coords:
+            ends = self._connection_endpoints(connection)
+            if ends:
+                self._register_route(connection, ends)
+                routes.append((connection, ends))
+        for bus in self._buses if buses is None else buses:
+            if not bus.line_id:
                 continue
-            self.canvas.coords(
-                connection.line_id,
-                *coords,
-            )
-            self._update_label(connection, coords)
+            ends = self._bus_endpoints(bus)
+            if ends:
+                self._register_route(bus, ends)
+                routes.append((bus, ends))
+        seen = {id(wire) for wire, _ends in routes}
+        for key in self._router.take_changed():
+            wire = self._routed.get(key)
+            if key in seen or wire is None or not wire.line_id:
+                continue
+            ends = self._bus_endpoints(wire) if isinstance(wire, Bus) else self._connection_endpoints(wire)
+            if ends:
+                routes.append((wire, ends))
+        for wire, ends in routes:
+            coords = self._route_coords(wire, ends)
+            self.canvas.coords(wire.line_id, *coords)
+            self._update_label(wire, coords)
 
     def _connection_coords(
         self,
@@ -444,59 +1499,73 @@ class DiagramApp:
         mid_x = manual_mid_x if manual_mid_x is not None else (x1 + x2) / 2
         return [x1, y1, mid_x, y1, mid_x, y2, x2, y2]
 
-    def _connection_line_coords(self, connection: Connection) -> list[float] | None:
-        if connection.src and connection.dst:
-            src_node, src_port = connection.src
-            dst_node, dst_port = connection.dst
-            src_port_id = self._get_port_canvas_id(src_node, src_port, "out")
-            dst_port_id = self._get_port_canvas_id(dst_node, dst_port, "in")
-            if not src_port_id or not dst_port_id:
+    def _connection_endpoints(
+        self, connection: Connection
+    ) -> tuple[tuple[float, float] | None, tuple[float, float] | None] | None:
+        start = end = None
+        if connection.src:
+            start = self._port_point(connection.src[0], connection.src[1], "out")
+            if start is None:
                 return None
-            x1, y1 = self._port_center(src_port_id)
-            x2, y2 = self._port_center(dst_port_id)
-            return self._connection_coords((x1, y1), (x2, y2), connection.manual_mid_x)
         if connection.dst:
-            dst_node, dst_port = connection.dst
-            dst_port_id = self._get_port_canvas_id(dst_node, dst_port, "in")
-            if not dst_port_id:
-                return None
-            x2, y2 = self._port_center(dst_port_id)
-            return [x2 - 50, y2, x2, y2]
-        if connection.src:
-            src_node, src_port = connection.src
-            src_port_id = self._get_port_canvas_id(src_node, src_port, "out")
-            if not src_port_id:
+            end = self._port_point(connection.dst[0], connection.dst[1], "in")
+            if end is None:
                 return None
-            x1, y1 = self._port_center(src_port_id)
-            return [x1, y1, x1 + 50, y1]
-        return None
-
-    def _label_position(self, coords: list[float]) -> tuple[float, float]:
-        if len(coords) >= 8:
-            x1, y1, x2 = coords[0], coords[1], coords[2]
-            return ((x1 + x2) / 2, y1 - 4)
-        x1, y1, x2, y2 = coords[0], coords[1], coords[2], coords[3]
-        mid_x = (x1 + x2) / 2
-        top_y = min(y1, y2) - 4
-        return (mid_x, top_y)
+        if start is None and end is None:
+            return None
+        return start, end
+
+    def _register_route(self, wire: Connection | Bus, endpoints: tuple):
+        start, end = endpoints
+        key = id(wire)
+        if (
+            start
+            and end
+            and wire.manual_mid_x is None
+            and start[0] != end[0]
+            and start[1] != end[1]
+        ):
+            self._router.set_segment(key, start[0], end[0], start[1], end[1])
+            self._routed[key] = wire
+        elif key in self._routed:
+            self._router.remove(key)
+            del self._routed[key]
+
+    def _route_coords(self, wire: Connection | Bus, endpoints: tuple) -> list[float]:
+        start, end = endpoints
+        if start and end:
+            mid_x = wire.manual_mid_x
+            if mid_x is None:
+                mid_x = self._router.mid_x(id(wire))
+            return self._connection_coords(start, end, mid_x)
+        if end:
+            return [end[0] - 50, end[1], end[0], end[1]]
+        return [start[0], start[1], start[0] + 50, start[1]]
+
+    def _connection_line_coords(self, connection: Connection, endpoints: tuple | None = None) -> list[float] | None:
+        ends = endpoints or self._connection_endpoints(connection)
+        if not ends:
+            return None
+        self._register_route(connection, ends)
+        return self._route_coords(connection, ends)
 
-    def _update_label(self, connection: Connection, coords: list[float]):
+    def _update_label(self, connection: Connection | Bus, coords: list[float]):
         if not connection.label_id:
             return
-        label_x, label_y = self._label_position(coords)
+        cached = self._label_routes.get(id(connection))
+        if cached and cached[0] == tuple(coords):
+            return
+        text = self._bus_label(connection) if isinstance(connection, Bus) else connection.label or ""
+        label_x, label_y, anchor = self._place_label(connection, text, coords)
         self.canvas.coords(connection.label_id, label_x, label_y)
+        if not cached or cached[1] != anchor:
+            self.canvas.itemconfig(connection.label_id, anchor=anchor)
 
     def _find_port(self, node_name: str, port_name: str, kind: str) -> tuple[Node, Port] | None:
-        node = self.nodes.get(node_name)
-        if not node:
-            return None
-        ports = node.outputs if kind == "out" else node.inputs
-        for port in ports:
-            if port.name == port_name:
-                return node, port
-        return None
+        return self.model.find_port(node_name, port_name, kind)
 
     def _on_wire_press(self, event):
+        x, y = self._canvas_point(event)
         if self._mode == "disconnect":
             item = self.canvas.find_withtag("current")
             if not item:
@@ -521,7 +1590,7 @@ class DiagramApp:
         if not coords:
             return
         if len(coords) < 8:
-            if not self._near_horizontal_segment(event.x, event.y, coords[0], coords[2], coords[1]):
+            if not self._near_horizontal_segment(x, y, coords[0], coords[2], coords[1]):
                 return
             if connection.dst:
                 port_info = self._find_port(connection.dst[0], connection.dst[1], "in")
@@ -551,12 +1620,12 @@ class DiagramApp:
         mid_x = coords[2]
         y1a = coords[3]
         y2a = coords[5]
-        if self._near_vertical_segment(event.x, event.y, mid_x, y1a, y2a):
+        if self._near_vertical_segment(x, y, mid_x, y1a, y2a):
             self._drag_wire["connection"] = connection
-            self._drag_wire["offset"] = event.x - mid_x
+            self._drag_wire["offset"] = x - mid_x
             self._drag_wire["mode"] = "mid"
             return
-        if self._near_horizontal_segment(event.x, event.y, coords[0], mid_x, y1a):
+        if self._near_horizontal_segment(x, y, coords[0], mid_x, y1a):
             if not connection.src:
                 return
             port_info = self._find_port(connection.src[0], connection.src[1], "out")
@@ -570,7 +1639,7 @@ class DiagramApp:
             self._drag_wire["node"] = node
             self._drag_wire["port"] = port
             return
-        if self._near_horizontal_segment(event.x, event.y, mid_x, coords[6], y2a):
+        if self._near_horizontal_segment(x, y, mid_x, coords[6], y2a):
             if not connection.dst:
                 return
             port_info = self._find_port(connection.dst[0], connection.dst[1], "in")
@@ -585,28 +1654,32 @@ class DiagramApp:
             self._drag_wire["port"] = port
             return
 
+    @_timed("_on_wire_motion", frame=True)
     def _on_wire_motion(self, event):
+        x, y = self._canvas_point(event)
         connection: Connection | None = self._drag_wire["connection"]
         if not connection:
             return
         mode = self._drag_wire["mode"]
         if mode == "mid":
-            raw_mid = event.x - self._drag_wire["offset"]
+            raw_mid = x - self._drag_wire["offset"]
             connection.manual_mid_x = self._snap_to_step(raw_mid, self.MID_STEP)
             if not connection.src or not connection.dst:
                 return
-            src_id = self._get_port_canvas_id(connection.src[0], connection.src[1], "out")
-            dst_id = self._get_port_canvas_id(connection.dst[0], connection.dst[1], "in")
-            if not src_id or not dst_id:
+            start = self._port_point(connection.src[0], connection.src[1], "out")
+            end = self._port_point(connection.dst[0], connection.dst[1], "in")
+            if start is None or end is None:
                 return
-            x1, y1 = self._port_center(src_id)
-            x2, y2 = self._port_center(dst_id)
+            (x1, y1), (x2, y2) = start, end
+            if id(connection) in self._routed:
+                self._register_route(connection, ((x1, y1), (x2, y2)))
             coords = self._connection_coords(
                 (x1, y1),
                 (x2, y2),
                 connection.manual_mid_x,
             )
             self.canvas.coords(connection.line_id, *coords)
+            self._update_label(connection, coords)
             return
         if mode in ("src_port", "dst_port"):
             if self._mode != "normal":
@@ -616,10 +1689,14 @@ class DiagramApp:
             if not node or not port:
                 return
             kind = "out" if mode == "src_port" else "in"
-            self._move_port(node, port, kind, event.y)
+            self._move_port(node, port, kind, y)
             return
 
     def _on_wire_release(self, _event):
+        if self._drag_wire["mode"] == "mid":
+            self._update_connections([], [])
+            if self._minimap is not None:
+                self._minimap.refresh_wire(self._drag_wire["connection"])
         self._drag_wire["connection"] = None
         self._drag_wire["mode"] = None
         self._drag_wire["port"] = None
@@ -652,7 +1729,7 @@ class DiagramApp:
         return min(x1, x2) - threshold <= px <= max(x1, x2) + threshold
 
     def _move_port(self, node: Node, port: Port, kind: str, target_y: float):
-        if port.canvas_id is None:
+        if port.canvas_id is None or node.name in self._dense_ports:
             return
         min_y = node.y + 10
         max_y = node.y + node.height - 10
@@ -661,7 +1738,7 @@ class DiagramApp:
         x = node.x if kind == "in" else node.x + node.width
         radius = self.PORT_RADIUS
         self.canvas.coords(port.canvas_id, x - radius, new_y - radius, x + radius, new_y + radius)
-        port.manual_y = new_y
+        self.model.move_port(node.name, kind, port.name, new_y, origin=self)
         self._update_connections()
 
     def _on_port_press(self, event):
@@ -670,14 +1747,11 @@ class DiagramApp:
         item = self.canvas.find_withtag("current")
         if not item:
             return
-        port_info = self._port_items.get(item[0])
-        if not port_info:
-            return
-        node_name, port_name = port_info
-        port_data = self._find_port(node_name, port_name, "in") or self._find_port(node_name, port_name, "out")
+        port_data = self._port_at(item[0], event.x, event.y)
         if not port_data:
             return
         node, port = port_data
+        node_name, port_name = node.name, port.name
         if not self._selected_ports:
             self._selected_ports.append((node_name, port_name))
             self._set_port_color(port, "blue")
@@ -701,9 +1775,9 @@ class DiagramApp:
             else:
                 src = (node_name, port_name)
                 dst = (first_node, first_port)
-            connection = Connection(src=src, dst=dst)
-            self.connections.append(connection)
-            self._draw_connection(connection)
+            connection = self.model.connect(src, dst, origin=self)
+            self._add_connection_wire(connection)
+            self._update_connections([], [])
             self._reset_connect_mode()
             return
 
@@ -748,63 +1822,20 @@ class DiagramApp:
             if not name or name in self.nodes:
                 return
             if mode_var.get() == "gate":
-                gate_kind = gate_var.get()
-                gate_def = self._gate_definitions()[gate_kind]
-                inputs = [Port(name=f"in{idx}", kind="in") for idx in range(1, gate_def["inputs"] + 1)]
-                outputs = [Port(name=f"out{idx}", kind="out") for idx in range(1, gate_def["outputs"] + 1)]
-                width = gate_def["width"]
-                height = gate_def["height"]
-                x, y = self._next_block_position()
-                node = Node(
-                    name=name,
-                    kind=gate_kind,
-                    inputs=inputs,
-                    outputs=outputs,
-                    x=x,
-                    y=y,
-                    width=width,
-                    height=height,
-                    base_height=height,
-                )
+                node = self.model.add_gate(name, gate_var.get(), origin=self)
             else:
                 try:
                     in_count = int(in_entry.get().strip() or "0")
                     out_count = int(out_entry.get().strip() or "0")
                 except ValueError:
                     return
-                inputs = [Port(name=f"in{idx}", kind="in") for idx in range(1, in_count + 1)]
-                outputs = [Port(name=f"out{idx}", kind="out") for idx in range(1, out_count + 1)]
-                base_height = max(100, 40 + 20 * max(len(inputs), len(outputs), 1))
-                x, y = self._next_block_position()
-                node = Node(
-                    name=name,
-                    kind="BLOCK",
-                    inputs=inputs,
-                    outputs=outputs,
-                    x=x,
-                    y=y,
-                    width=160,
-                    height=base_height,
-                    base_height=base_height,
-                )
-            self.nodes[name] = node
+                node = self.model.add_block(name, in_count, out_count, origin=self)
             self._draw_node(node)
             self._raise_node_and_wires(node.name)
             window.destroy()
 
         tk.Button(window, text="Create", command=_create_block).grid(row=5, column=0, columnspan=3, pady=8)
 
-    def _next_block_position(self) -> tuple[int, int]:
-        if not self.nodes:
-            return (80, 80)
-        max_y = max(node.y + node.height for node in self.nodes.values())
-        x = 80
-        y = max_y + 60
-        if y > 600:
-            y = 80
-            x = max(node.x + node.width for node in self.nodes.values()) + 60
-        return x, y
-
     def _toggle_connect_mode(self):
         if self._mode == "connect":
             self._reset_connect_mode()
@@ -822,7 +1853,7 @@ class DiagramApp:
 
     def _toggle_disconnect_mode(self):
         if self._mode == "disconnect":
-            self._set_all_wire_colors("#333333")
+            self._set_all_wire_colors(None)
             self._mode = "normal"
             return
         if self._mode == "connect":
@@ -832,8 +1863,16 @@ class DiagramApp:
 
     def _set_all_port_colors(self, color: str):
         for node in self.nodes.values():
-            for port in node.inputs + node.outputs:
-                self._set_port_color(port, color)
+            self._set_node_port_colors(node, color)
+
+    def _set_node_port_colors(self, node: Node, color: str | None = None):
+        painted: set[int | None] = set()
+        for port in node.inputs + node.outputs:
+            if port.canvas_id in painted:
+                port.color = color or port.color
+                continue
+            painted.add(port.canvas_id)
+            self._set_port_color(port, color or port.color)
 
     def _set_port_color(self, port: Port, color: str):
         port.color = color
@@ -844,23 +1883,378 @@ class DiagramApp:
             width = 0 if hidden else 1
             self.canvas.itemconfig(port.canvas_id, fill=fill, outline=outline, width=width)
 
-    def _set_all_wire_colors(self, color: str):
+    def _set_all_wire_colors(self, color: str | None):
         for connection in self.connections:
             if connection.line_id:
-                self.canvas.itemconfig(connection.line_id, fill=color)
+                fill = color or self._wire_colors.get(id(connection), self.WIRE_COLOR)
+                self.canvas.itemconfig(connection.line_id, fill=fill)
+        for bus in self._buses:
+            if bus.line_id:
+                self.canvas.itemconfig(bus.line_id, fill=color or self.WIRE_COLOR)
+
+    def set_highlights(self, node_colors: dict[str, str], wire_colors: dict[int, str]):
+        previous_nodes, previous_wires = self._node_colors, self._wire_colors
+        self._node_colors = dict(node_colors)
+        self._wire_colors = dict(wire_colors)
+        for bus in list(self._buses):
+            if any(id(connection) in self._wire_colors for connection in bus.connections):
+                self._expand_bus(bus)
+        for name in previous_nodes.keys() | self._node_colors.keys():
+            node = self.nodes.get(name)
+            if node and previous_nodes.get(name) != self._node_colors.get(name):
+                self._redraw_node(node)
+        for connection in self.connections:
+            key = id(connection)
+            if connection.line_id and (key in previous_wires or key in self._wire_colors):
+                self.canvas.itemconfig(connection.line_id, fill=self._wire_colors.get(key, self.WIRE_COLOR))
+
+    def _on_search_changed(self):
+        query = self.search_var.get().strip()
+        self._search_results = self._search.search(query, self.SEARCH_LIMIT) if self._search and query else []
+        self.search_list.delete(0, tk.END)
+        if not self._search_results:
+            self.search_list.place_forget()
+            return
+        for text, key in self._search_results:
+            self.search_list.insert(tk.END, f"{key[0]:5s} {text}")
+        self.search_list.configure(height=min(len(self._search_results), 12))
+        self.search_list.place(in_=self.canvas, relx=1.0, x=-4, y=4, anchor="ne")
+        self.search_list.lift()
+
+    def _focus_search_list(self):
+        if not self._search_results:
+            return
+        self.search_list.focus_set()
+        self.search_list.selection_clear(0, tk.END)
+        self.search_list.selection_set(0)
+        self.search_list.activate(0)
+
+    def _jump_to_selected(self):
+        selection = self.search_list.curselection()
+        self._jump_to_result(selection[0] if selection else 0)
+
+    def _clear_search(self):
+        self.search_var.set("")
+        self.canvas.delete("search_mark")
+        self.canvas.focus_set()
+
+    def _search_item(self, key: tuple) -> str | int | None:
+        if key[0] == "node":
+            return f"node:{key[1]}" if key[1] in self.nodes else None
+        if key[0] == "port":
+            port_data = self._find_port(key[1], key[3], key[2])
+            return port_data[1].canvas_id if port_data else None
+        connection = self._search.connection(key) if self._search else None
+        if connection is None:
+            return None
+        wire = self._bus_for_connection(connection) or connection
+        return wire.line_id
+
+    def _jump_to_result(self, index: int):
+        if index >= len(self._search_results):
+            return
+        _text, key = self._search_results[index]
+        item = self._search_item(key)
+        bbox = self.canvas.bbox(item) if item else None
+        if key[0] == "port" and key[1] in self._dense_ports:
+            point = self._port_point(key[1], key[3], key[2])
+            r = self.PORT_RADIUS
+            bbox = (point[0] - r, point[1] - r, point[0] + r, point[1] + r) if point else None
+        if not bbox:
+            return
+        self.search_list.place_forget()
+        self._center_on((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        self.canvas.delete("search_mark")
+        mark = self.canvas.create_rectangle(
+            bbox[0] - 6,
+            bbox[1] - 6,
+            bbox[2] + 6,
+            bbox[3] + 6,
+            outline=self.SEARCH_MARK_COLOR,
+            width=3,
+            dash=(6, 3),
+        )
+        self.canvas.addtag_withtag("search_mark", mark)
+        if key[0] in ("node", "port"):
+            self._set_selection({key[1]})
+
+    def _center_on(self, x: float, y: float, bounds: tuple[float, float, float, float] | None = None):
+        width, height = self._canvas_size()
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        x1, y1, x2, y2 = bounds or self.canvas.bbox("all") or (x, y, x, y)
+        region = (
+            min(x1, x - width / 2),
+            min(y1, y - height / 2),
+            max(x2, x + width / 2),
+            max(y2, y + height / 2),
+        )
+        self.canvas.configure(scrollregion=region)
+        self.canvas.xview_moveto((x - width / 2 - region[0]) / (region[2] - region[0]))
+        self.canvas.yview_moveto((y - height / 2 - region[1]) / (region[3] - region[1]))
+        self.canvas.move("perf_overlay", self.canvas.canvasx(0) - left, self.canvas.canvasy(0) - top)
+        self._update_minimap_view()
+
+    def _visible_region(self) -> tuple[float, float, float, float]:
+        x, y = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        width, height = self._canvas_size()
+        return x, y, x + width, y + height
+
+    def _toggle_minimap(self):
+        if self._minimap is not None:
+            self._minimap.close()
+            self._minimap = None
+            return
+        self._minimap = Minimap(self.root, self.model, self._center_on, self._visible_region)
+        self._minimap.canvas.place(in_=self.canvas, relx=1.0, rely=1.0, x=-4, y=-4, anchor="se")
+
+    def _update_minimap_view(self):
+        if self._minimap is not None:
+            self._minimap.update_viewport()
+
+    def _on_port_trace(self, event, direction: str):
+        item = self.canvas.find_withtag("current")
+        port_data = self._port_at(item[0], event.x, event.y) if item else None
+        if port_data is None or self._graph is None:
+            return "break"
+        node, port = port_data
+        self._trace = (node.name, port.name, port.kind, direction)
+        self._draw_trace()
+        return "break"
+
+    def _on_trace_changes(self, _changes: list[ModelChange]):
+        if self._trace is None or self._trace_pending:
+            return
+        self._trace_pending = True
+        self.root.after_idle(self._draw_trace)
+
+    def _draw_trace(self):
+        self._trace_pending = False
+        self._clear_trace_items()
+        if self._trace is None or self._graph is None:
+            return
+        node_name, port_name, kind, direction = self._trace
+        if self._find_port(node_name, port_name, kind) is None:
+            self._trace = None
+            return
+        cone = self._graph.cone(node_name, port_name, kind, direction, self.trace_dff_var.get())
+        self._trace_wires = self._highlight(cone.connections, cone.nodes, self.TRACE_COLOR, "trace")
+
+    def _highlight(self, connections: list[Connection], names, color: str, tag: str) -> list[Connection | Bus]:
+        bus_of = {id(connection): bus for bus in self._buses if bus.line_id for connection in bus.connections}
+        wires: dict[int, Connection | Bus] = {}
+        for connection in connections:
+            wire = bus_of.get(id(connection), connection)
+            if wire.line_id:
+                wires[id(wire)] = wire
+        coords: list[float] = []
+        for name in names:
+            node = self.nodes.get(name)
+            if node is not None:
+                coords.extend((node.x - 5, node.y - 5, node.x + node.width + 5, node.y + node.height + 5))
+        canvas = str(self.canvas)
+        self.canvas.tk.call(
+            "foreach", "item", [wire.line_id for wire in wires.values()], f"{canvas} addtag {tag}_wire withtag $item"
+        )
+        self.canvas.itemconfigure(f"{tag}_wire", fill=color)
+        self.canvas.tk.call(
+            "foreach",
+            ("x1", "y1", "x2", "y2"),
+            coords,
+            f"{canvas} create rectangle $x1 $y1 $x2 $y2 -outline {color} -width 3 -dash {{6 3}} -tags {tag}_mark",
+        )
+        self.canvas.tag_lower(f"{tag}_mark")
+        return list(wires.values())
+
+    def _clear_trace_items(self):
+        self._clear_highlight("trace", self._trace_wires)
+        self._trace_wires = []
+
+    def _clear_highlight(self, tag: str, wires: list[Connection | Bus]):
+        self.canvas.delete(f"{tag}_mark")
+        if not wires:
+            return
+        self.canvas.itemconfigure(f"{tag}_wire", fill=self.WIRE_COLOR)
+        for wire in wires:
+            color = self._wire_colors.get(id(wire))
+            if color and wire.line_id:
+                self.canvas.itemconfig(wire.line_id, fill=color)
+        self.canvas.dtag(f"{tag}_wire", f"{tag}_wire")
+
+    def clear_trace(self):
+        self._trace = None
+        self._clear_trace_items()
+
+    def _toggle_critical(self):
+        if self._critical:
+            self.clear_critical()
+            return
+        if self._timing is None:
+            self._timing = TimingGraph(self.model, self._gate_delays)
+        self._critical = True
+        self._draw_critical()
+
+    def _on_critical_changes(self, changes: list[ModelChange]):
+        if not self._critical or self._critical_pending:
+            return
+        if not any(change.op in STRUCTURE_OPS for change in changes):
+            return
+        self._critical_pending = True
+        self.root.after_idle(self._draw_critical)
+
+    def _draw_critical(self):
+        self._critical_pending = False
+        self._clear_highlight("critical", self._critical_wires)
+        self._critical_wires = []
+        if not self._critical or self._timing is None:
+            return
+        paths = self._timing.worst_paths(self._critical_paths)
+        connections = [connection for path in paths for connection in path.connections]
+        names = {name for path in paths for name in path.nodes}
+        self._critical_wires = self._highlight(connections, names, self.CRITICAL_COLOR, "critical")
+        text = f"CRITICAL {paths[0].arrival:g} / DEPTH {paths[0].depth}" if paths else "CRITICAL -"
+        if self._timing.loops:
+            text += f" / LOOP {len(self._timing.loops)}"
+        self.critical_label.configure(text=text)
+
+    def clear_critical(self):
+        self._critical = False
+        self._clear_highlight("critical", self._critical_wires)
+        self._critical_wires = []
+        self.critical_label.configure(text="")
+
+    def load_vectors(self, path: Path):
+        from simulate import Simulator, read_vectors
+
+        names, vectors = read_vectors(path)
+        self.clear_simulation()
+        self._simulator = Simulator(self.nodes, self.connections)
+        self._sim = self._simulator.run(names, vectors)
+        self.show_cycle(self._sim.cycles - 1)
+
+    def show_cycle(self, cycle: int):
+        if self._sim is None or not self._sim.cycles:
+            return
+        self._sim_cycle = max(0, min(cycle, self._sim.cycles - 1))
+        self.sim_label.configure(text=f"CYCLE {self._sim_cycle + 1}/{self._sim.cycles}")
+        self._draw_sim_values()
+
+    def _on_sim_changes(self, changes: list[ModelChange]):
+        if self._sim is None:
+            return
+        if any(change.op in self.SIM_STRUCTURE_OPS for change in changes):
+            self.clear_simulation()
+            self._simulator = self._sim = None
+            return
+        self._schedule_sim_refresh()
+
+    def _schedule_sim_refresh(self):
+        if self._sim_values is not None and not self._sim_pending:
+            self._sim_pending = True
+            self.root.after_idle(self._refresh_sim_values)
+
+    def _refresh_sim_values(self):
+        self._sim_pending = False
+        if self._sim is not None and self._sim_values is not None:
+            self._sim_values = None
+            self._draw_sim_values()
+
+    def _draw_sim_values(self):
+        from simulate import WireValues
+
+        canvas = str(self.canvas)
+        if self._sim_values is None:
+            slot = self._simulator.wire_slot
+            wires: list[Connection | Bus] = [connection for connection in self.connections if connection.line_id]
+            wires.extend(bus for bus in self._buses if bus.line_id)
+            self._sim_wires = wires
+            members = [wire.connections if isinstance(wire, Bus) else [wire] for wire in wires]
+            self._sim_values = WireValues.build([[slot(connection) for connection in group] for group in members])
+            items = [wire.line_id for wire in wires]
+            self.canvas.tk.call("foreach", "item", items, f"{canvas} addtag sim_wire withtag $item")
+        changed, counts = self._sim_values.update(self._sim.bits(self._sim_cycle))
+        sizes = self._sim_values.sizes
+        colors: dict[str, list[int]] = {}
+        pairs: list[int | str] = []
+        for index in changed.tolist():
+            wire = self._sim_wires[index]
+            high, size = int(counts[index]), int(sizes[index])
+            color = self.SIM_HIGH_COLOR if high == size else self.SIM_MIXED_COLOR if high else self.SIM_LOW_COLOR
+            colors.setdefault(color, []).append(wire.line_id)
+            if not wire.label_id:
+                continue
+            if isinstance(wire, Bus):
+                original = self._bus_label(wire)
+                text = original.replace(" nets", f" nets, {high} high", 1)
+            elif wire.label:
+                original, text = wire.label, f"{wire.label} = {high}"
+            else:
+                continue
+            self._sim_labels.setdefault(wire.label_id, original)
+            pairs.extend((wire.label_id, text))
+        for color, items in colors.items():
+            self.canvas.tk.call("foreach", "item", items, f"{canvas} itemconfigure $item -fill {color}")
+        self.canvas.tk.call("foreach", ("item", "text"), pairs, f"{canvas} itemconfigure $item -text $text")
+
+    def clear_simulation(self):
+        if self._sim_values is not None:
+            self.canvas.itemconfigure("sim_wire", fill=self.WIRE_COLOR)
+            for connection in self.connections:
+                color = self._wire_colors.get(id(connection))
+                if color and connection.line_id:
+                    self.canvas.itemconfig(connection.line_id, fill=color)
+            self.canvas.dtag("sim_wire", "sim_wire")
+        if self._sim_labels:
+            pairs = [value for pair in self._sim_labels.items() for value in pair]
+            self.canvas.tk.call("foreach", ("item", "text"), pairs, f"{self.canvas} itemconfigure $item -text $text")
+        self._sim_values = None
+        self._sim_wires = []
+        self._sim_labels = {}
+        self.sim_label.configure(text="")
 
     def _remove_connection(self, connection: Connection):
-        if connection.line_id:
-            self.canvas.delete(connection.line_id)
-        if connection.label_id:
-            self.canvas.delete(connection.label_id)
-        self.connections = [conn for conn in self.connections if conn is not connection]
+        self.model.remove_connection(connection, origin=self)
+        self._forget_connection(connection)
+        self._update_connections([], [])
+
+    def _forget_connection(self, connection: Connection):
+        self._delete_wire_items(connection)
+        bus = self._bus_for_connection(connection)
+        if bus:
+            bus.connections = [conn for conn in bus.connections if conn is not connection]
+            if len(bus.connections) < self.BUS_MIN_NETS:
+                self._expand_bus(bus)
+                self._buses = [other for other in self._buses if other is not bus]
+            elif not bus.expanded:
+                self._delete_wire_items(bus)
+                self._draw_bus(bus)
+
+    def _add_connection_wire(self, connection: Connection):
+        bus = self._joinable_bus(connection)
+        if bus is None:
+            self._draw_connection(connection)
+            return
+        bus.connections.append(connection)
+        if bus.expanded:
+            self._draw_connection(connection)
+            return
+        self._delete_wire_items(bus)
+        self._draw_bus(bus)
+
+    def _joinable_bus(self, connection: Connection) -> Bus | None:
+        if not connection.src or not connection.dst or connection.manual_mid_x is not None:
+            return None
+        if id(connection) in self._wire_colors:
+            return None
+        key = (connection.src[0], connection.dst[0])
+        bus = next((bus for bus in self._buses if (bus.src_node, bus.dst_node) == key), None)
+        if bus is None or not self._routes_parallel([*bus.connections, connection]):
+            return None
+        return bus
 
     def _toggle_ports(self):
         self._show_ports = not self._show_ports
         for node in self.nodes.values():
-            for port in node.inputs + node.outputs:
-                self._set_port_color(port, port.color)
+            self._set_node_port_colors(node)
 
     def _bring_active_front(self):
         if not self._active_node_name:
@@ -876,22 +2270,74 @@ class DiagramApp:
                 self._lower_connection(connection)
             if connection.dst and connection.dst[0] == self._active_node_name:
                 self._lower_connection(connection)
+        for bus in self._buses:
+            if self._active_node_name in (bus.src_node, bus.dst_node):
+                self._lower_connection(bus)
+
+    def _child_open(self, ref: ChildRef) -> bool:
+        child_app = self._child_apps.get(ref)
+        return child_app is not None and child_app._shown
+
+    def _toggle_active_child(self):
+        if self._mode != "normal" or not self._active_node_name:
+            return
+        node = self.nodes.get(self._active_node_name)
+        if not node or node.child is None:
+            return
+        if self._child_open(node.child):
+            self._collapse_child(node.child)
+        else:
+            self._expand_child(node)
+
+    def _expand_child(self, node: Node):
+        ref = node.child
+        if ref is None:
+            return
+        child_app = self._child_apps.get(ref)
+        if child_app is None:
+            if not ref.blocks_path.exists() or not ref.connections_path.exists():
+                print(f"하위 다이어그램 파일이 없습니다: {ref.blocks_path}, {ref.connections_path}")
+                return
+            nodes, connections = load_child_model(ref)
+            output_path = self.output_path.with_name(
+                f"{self.output_path.stem}_{node.name}{self.output_path.suffix}"
+            )
+            child_app = DiagramApp(
+                nodes,
+                connections,
+                output_path,
+                master=self.root,
+                autosave=False,
+                child_apps=self._child_apps,
+                raster_drag=self._raster_drag,
+            )
+            child_app.root.title(f"Block Diagram - {node.name}")
+            self._child_apps[ref] = child_app
+        else:
+            child_app.root.deiconify()
+            child_app._shown = True
+        child_app.root.protocol("WM_DELETE_WINDOW", lambda: self._collapse_child(ref))
+        self._refresh_child_markers(ref)
+
+    def _collapse_child(self, ref: ChildRef):
+        child_app = self._child_apps.get(ref)
+        if child_app is None:
+            return
+        child_app.root.withdraw()
+        child_app._shown = False
+        self._refresh_child_markers(ref)
+
+    def _refresh_child_markers(self, ref: ChildRef):
+        for node in self.nodes.values():
+            if node.child == ref:
+                self._redraw_node(node)
+        self._update_connections()
 
     def _gate_types(self) -> list[str]:
         return list(self._gate_definitions().keys())
 
     def _gate_definitions(self) -> dict[str, dict[str, int]]:
-        return {
-            "AND2": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
-            "AND4": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
-            "OR2": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
-            "OR4": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
-            "MUX_2x1": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
-            "MUX_4x1": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
-            "DEMUX_1x2": {"inputs": 1, "outputs": 2, "width": 60, "height": 40},
-            "DEMUX_1x4": {"inputs": 1, "outputs": 4, "width": 60, "height": 40},
-            "DFF": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
-        }
+        return GATE_DEFINITIONS
 
     def _draw_gate_shape(self, node: Node, x1: float, y1: float, x2: float, y2: float) -> list[int]:
         kind = node.kind
@@ -1017,10 +2463,25 @@ class DiagramApp:
         items.append(rect)
         return items
 
+    @_timed("save_diagram")
     def save_diagram(self, path: Path):
         self.root.update()
         ps_path = path.with_suffix(".ps")
-        self.canvas.postscript(file=ps_path, colormode="color")
+        bbox = self.canvas.bbox("all")
+        if bbox:
+            x1, y1, x2, y2 = bbox
+            self.canvas.postscript(
+                file=ps_path,
+                colormode="color",
+                x=x1,
+                y=y1,
+                width=x2 - x1,
+                height=y2 - y1,
+                pagewidth=x2 - x1,
+                pageheight=y2 - y1,
+            )
+        else:
+            self.canvas.postscript(file=ps_path, colormode="color")
         try:
             from PIL import Image
 
@@ -1029,6 +2490,91 @@ class DiagramApp:
         except Exception as exc:
             print(f"PNG 저장 실패: {exc}. PostScript 파일로 저장합니다: {ps_path}")
 
+    def export_poster(self, path: Path):
+        try:
+            from export import DiagramRenderer, export_png
+        except ImportError:
+            print("PNG 내보내기에는 Pillow가 필요합니다.")
+            return
+        try:
+            width, height = export_png(DiagramRenderer(self.nodes, self.connections, node_colors=self._node_colors), path)
+        except OSError as exc:
+            print(f"PNG 저장 실패: {exc}")
+            return
+        print(f"{path}: {width}x{height}")
+
+    def export_graph(self, path: Path):
+        from graph_export import write_dot, write_json
+
+        writer = write_dot if path.suffix == ".dot" else write_json
+        try:
+            nodes, connections = writer(self.nodes.values(), self.connections, path)
+        except OSError as exc:
+            print(f"내보내기 실패: {exc}")
+            return
+        print(f"{path}: {nodes} nodes, {connections} connections")
+
+    def _mark_frame(self, start: float):
+        if self._frame_pending:
+            return
+        self._frame_pending = True
+
+        def _finish():
+            self._frame_pending = False
+            if self._perf is not None:
+                self._perf.record("frame", time.perf_counter() - start)
+
+        self.root.after_idle(_finish)
+
+    def _toggle_perf_overlay(self):
+        if self._perf is None:
+            if self._perf_stats is None:
+                self._perf_stats = PerfStats()
+            self._perf = self._perf_stats
+            self.canvas.tk = _CountingTk(self.canvas.tk, self._perf)
+            self._refresh_perf_overlay()
+            return
+        self._perf = None
+        if isinstance(self.canvas.tk, _CountingTk):
+            self.canvas.tk = self.canvas.tk._tkapp
+        if self._perf_after:
+            self.root.after_cancel(self._perf_after)
+            self._perf_after = None
+        self.canvas.delete("perf_overlay")
+
+    def _refresh_perf_overlay(self):
+        if self._perf is None:
+            return
+        self.canvas.delete("perf_overlay")
+        lines = self._perf.summary_lines() or ["(이벤트 없음)"]
+        lines.append(f"canvas items: {len(self.canvas.find_all())}  tk calls: {self._perf.tk_calls}")
+        x = self.canvas.canvasx(8)
+        y = self.canvas.canvasy(8)
+        text = self.canvas.create_text(
+            x + 4,
+            y + 4,
+            text="\n".join(lines),
+            font=("Courier", 9),
+            anchor="nw",
+            fill="#003399",
+        )
+        x1, y1, x2, y2 = self.canvas.bbox(text)
+        background = self.canvas.create_rectangle(
+            x1 - 4, y1 - 4, x2 + 4, y2 + 4, fill="#ffffe0", outline="#999999"
+        )
+        for item in (background, text):
+            self.canvas.addtag_withtag("perf_overlay", item)
+        self.canvas.tag_raise(text)
+        self._perf_after = self.root.after(500, self._refresh_perf_overlay)
+
+    def _dump_perf(self):
+        if self._perf_stats is None:
+            print("성능 측정이 꺼져 있습니다. 'p' 키로 켜세요.")
+            return
+        path = self.output_path.with_suffix(".perf.txt")
+        self._perf_stats.dump(path)
+        print(f"성능 프로파일을 저장했습니다: {path}")
+
     def run(self):
         self.root.mainloop()
 
@@ -1046,7 +2592,58 @@ def _build_ports(value: str, prefix: str) -> list[str]:
     return [f"{prefix}{idx}" for idx in range(1, count + 1)]
 
 
+def _port_side(value: str) -> str | None:
+    side = value.strip().lower()
+    if not side:
+        return None
+    if side not in PORT_SIDES:
+        raise ValueError(f"포트 방향은 {', '.join(PORT_SIDES)} 중 하나여야 합니다: {value}")
+    return side
+
+
+def _child_ref(path: Path, child: str, child_connections: str) -> ChildRef | None:
+    if not child.strip():
+        return None
+    blocks_path = (path.parent / child.strip()).resolve()
+    if child_connections.strip():
+        connections_path = (path.parent / child_connections.strip()).resolve()
+    else:
+        connections_path = blocks_path.with_name("connections.txt")
+    return ChildRef(blocks_path=blocks_path, connections_path=connections_path)
+
+
+BULK_SUFFIXES = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _blocks_format(path: Path) -> str:
+    fmt = BULK_SUFFIXES.get(path.suffix.lower())
+    if fmt:
+        return fmt
+    with path.open(encoding="utf-8") as handle:
+        for raw in handle:
+            line = raw.strip()
+            if not line or line[0] in "#;":
+                continue
+            if line.startswith("{"):
+                return "jsonl"
+            if "," in line and line.split(",", 1)[0].strip().lower() == "name":
+                return "csv"
+            return "ini"
+    return "ini"
+
+
+def _next_slot(node: Node, x: int, y: int) -> tuple[int, int]:
+    y += max(160, node.height + 60) if is_dense(node) else 160
+    if y > 600:
+        return x + 260, 80
+    return x, y
+
+
 def parse_blocks(path: Path) -> dict[str, Node]:
+    fmt = _blocks_format(path)
+    if fmt != "ini":
+        return parse_bulk_blocks(path, fmt)
     config = configparser.ConfigParser()
     config.read(path)
     nodes: dict[str, Node] = {}
@@ -1054,26 +2651,161 @@ def parse_blocks(path: Path) -> dict[str, Node]:
     for section in config.sections():
         inputs = _build_ports(config.get(section, "in", fallback=""), "in")
         outputs = _build_ports(config.get(section, "out", fallback=""), "out")
-        base_height = max(100, 40 + 20 * max(len(inputs), len(outputs), 1))
-        node = Node(
-            name=section,
-            kind="BLOCK",
-            inputs=[Port(name=p, kind="in") for p in inputs],
-            outputs=[Port(name=p, kind="out") for p in outputs],
-            x=x,
-            y=y,
-            width=160,
-            height=base_height,
-            base_height=base_height,
+        child = _child_ref(
+            path,
+            config.get(section, "child", fallback=""),
+            config.get(section, "child_connections", fallback=""),
         )
-        nodes[section] = node
-        y += 160
-        if y > 600:
-            y = 80
-            x += 260
+        in_side = _port_side(config.get(section, "in_side", fallback=""))
+        out_side = _port_side(config.get(section, "out_side", fallback=""))
+        node = nodes[section] = make_block(section, inputs, outputs, x, y, child, in_side, out_side)
+        x, y = _next_slot(node, x, y)
     return nodes
 
 
+def _bulk_records(path: Path, fmt: str):
+    with path.open(encoding="utf-8", newline="") as handle:
+        if fmt == "csv":
+            reader = csv.DictReader(handle, skipinitialspace=True)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_no, raw in enumerate(handle, start=1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                record = _JSON_DECODER.decode(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_no}: JSON 형식이 잘못되었습니다: {exc.msg}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_no}: 한 줄에 객체 하나를 입력해야 합니다")
+            yield line_no, record
+
+
+@functools.lru_cache(maxsize=256)
+def _counted_ports(count: int, prefix: str) -> tuple[str, ...]:
+    return tuple(_build_ports(str(count), prefix))
+
+
+def _bulk_ports(value, prefix: str) -> list[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(name) for name in value]
+    if type(value) is int:
+        return list(_counted_ports(value, prefix)) if value >= 0 else _build_ports(str(value), prefix)
+    if isinstance(value, str):
+        text = value.strip()
+        return list(_counted_ports(int(text), prefix)) if text.isdigit() else text.split()
+    raise ValueError(f"포트는 개수 또는 이름 목록으로 입력해야 합니다: {value!r}")
+
+
+def _bulk_number(value) -> int | None:
+    if value is None or value == "":
+        return None
+    if type(value) is int:
+        return value
+    try:
+        return round(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"좌표와 크기는 숫자로 입력해야 합니다: {value!r}") from None
+
+
+BULK_EXTRA_FIELDS = frozenset(
+    ("kind", "child", "child_connections", "in_side", "out_side", "x", "y", "width", "height")
+)
+
+
+def _bulk_text(record: dict, key: str) -> str:
+    value = record.get(key)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{key} 값은 문자열이어야 합니다: {value!r}")
+    return value
+
+
+def _bulk_node(path: Path, record: dict, x: int, y: int) -> Node:
+    kind = _bulk_text(record, "kind") or "BLOCK"
+    if kind in GATE_DEFINITIONS:
+        return make_gate(record["name"], kind, x, y)
+    if kind != "BLOCK":
+        raise ValueError(f"알 수 없는 블록 종류입니다: {kind}")
+    child = _bulk_text(record, "child")
+    in_side = _bulk_text(record, "in_side")
+    out_side = _bulk_text(record, "out_side")
+    return make_block(
+        record["name"],
+        _bulk_ports(record.get("in"), "in"),
+        _bulk_ports(record.get("out"), "out"),
+        x,
+        y,
+        _child_ref(path, child, _bulk_text(record, "child_connections")) if child else None,
+        _port_side(in_side) if in_side else None,
+        _port_side(out_side) if out_side else None,
+    )
+
+
+def parse_bulk_blocks(path: Path, fmt: str = "jsonl") -> dict[str, Node]:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read_bulk_blocks(path, fmt)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _read_bulk_blocks(path: Path, fmt: str) -> dict[str, Node]:
+    nodes: dict[str, Node] = {}
+    x, y = 80, 80
+    for line_no, record in _bulk_records(path, fmt):
+        name = record.get("name")
+        if not name or not isinstance(name, str):
+            raise ValueError(f"{path}:{line_no}: 블록 이름(name)이 없습니다")
+        if name in nodes:
+            raise ValueError(f"{path}:{line_no}: 블록 이름이 중복되었습니다: {name}")
+        extra = [key for key in record.keys() & BULK_EXTRA_FIELDS if record[key] not in (None, "")]
+        try:
+            if not extra:
+                inputs, outputs = _bulk_ports(record.get("in"), "in"), _bulk_ports(record.get("out"), "out")
+                node = make_block(name, inputs, outputs, x, y)
+                x, y = _next_slot(node, x, y)
+                nodes[name] = node
+                continue
+            node = _bulk_node(path, record, x, y)
+            px, py = _bulk_number(record.get("x")), _bulk_number(record.get("y"))
+            width, height = _bulk_number(record.get("width")), _bulk_number(record.get("height"))
+        except ValueError as exc:
+            raise ValueError(f"{path}:{line_no}: {exc}") from None
+        if width is not None:
+            node.width = width
+        if height is not None:
+            node.height = node.base_height = height
+        if px is None and py is None:
+            x, y = _next_slot(node, x, y)
+        else:
+            node.x = node.x if px is None else px
+            node.y = node.y if py is None else py
+        nodes[name] = node
+    return nodes
+
+
+_child_models: dict[ChildRef, tuple[dict[str, Node], list[Connection]]] = {}
+
+
+def load_child_model(ref: ChildRef) -> tuple[dict[str, Node], list[Connection]]:
+    model = _child_models.get(ref)
+    if model is None:
+        nodes = parse_blocks(ref.blocks_path)
+        connections = parse_connections(ref.connections_path, nodes)
+        validate_connections(nodes, connections, ref.blocks_path.with_name(f"{ref.blocks_path.stem}.error.log"))
+        model = (nodes, connections)
+        _child_models[ref] = model
+    return model
+
+
 def parse_connections(
     path: Path,
     nodes: dict[str, Node],
@@ -1181,18 +2913,108 @@ def validate_connections(nodes: dict[str, Node], connections: list[Connection],
     return True
 
 
+def _child_models_of(nodes: dict[str, Node]) -> list[tuple[dict[str, Node], list[Connection]]]:
+    models = []
+    seen: set[ChildRef] = set()
+    pending = [node.child for node in nodes.values() if node.child is not None]
+    while pending:
+        ref = pending.pop()
+        if ref in seen or not ref.blocks_path.exists() or not ref.connections_path.exists():
+            continue
+        seen.add(ref)
+        child_nodes, child_connections = load_child_model(ref)
+        models.append((child_nodes, child_connections))
+        pending.extend(node.child for node in child_nodes.values() if node.child is not None)
+    return models
+
+
 def main():
-    blocks_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("input.txt")
-    connections_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path("connections.txt")
-    output_path = Path(sys.argv[3]) if len(sys.argv) > 3 else Path("diagram.png")
-    if not blocks_path.exists() or not connections_path.exists():
-        print("input.txt 또는 connections.txt 파일이 없습니다.")
+    started = time.perf_counter()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="블록 다이어그램 편집기")
+    parser.add_argument("blocks", nargs="?", default="input.txt")
+    parser.add_argument("connections", nargs="?")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--layout", action="store_true", help="연결 요소별 자동 배치를 병렬로 수행")
+    parser.add_argument("--workers", type=int, default=None, help="자동 배치 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--export-png", metavar="PATH", help="GUI 없이 전체 다이어그램을 PNG로 저장")
+    parser.add_argument("--export-tiles", metavar="DIR", help="GUI 없이 타일 피라미드(<레벨>/<열>/<행>.png)로 저장")
+    parser.add_argument("--scale", type=float, default=1.0, help="--export-png 배율")
+    parser.add_argument("--export-dot", metavar="PATH", help="GUI 없이 블록/포트/연결을 Graphviz DOT로 저장")
+    parser.add_argument("--export-json", metavar="PATH", help="GUI 없이 블록/포트/연결을 JSON으로 저장")
+    parser.add_argument("--fast-start", action="store_true", help="창을 먼저 띄우고 항목을 나눠서 그림")
+    parser.add_argument("--startup-time", action="store_true", help="시작 단계별 시간을 출력하고 종료")
+    parser.add_argument("--raster-drag", action="store_true", help="드래그 중 움직이지 않는 항목을 이미지 한 장으로 그림")
+    parser.add_argument("--vectors", metavar="PATH", help="테스트 벡터로 게이트 회로를 시뮬레이션하고 연결선에 값을 표시")
+    parser.add_argument("--gate-delays", default="", help="크리티컬 패스용 게이트 지연 (예: AND2=1.5,MUX_4x1=2)")
+    parser.add_argument("--critical-paths", type=int, default=5, help="`t` 키로 강조할 최악 경로 수")
+    args = parser.parse_args()
+    try:
+        gate_delays = parse_delays(args.gate_delays)
+    except ValueError as exc:
+        print(exc)
         sys.exit(1)
-    nodes = parse_blocks(blocks_path)
-    connections = parse_connections(connections_path, nodes)
+    blocks_path = Path(args.blocks)
+    if blocks_path.suffix in (".v", ".sv"):
+        output_path = Path(args.connections or "diagram.png")
+        if not blocks_path.exists():
+            print(f"Verilog 파일이 없습니다: {blocks_path}")
+            sys.exit(1)
+        from verilog_import import parse_verilog
+
+        nodes, connections = parse_verilog(blocks_path)
+    else:
+        connections_path = Path(args.connections or "connections.txt")
+        output_path = Path(args.output or "diagram.png")
+        if not blocks_path.exists() or not connections_path.exists():
+            print("input.txt 또는 connections.txt 파일이 없습니다.")
+            sys.exit(1)
+        nodes = parse_blocks(blocks_path)
+        connections = parse_connections(connections_path, nodes)
     validate_connections(nodes, connections, Path("error.log"))
-    app = DiagramApp(nodes, connections, output_path)
-    app.run()
+    routes = None
+    if args.layout:
+        from layout import layout_models
+
+        routes = layout_models([(nodes, connections)] + _child_models_of(nodes), args.workers)
+    if args.export_dot or args.export_json:
+        from graph_export import write_dot, write_json
+
+        for writer, path in ((write_dot, args.export_dot), (write_json, args.export_json)):
+            if path:
+                count_nodes, count_connections = writer(nodes.values(), connections, Path(path))
+                print(f"{path}: {count_nodes} nodes, {count_connections} connections")
+        if not (args.export_png or args.export_tiles):
+            return
+    if args.export_png or args.export_tiles:
+        from export import DiagramRenderer, export_png, export_tiles
+
+        renderer = DiagramRenderer(nodes, connections, wire_routes=routes)
+        if args.export_png:
+            width, height = export_png(renderer, Path(args.export_png), args.scale)
+            print(f"{args.export_png}: {width}x{height}")
+        if args.export_tiles:
+            count = export_tiles(renderer, Path(args.export_tiles))
+            print(f"{args.export_tiles}: {count} tiles")
+        return
+    app = DiagramApp(
+        nodes,
+        connections,
+        output_path,
+        progressive=args.fast_start,
+        startup_report=started if args.startup_time else None,
+        raster_drag=args.raster_drag,
+        gate_delays=gate_delays,
+        critical_paths=args.critical_paths,
+    )
+    if args.vectors:
+        try:
+            app.load_vectors(Path(args.vectors))
+        except (OSError, ValueError) as exc:
+            print(f"시뮬레이션을 건너뜁니다: {exc}")
+    if args.fast_start or not args.startup_time:
+        app.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+import math
+import struct
+import zlib
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from model import Connection, Node, is_dense, is_packed, port_groups, port_positions
+from routing import ChannelRouter
+from spatial import Rect, SpatialGrid, rects_intersect
+
+MARGIN = 40
+PORT_RADIUS = 5
+HALO_PAD = 6
+TRACK_PITCH = 10
+STUB_LENGTH = 50
+LABEL_CHAR_WIDTH = 5
+LABEL_LINE_HEIGHT = 9
+LABEL_GAP = 4
+BACKGROUND = (255, 255, 255)
+FILL = (224, 224, 224)
+OUTLINE = (102, 102, 102)
+WIRE = (0, 0, 0)
+IDAT_CHUNK = 1 << 16
+QUERY_PAD = 4
+
+RenderWire = tuple[list[float], str | None, str | tuple[int, int, int], int, Rect | None]
+
+
+def _route(start, end, mid_x: float | None) -> list[float]:
+    if start and end:
+        x1, y1 = start
+        x2, y2 = end
+        if x1 == x2 or y1 == y2:
+            return [x1, y1, x2, y2]
+        mid_x = mid_x if mid_x is not None else (x1 + x2) / 2
+        return [x1, y1, mid_x, y1, mid_x, y2, x2, y2]
+    if end:
+        return [end[0] - STUB_LENGTH, end[1], end[0], end[1]]
+    return [start[0], start[1], start[0] + STUB_LENGTH, start[1]]
+
+
+class DiagramRenderer:
+    def __init__(
+        self,
+        nodes: dict[str, Node],
+        connections: list[Connection],
+        cell_size: int = 256,
+        node_colors: dict[str, str] | None = None,
+        wire_colors: dict[int, str] | None = None,
+        wires: list[RenderWire] | None = None,
+        clip: Rect | None = None,
+        wire_routes: dict[int, float] | None = None,
+    ):
+        self.nodes = nodes
+        self.clip = clip
+        self.node_colors = node_colors or {}
+        wire_colors = wire_colors or {}
+        wire_routes = wire_routes or {}
+        self._index = SpatialGrid(cell_size)
+        self._order: dict[tuple, int] = {}
+        self._ports: dict[str, list[tuple[float, float, float, float]]] = {}
+        self._wires: list[RenderWire] = list(wires or [])
+        ports: dict[tuple[str, str, str], tuple[float, float]] = {}
+        router = ChannelRouter(TRACK_PITCH)
+        for node in nodes.values():
+            router.set_block(node.name, node.x, node.x + node.width)
+            for port, px, py in port_positions(node):
+                ports[(node.name, port.kind, port.name)] = (px, py)
+            self._ports[node.name] = _port_marks(node)
+            self._add(
+                ("node", node.name),
+                (
+                    node.x - HALO_PAD,
+                    node.y - HALO_PAD,
+                    node.x + node.width + HALO_PAD,
+                    node.y + node.height + HALO_PAD,
+                ),
+            )
+        routes = []
+        for connection in connections:
+            start = ports.get((connection.src[0], "out", connection.src[1])) if connection.src else None
+            end = ports.get((connection.dst[0], "in", connection.dst[1])) if connection.dst else None
+            if (connection.src and start is None) or (connection.dst and end is None) or not (start or end):
+                continue
+            key = len(routes)
+            fixed = connection.manual_mid_x is not None or id(connection) in wire_routes
+            if start and end and not fixed and start[0] != end[0] and start[1] != end[1]:
+                router.set_segment(key, start[0], end[0], start[1], end[1])
+            routes.append((connection, start, end))
+        for key, (connection, start, end) in enumerate(routes):
+            mid_x = connection.manual_mid_x
+            if mid_x is None:
+                mid_x = wire_routes.get(id(connection))
+            if mid_x is None and key in router:
+                mid_x = router.mid_x(key)
+            coords = _route(start, end, mid_x)
+            label_rect = None
+            if connection.label:
+                lines = connection.label.split("\n")
+                width = max(len(line) for line in lines) * LABEL_CHAR_WIDTH
+                height = len(lines) * LABEL_LINE_HEIGHT
+                x, y = coords[0] + LABEL_GAP, coords[1] - LABEL_GAP
+                label_rect = (x, y - height, x + width, y)
+            self._wires.append((coords, connection.label, wire_colors.get(id(connection), WIRE), 1, label_rect))
+        for key, (coords, label, _color, _width, label_rect) in enumerate(self._wires):
+            for idx in range(0, len(coords) - 2, 2):
+                x1, y1, x2, y2 = coords[idx : idx + 4]
+                self._add(("wire", key, idx), (min(x1, x2) - 1, min(y1, y2) - 1, max(x1, x2) + 1, max(y1, y2) + 1))
+            if label and label_rect:
+                self._add(("label", key), label_rect)
+        if len(self._index):
+            rects = [rect for _key, rect in self._index.items()]
+            self.bounds: Rect = (
+                min(rect[0] for rect in rects) - MARGIN,
+                min(rect[1] for rect in rects) - MARGIN,
+                max(rect[2] for rect in rects) + MARGIN,
+                max(rect[3] for rect in rects) + MARGIN,
+            )
+        else:
+            self.bounds = (0, 0, 1, 1)
+
+    def _add(self, key: tuple, rect: Rect):
+        if self.clip is not None:
+            if not rects_intersect(rect, self.clip):
+                return
+            clip = self.clip
+            rect = (max(rect[0], clip[0]), max(rect[1], clip[1]), min(rect[2], clip[2]), min(rect[3], clip[3]))
+        self._order[key] = len(self._order)
+        self._index.insert(key, rect)
+
+    def size(self, scale: float = 1.0) -> tuple[int, int]:
+        x1, y1, x2, y2 = self.bounds
+        return max(1, math.ceil((x2 - x1) * scale)), max(1, math.ceil((y2 - y1) * scale))
+
+    def items_in(self, left: int, top: int, width: int, height: int, scale: float = 1.0) -> list[tuple]:
+        ox, oy = self.bounds[0] - QUERY_PAD, self.bounds[1] - QUERY_PAD
+        pad = 2 * QUERY_PAD
+        rect = (ox + left / scale, oy + top / scale, ox + pad + (left + width) / scale, oy + pad + (top + height) / scale)
+        return sorted(self._index.query(rect), key=self._order.__getitem__)
+
+    def render_tile(self, left: int, top: int, width: int, height: int, scale: float = 1.0) -> Image.Image:
+        image = Image.new("RGB", (width, height), BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        def point(x: float, y: float) -> tuple[int, int]:
+            return round((x - self.bounds[0]) * scale) - left, round((y - self.bounds[1]) * scale) - top
+
+        line_width = max(1, round(2 * scale))
+        font = ImageFont.load_default() if scale >= 0.5 else None
+        for key in self.items_in(left, top, width, height, scale):
+            if key[0] == "node":
+                self._draw_node(draw, self.nodes[key[1]], point, scale, line_width, font)
+            elif key[0] == "wire":
+                coords, _label, color, width, _rect = self._wires[key[1]]
+                segment = [point(*coords[key[2] : key[2] + 2]), point(*coords[key[2] + 2 : key[2] + 4])]
+                draw.line(segment, color, max(1, round(width * scale)))
+            elif font is not None:
+                _coords, label, _color, _width, rect = self._wires[key[1]]
+                draw.multiline_text(point(rect[0], rect[1]), label, WIRE, font, spacing=0)
+        return image
+
+    def render_rect(self, x1: int, y1: int, x2: int, y2: int) -> Image.Image:
+        left, top = x1 - self.bounds[0], y1 - self.bounds[1]
+        return self.render_tile(round(left), round(top), max(1, x2 - x1), max(1, y2 - y1))
+
+    def _draw_node(self, draw, node: Node, point, scale: float, line_width: int, font):
+        x1, y1 = point(node.x, node.y)
+        x2, y2 = point(node.x + node.width, node.y + node.height)
+        w, h = x2 - x1, y2 - y1
+        kind = node.kind
+        if kind.startswith("AND"):
+            mid_x = (x1 + x2) / 2
+            draw.rectangle([x1, y1, mid_x, y2], FILL)
+            draw.pieslice([mid_x - w / 2, y1, x2, y2], -90, 90, FILL)
+            draw.arc([mid_x - w / 2, y1, x2, y2], -90, 90, OUTLINE, line_width)
+            draw.line([(mid_x, y1), (x1, y1), (x1, y2), (mid_x, y2)], OUTLINE, line_width)
+        elif kind.startswith("OR"):
+            draw.polygon(
+                [
+                    (x1 + w * 0.1, y1),
+                    (x1 + w * 0.6, y1 + h * 0.1),
+                    (x2, (y1 + y2) / 2),
+                    (x1 + w * 0.6, y2 - h * 0.1),
+                    (x1 + w * 0.1, y2),
+                    (x1 + w * 0.3, (y1 + y2) / 2),
+                ],
+                FILL,
+                OUTLINE,
+                line_width,
+            )
+        elif kind.startswith("MUX"):
+            draw.polygon([(x1, y1), (x2, y1 + h * 0.2), (x2, y2 - h * 0.2), (x1, y2)], FILL, OUTLINE, line_width)
+        elif kind.startswith("DEMUX"):
+            draw.polygon([(x1, y1 + h * 0.2), (x2, y1), (x2, y2), (x1, y2 - h * 0.2)], FILL, OUTLINE, line_width)
+        else:
+            draw.rectangle([x1, y1, x2, y2], FILL, OUTLINE, line_width)
+            if kind == "DFF":
+                cy = (y1 + y2) / 2
+                draw.polygon([(x1, cy - 6 * scale), (x1 + 8 * scale, cy), (x1, cy + 6 * scale)], OUTLINE)
+        color = self.node_colors.get(node.name)
+        if color:
+            pad = 4 * scale
+            draw.rectangle([x1 - pad, y1 - pad, x2 + pad, y2 + pad], None, color, max(1, round(3 * scale)))
+        if kind == "BLOCK" and font is not None:
+            draw.text((x1 + 6 * scale, y1 + 6 * scale), node.name, WIRE, font)
+        radius = PORT_RADIUS * scale
+        for mx1, my1, mx2, my2 in self._ports[node.name]:
+            cx1, cy1 = point(mx1, my1)
+            cx2, cy2 = point(mx2, my2)
+            if (mx1, my1) == (mx2, my2):
+                draw.ellipse([cx1 - radius, cy1 - radius, cx1 + radius, cy1 + radius], WIRE)
+            else:
+                pad = radius - 2 * scale
+                draw.rectangle([cx1 - pad, cy1 - pad, cx2 + pad, cy2 + pad], WIRE)
+
+
+def _port_marks(node: Node) -> list[tuple[float, float, float, float]]:
+    if not is_dense(node):
+        return [(px, py, px, py) for _port, px, py in port_positions(node)]
+    marks = []
+    for _side, entries in port_groups(node):
+        if is_packed(entries):
+            marks.append((*entries[0][1:], *entries[-1][1:]))
+        else:
+            marks.extend((px, py, px, py) for _port, px, py in entries)
+    return marks
+
+
+def _png_chunk(handle, kind: bytes, data: bytes):
+    handle.write(struct.pack(">I", len(data)))
+    handle.write(kind)
+    handle.write(data)
+    handle.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+
+def export_png(renderer: DiagramRenderer, path: Path, scale: float = 1.0, band_height: int = 256) -> tuple[int, int]:
+    width, height = renderer.size(scale)
+    compressor = zlib.compressobj(6)
+    with Path(path).open("wb") as handle:
+        handle.write(b"\x89PNG\r\n\x1a\n")
+        _png_chunk(handle, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        pending = bytearray()
+        stride = width * 3
+        for top in range(0, height, band_height):
+            rows = min(band_height, height - top)
+            band = renderer.render_tile(0, top, width, rows, scale).tobytes()
+            for row in range(rows):
+                pending += compressor.compress(b"\x00" + band[row * stride : (row + 1) * stride])
+            while len(pending) >= IDAT_CHUNK:
+                _png_chunk(handle, b"IDAT", bytes(pending[:IDAT_CHUNK]))
+                del pending[:IDAT_CHUNK]
+        pending += compressor.flush()
+        if pending:
+            _png_chunk(handle, b"IDAT", bytes(pending))
+        _png_chunk(handle, b"IEND", b"")
+    return width, height
+
+
+def export_tiles(renderer: DiagramRenderer, directory: Path, tile_size: int = 256) -> int:
+    width, height = renderer.size()
+    max_level = max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+    written = 0
+    for level in range(max_level + 1):
+        scale = 2.0 ** (level - max_level)
+        level_width, level_height = renderer.size(scale)
+        for column in range(math.ceil(level_width / tile_size)):
+            for row in range(math.ceil(level_height / tile_size)):
+                left, top = column * tile_size, row * tile_size
+                if not renderer.items_in(left, top, tile_size, tile_size, scale):
+                    continue
+                tile_path = Path(directory) / str(level) / str(column) / f"{row}.png"
+                tile_path.parent.mkdir(parents=True, exist_ok=True)
+                renderer.render_tile(left, top, tile_size, tile_size, scale).save(tile_path)
+                written += 1
+    return written
@@ -0,0 +1,124 @@
+import functools
+import json
+from pathlib import Path
+from typing import Iterable
+
+from model import Connection, Node, Port
+
+SCHEMA = "block-diagram/1"
+POINTS_PER_INCH = 72
+_QUOTE_SPECIAL = str.maketrans({char: "\\" + char for char in '"\\'})
+_RECORD_SPECIAL = str.maketrans({char: "\\" + char for char in '{}|<>"\\'})
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def _open(path: Path):
+    return path.open("w", encoding="utf-8", newline="\n", buffering=1 << 16)
+
+
+def _endpoint(endpoint: tuple[str, str] | None) -> list[str] | None:
+    return list(endpoint) if endpoint else None
+
+
+def _port_record(port: Port) -> dict:
+    return {"name": port.name, "side": port.side, "manual_y": port.manual_y}
+
+
+def _node_record(node: Node) -> dict:
+    record = {
+        "name": node.name,
+        "kind": node.kind,
+        "x": node.x,
+        "y": node.y,
+        "width": node.width,
+        "height": node.height,
+        "inputs": [_port_record(port) for port in node.inputs],
+        "outputs": [_port_record(port) for port in node.outputs],
+    }
+    if node.child is not None:
+        record["child"] = {
+            "blocks": str(node.child.blocks_path),
+            "connections": str(node.child.connections_path),
+        }
+    return record
+
+
+def _connection_record(connection: Connection) -> dict:
+    return {
+        "src": _endpoint(connection.src),
+        "dst": _endpoint(connection.dst),
+        "label": connection.label,
+        "mid_x": connection.manual_mid_x,
+    }
+
+
+def write_json(nodes: Iterable[Node], connections: Iterable[Connection], path: Path) -> tuple[int, int]:
+    counts = [0, 0]
+    with _open(path) as handle:
+        handle.write(f'{{"schema": {json.dumps(SCHEMA)},\n"nodes": [')
+        for node in nodes:
+            handle.write(",\n" if counts[0] else "\n")
+            handle.write(_ENCODER.encode(_node_record(node)))
+            counts[0] += 1
+        handle.write('\n],\n"connections": [')
+        for connection in connections:
+            handle.write(",\n" if counts[1] else "\n")
+            handle.write(_ENCODER.encode(_connection_record(connection)))
+            counts[1] += 1
+        handle.write("\n]}\n")
+    return counts[0], counts[1]
+
+
+def _quote(text: str) -> str:
+    return f'"{text.translate(_QUOTE_SPECIAL)}"' if '"' in text or "\\" in text else f'"{text}"'
+
+
+@functools.lru_cache(maxsize=4096)
+def _port_cell(name: str) -> str:
+    text = name.translate(_RECORD_SPECIAL)
+    return f"<{text}> {text}"
+
+
+def _port_cells(ports: list[Port]) -> str:
+    return "{" + "|".join(_port_cell(port.name) for port in ports) + "}" if ports else ""
+
+
+def _record_label(node: Node) -> str:
+    fields = (_port_cells(node.inputs), node.name.translate(_RECORD_SPECIAL), _port_cells(node.outputs))
+    return "{" + "|".join(field for field in fields if field) + "}"
+
+
+def _dot_endpoint(endpoint: tuple[str, str], compass: str) -> str:
+    return f"{_quote(endpoint[0])}:{_quote(endpoint[1])}:{compass}"
+
+
+def write_dot(nodes: Iterable[Node], connections: Iterable[Connection], path: Path) -> tuple[int, int]:
+    counts = [0, 0]
+    with _open(path) as handle:
+        handle.write("digraph diagram {\n  rankdir=LR;\n  node [shape=record, fontsize=10];\n")
+        for node in nodes:
+            x = (node.x + node.width / 2) / POINTS_PER_INCH
+            y = -(node.y + node.height / 2) / POINTS_PER_INCH
+            handle.write(
+                f'  {_quote(node.name)} [label="{_record_label(node)}", kind={_quote(node.kind)}, '
+                f'pos="{x:g},{y:g}!", width={node.width / POINTS_PER_INCH:g}, '
+                f"height={node.height / POINTS_PER_INCH:g}];\n"
+            )
+            counts[0] += 1
+        for idx, connection in enumerate(connections):
+            ends = []
+            for endpoint, compass in ((connection.src, "e"), (connection.dst, "w")):
+                if endpoint:
+                    ends.append(_dot_endpoint(endpoint, compass))
+                else:
+                    ends.append(_quote(f"open:{idx}:{compass}"))
+                    handle.write(f"  {ends[-1]} [shape=point];\n")
+            attrs = []
+            if connection.label:
+                attrs.append(f"label={_quote(connection.label)}")
+            if connection.manual_mid_x is not None:
+                attrs.append(f'mid_x="{connection.manual_mid_x:g}"')
+            handle.write(f"  {ends[0]} -> {ends[1]}" + (f" [{', '.join(attrs)}]" if attrs else "") + ";\n")
+            counts[1] += 1
+        handle.write("}\n")
+    return counts[0], counts[1]
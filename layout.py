@@ -0,0 +1,224 @@
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from model import Node, port_positions
+from routing import ChannelRouter, assign_tracks
+
+LAYER_GAP = 120
+NODE_GAP = 40
+COMPONENT_GAP = 80
+TRACK_PITCH = 10
+ORIGIN = (80, 80)
+SWEEPS = 4
+
+Wire = tuple[int, tuple[str, str], tuple[str, str]]
+Component = tuple[list[Node], list[tuple[str, str]], list[Wire]]
+Placement = tuple[dict[str, tuple[int, int]], int, int, dict[int, float]]
+
+
+def connected_components(nodes: dict, connections: list) -> list[Component]:
+    parent = {name: name for name in nodes}
+
+    def find(name: str) -> str:
+        root = name
+        while parent[root] != root:
+            root = parent[root]
+        while parent[name] != root:
+            parent[name], name = root, parent[name]
+        return root
+
+    edges: dict[tuple[str, str], None] = {}
+    wires: list[Wire] = []
+    for connection in connections:
+        if not connection.src or not connection.dst:
+            continue
+        src, dst = connection.src[0], connection.dst[0]
+        if src not in parent or dst not in parent:
+            continue
+        if connection.manual_mid_x is None:
+            wires.append((id(connection), connection.src, connection.dst))
+        if src == dst:
+            continue
+        edges[(src, dst)] = None
+        src_root, dst_root = find(src), find(dst)
+        if src_root != dst_root:
+            parent[dst_root] = src_root
+    members: dict[str, list[Node]] = {}
+    for name, node in nodes.items():
+        members.setdefault(find(name), []).append(node)
+    component_edges: dict[str, list[tuple[str, str]]] = {root: [] for root in members}
+    for src, dst in edges:
+        component_edges[find(src)].append((src, dst))
+    component_wires: dict[str, list[Wire]] = {root: [] for root in members}
+    for wire in wires:
+        component_wires[find(wire[1][0])].append(wire)
+    return [(members[root], component_edges[root], component_wires[root]) for root in members]
+
+
+def _layers(names: list[str], edges: list[tuple[str, str]]) -> dict[str, int]:
+    succs: dict[str, list[str]] = {name: [] for name in names}
+    indegree = dict.fromkeys(names, 0)
+    for src, dst in edges:
+        succs[src].append(dst)
+        indegree[dst] += 1
+    order = {name: idx for idx, name in enumerate(names)}
+    ready = [(order[name], name) for name in names if indegree[name] == 0]
+    heapq.heapify(ready)
+    layer = dict.fromkeys(names, 0)
+    done: set[str] = set()
+    cursor = 0
+    while len(done) < len(names):
+        if not ready:
+            while names[cursor] in done:
+                cursor += 1
+            name = names[cursor]
+            heapq.heappush(ready, (order[name], name))
+            indegree[name] = 0
+        _idx, name = heapq.heappop(ready)
+        if name in done:
+            continue
+        done.add(name)
+        for succ in succs[name]:
+            if succ in done:
+                continue
+            layer[succ] = max(layer[succ], layer[name] + 1)
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                heapq.heappush(ready, (order[succ], succ))
+    return layer
+
+
+def _order_layers(columns: list[list[str]], edges: list[tuple[str, str]]) -> list[list[str]]:
+    preds: dict[str, list[str]] = {}
+    succs: dict[str, list[str]] = {}
+    for src, dst in edges:
+        preds.setdefault(dst, []).append(src)
+        succs.setdefault(src, []).append(dst)
+    position = {name: idx for column in columns for idx, name in enumerate(column)}
+    for sweep in range(SWEEPS):
+        forward = sweep % 2 == 0
+        neighbours = preds if forward else succs
+        sequence = columns[1:] if forward else columns[-2::-1]
+        for column in sequence:
+            def barycenter(name: str) -> tuple[float, int]:
+                linked = neighbours.get(name)
+                if not linked:
+                    return position[name], position[name]
+                return sum(position[other] for other in linked) / len(linked), position[name]
+
+            column.sort(key=barycenter)
+            for idx, name in enumerate(column):
+                position[name] = idx
+    return columns
+
+
+def route_component(members: list[Node], wires: list[Wire], positions: dict[str, tuple[int, int]]) -> dict[int, float]:
+    router = ChannelRouter(TRACK_PITCH)
+    ports: dict[tuple[str, str, str], tuple[float, float]] = {}
+    for node in members:
+        x, y = positions[node.name]
+        router.set_block(node.name, x, x + node.width)
+        for port, px, py in port_positions(node):
+            ports[(node.name, port.kind, port.name)] = (px + x - node.x, py + y - node.y)
+    for key, src, dst in wires:
+        start = ports.get((src[0], "out", src[1]))
+        end = ports.get((dst[0], "in", dst[1]))
+        if start and end and start[0] != end[0] and start[1] != end[1]:
+            router.set_segment(key, start[0], end[0], start[1], end[1])
+    return {key: router.mid_x(key) for key, _src, _dst in wires if key in router}
+
+
+def layout_component(component: Component) -> Placement:
+    members, edges, wires = component
+    sizes = {node.name: (node.width, node.height) for node in members}
+    names = [node.name for node in members]
+    layer = _layers(names, edges)
+    columns: list[list[str]] = [[] for _ in range(max(layer.values()) + 1)]
+    for name in names:
+        columns[layer[name]].append(name)
+    columns = _order_layers(columns, edges)
+    centers: dict[str, float] = {}
+    tops: dict[str, int] = {}
+    height = 0
+    for column in columns:
+        y = 0
+        for name in column:
+            tops[name] = y
+            centers[name] = y + sizes[name][1] / 2
+            y += sizes[name][1] + NODE_GAP
+        height = max(height, y - NODE_GAP)
+    intervals: list[list[tuple[int, float, float]]] = [[] for _ in columns]
+    for idx, (src, dst) in enumerate(edges):
+        low, high = sorted((centers[src], centers[dst]))
+        intervals[layer[src]].append((idx, low, high))
+    positions: dict[str, tuple[int, int]] = {}
+    x = width = 0
+    for column, channel in zip(columns, intervals):
+        column_width = max(sizes[name][0] for name in column)
+        for name in column:
+            positions[name] = (x, tops[name])
+        width = x + column_width
+        _tracks, count = assign_tracks(channel)
+        x = width + max(LAYER_GAP, (count + 1) * TRACK_PITCH)
+    return positions, width, height, route_component(members, wires, positions)
+
+
+def pack_placements(placements: list[Placement], origin: tuple[int, int] = ORIGIN) -> list[tuple[int, int]]:
+    area = sum((width + COMPONENT_GAP) * (height + COMPONENT_GAP) for _p, width, height, _r in placements)
+    widest = max((width for _p, width, _h, _r in placements), default=0)
+    row_limit = max(widest, int(math.sqrt(area) * 1.5))
+    order = sorted(range(len(placements)), key=lambda idx: (-placements[idx][2], idx))
+    offsets: list[tuple[int, int]] = [origin] * len(placements)
+    x, y, row_height = 0, 0, 0
+    for idx in order:
+        _positions, width, height, _routes = placements[idx]
+        if x and x + width > row_limit:
+            x, y, row_height = 0, y + row_height + COMPONENT_GAP, 0
+        offsets[idx] = (origin[0] + x, origin[1] + y)
+        x += width + COMPONENT_GAP
+        row_height = max(row_height, height)
+    return offsets
+
+
+def _map(components: list[Component], workers: int | None) -> list[Placement]:
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(components) < 2:
+        return [layout_component(component) for component in components]
+    workers = min(workers, len(components))
+    chunksize = max(1, len(components) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(layout_component, components, chunksize=chunksize))
+
+
+def _apply(nodes: dict, positions: dict[str, tuple[int, int]], offset: tuple[int, int]):
+    for name, (x, y) in positions.items():
+        node = nodes[name]
+        dy = offset[1] + y - node.y
+        node.x = offset[0] + x
+        node.y = offset[1] + y
+        for port in node.inputs + node.outputs:
+            if port.manual_y is not None:
+                port.manual_y += dy
+
+
+def layout_models(models: list[tuple[dict, list]], workers: int | None = None) -> dict[int, float]:
+    tasks: list[Component] = []
+    spans: list[tuple[int, int]] = []
+    for nodes, connections in models:
+        components = connected_components(nodes, connections)
+        spans.append((len(tasks), len(tasks) + len(components)))
+        tasks.extend(components)
+    placements = _map(tasks, workers)
+    routes: dict[int, float] = {}
+    for (nodes, _connections), (start, end) in zip(models, spans):
+        model_placements = placements[start:end]
+        for (positions, _width, _height, mids), offset in zip(model_placements, pack_placements(model_placements)):
+            _apply(nodes, positions, offset)
+            routes.update((key, offset[0] + mid_x) for key, mid_x in mids.items())
+    return routes
+
+
+def layout(nodes: dict, connections: list, workers: int | None = None) -> dict[int, float]:
+    return layout_models([(nodes, connections)], workers)
@@ -0,0 +1,223 @@
+import tkinter as tk
+from typing import Callable
+
+from model import Connection, DiagramModel, ModelChange, Node, port_positions
+from spatial import Rect
+
+BACKGROUND = "#ffffff"
+WIRE_COLOR = "#b8c2d6"
+NODE_COLOR = "#4a5a78"
+VIEWPORT_COLOR = "#d9342b"
+MARGIN = 0.1
+REBUILD_THRESHOLD = 500
+REBUILD_DELAY_MS = 300
+PixelRect = tuple[int, int, int, int]
+
+
+class Minimap:
+    def __init__(
+        self,
+        master: tk.Misc,
+        model: DiagramModel,
+        on_pan: Callable[[float, float, Rect], None],
+        view: Callable[[], Rect],
+        width: int = 220,
+        height: int = 160,
+    ):
+        self.model = model
+        self.on_pan = on_pan
+        self.view = view
+        self.width = width
+        self.height = height
+        self.canvas = tk.Canvas(master, width=width, height=height, bg=BACKGROUND, highlightthickness=1)
+        self.image = tk.PhotoImage(master=self.canvas, width=width, height=height)
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+        self.viewport = self.canvas.create_rectangle(0, 0, 0, 0, outline=VIEWPORT_COLOR, width=2)
+        self.canvas.bind("<ButtonPress-1>", self._on_pan)
+        self.canvas.bind("<B1-Motion>", self._on_pan)
+        self.origin = (0.0, 0.0)
+        self.scale = 1.0
+        self._nodes: dict[str, PixelRect] = {}
+        self._wires: dict[int, list[PixelRect]] = {}
+        self._incident: dict[str, dict[int, Connection]] = {}
+        self._points: dict[str, dict[tuple[str, str], tuple[float, float]]] = {}
+        self._node_cover: list[list[int]] = []
+        self._wire_cover: list[list[int]] = []
+        self._dirty: set[PixelRect] = set()
+        self._pending = False
+        self._rebuild_after: str | None = None
+        self.rebuild()
+        model.subscribe(self._on_changes)
+
+    def close(self):
+        self.model.unsubscribe(self._on_changes)
+        if self._rebuild_after is not None:
+            self.canvas.after_cancel(self._rebuild_after)
+        self.canvas.destroy()
+
+    def rebuild(self):
+        self._rebuild_after = None
+        nodes = self.model.nodes.values()
+        x1 = min((node.x for node in nodes), default=0)
+        y1 = min((node.y for node in nodes), default=0)
+        x2 = max((node.x + node.width for node in nodes), default=self.width)
+        y2 = max((node.y + node.height for node in nodes), default=self.height)
+        pad_x, pad_y = (x2 - x1) * MARGIN + 40, (y2 - y1) * MARGIN + 40
+        self.origin = (x1 - pad_x, y1 - pad_y)
+        self.scale = max((x2 - x1 + 2 * pad_x) / self.width, (y2 - y1 + 2 * pad_y) / self.height)
+        self._nodes.clear()
+        self._wires.clear()
+        self._incident.clear()
+        self._points.clear()
+        self._node_cover = [[0] * self.width for _ in range(self.height)]
+        self._wire_cover = [[0] * self.width for _ in range(self.height)]
+        for node in nodes:
+            self._add_node(node)
+        for connection in self.model.connections:
+            self._add_wire(connection)
+        self._dirty.clear()
+        self._put((0, 0, self.width - 1, self.height - 1))
+        self.update_viewport()
+
+    def _pixel(self, x: float, y: float) -> tuple[int, int, bool]:
+        px = int((x - self.origin[0]) / self.scale)
+        py = int((y - self.origin[1]) / self.scale)
+        inside = 0 <= px < self.width and 0 <= py < self.height
+        return min(max(px, 0), self.width - 1), min(max(py, 0), self.height - 1), inside
+
+    def _pixel_rect(self, x1: float, y1: float, x2: float, y2: float) -> tuple[PixelRect, bool]:
+        px1, py1, inside1 = self._pixel(min(x1, x2), min(y1, y2))
+        px2, py2, inside2 = self._pixel(max(x1, x2), max(y1, y2))
+        return (px1, py1, px2, py2), inside1 and inside2
+
+    def _paint(self, cover: list[list[int]], rect: PixelRect, delta: int):
+        x1, y1, x2, y2 = rect
+        for row in cover[y1 : y2 + 1]:
+            row[x1 : x2 + 1] = [value + delta for value in row[x1 : x2 + 1]]
+        self._dirty.add(rect)
+
+    def _add_node(self, node: Node) -> bool:
+        rect, inside = self._pixel_rect(node.x, node.y, node.x + node.width, node.y + node.height)
+        self._nodes[node.name] = rect
+        self._paint(self._node_cover, rect, 1)
+        return inside
+
+    def _remove_node(self, name: str):
+        rect = self._nodes.pop(name, None)
+        if rect is not None:
+            self._paint(self._node_cover, rect, -1)
+        self._points.pop(name, None)
+
+    def _point(self, endpoint: tuple[str, str] | None, kind: str) -> tuple[float, float] | None:
+        node = self.model.nodes.get(endpoint[0]) if endpoint else None
+        if node is None:
+            return None
+        points = self._points.get(node.name)
+        if points is None:
+            points = self._points[node.name] = {(port.kind, port.name): (px, py) for port, px, py in port_positions(node)}
+        return points.get((kind, endpoint[1]))
+
+    def _add_wire(self, connection: Connection) -> bool:
+        for endpoint in (connection.src, connection.dst):
+            if endpoint:
+                self._incident.setdefault(endpoint[0], {})[id(connection)] = connection
+        start = self._point(connection.src, "out")
+        end = self._point(connection.dst, "in")
+        if start is None or end is None:
+            return True
+        mid_x = connection.manual_mid_x if connection.manual_mid_x is not None else (start[0] + end[0]) / 2
+        inside = True
+        segments = []
+        for x1, y1, x2, y2 in (
+            (start[0], start[1], mid_x, start[1]),
+            (mid_x, start[1], mid_x, end[1]),
+            (mid_x, end[1], end[0], end[1]),
+        ):
+            rect, within = self._pixel_rect(x1, y1, x2, y2)
+            inside = inside and within
+            segments.append(rect)
+            self._paint(self._wire_cover, rect, 1)
+        self._wires[id(connection)] = segments
+        return inside
+
+    def _remove_wire(self, connection: Connection, forget: bool = True):
+        for rect in self._wires.pop(id(connection), []):
+            self._paint(self._wire_cover, rect, -1)
+        if not forget:
+            return
+        for endpoint in (connection.src, connection.dst):
+            incident = self._incident.get(endpoint[0]) if endpoint else None
+            if incident is not None:
+                incident.pop(id(connection), None)
+
+    def _on_changes(self, changes: list[ModelChange]):
+        if len(changes) > REBUILD_THRESHOLD:
+            self.rebuild()
+            return
+        inside = True
+        for change in changes:
+            if change.op == "add_connection":
+                inside = self._add_wire(change.connection) and inside
+            elif change.op == "remove_connection":
+                self._remove_wire(change.connection)
+            elif change.op == "remove_node":
+                self._remove_node(change.node)
+                self._incident.pop(change.node, None)
+            elif change.node in self.model.nodes:
+                self._remove_node(change.node)
+                inside = self._add_node(self.model.nodes[change.node]) and inside
+                wires = list(self._incident.get(change.node, {}).values())
+                for connection in wires:
+                    self._remove_wire(connection, forget=False)
+                for connection in wires:
+                    inside = self._add_wire(connection) and inside
+        self._schedule(inside)
+
+    def refresh_wire(self, connection: Connection):
+        self._remove_wire(connection, forget=False)
+        self._schedule(self._add_wire(connection))
+
+    def _schedule(self, inside: bool):
+        if not inside:
+            if self._rebuild_after is not None:
+                self.canvas.after_cancel(self._rebuild_after)
+            self._rebuild_after = self.canvas.after(REBUILD_DELAY_MS, self.rebuild)
+        if self._dirty and not self._pending:
+            self._pending = True
+            self.canvas.after_idle(self._flush)
+
+    def _flush(self):
+        self._pending = False
+        dirty, self._dirty = self._dirty, set()
+        for rect in dirty:
+            self._put(rect)
+
+    def _put(self, rect: PixelRect):
+        x1, y1, x2, y2 = rect
+        rows = []
+        for nodes, wires in zip(self._node_cover[y1 : y2 + 1], self._wire_cover[y1 : y2 + 1]):
+            colors = [
+                NODE_COLOR if node else WIRE_COLOR if wire else BACKGROUND
+                for node, wire in zip(nodes[x1 : x2 + 1], wires[x1 : x2 + 1])
+            ]
+            rows.append("{" + " ".join(colors) + "}")
+        self.image.put(" ".join(rows), to=(x1, y1))
+
+    def update_viewport(self):
+        x1, y1, x2, y2 = self.view()
+        ox, oy = self.origin
+        self.canvas.coords(
+            self.viewport,
+            (x1 - ox) / self.scale,
+            (y1 - oy) / self.scale,
+            (x2 - ox) / self.scale,
+            (y2 - oy) / self.scale,
+        )
+
+    def extent(self) -> Rect:
+        ox, oy = self.origin
+        return ox, oy, ox + self.width * self.scale, oy + self.height * self.scale
+
+    def _on_pan(self, event):
+        self.on_pan(self.origin[0] + event.x * self.scale, self.origin[1] + event.y * self.scale, self.extent())
+        self.update_viewport()
@@ -0,0 +1,495 @@
+import operator
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+
+@dataclass(slots=True)
+class Port:
+    name: str
+    kind: str
+    canvas_id: int | None = None
+    connected: bool = True
+    manual_y: float | None = None
+    color: str = "black"
+    side: str | None = None
+
+
+GATE_DEFINITIONS: dict[str, dict[str, int]] = {
+    "AND2": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
+    "AND4": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
+    "OR2": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
+    "OR4": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
+    "MUX_2x1": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
+    "MUX_4x1": {"inputs": 4, "outputs": 1, "width": 60, "height": 40},
+    "DEMUX_1x2": {"inputs": 1, "outputs": 2, "width": 60, "height": 40},
+    "DEMUX_1x4": {"inputs": 1, "outputs": 4, "width": 60, "height": 40},
+    "DFF": {"inputs": 2, "outputs": 1, "width": 60, "height": 40},
+}
+
+
+@dataclass(frozen=True)
+class ChildRef:
+    blocks_path: Path
+    connections_path: Path
+
+
+@dataclass(slots=True)
+class Node:
+    name: str
+    kind: str
+    inputs: list[Port]
+    outputs: list[Port]
+    x: int
+    y: int
+    width: int = 160
+    height: int = 100
+    base_height: int = 100
+    items: list[int] = field(default_factory=list)
+    resize_enabled: bool = False
+    child: ChildRef | None = None
+
+
+PORT_SIDES = ("left", "top", "right", "bottom")
+DENSE_PORTS = 32
+DENSE_PITCH = 4
+SPARSE_PITCH = 20
+DENSE_MARGIN = 30
+PORT_GROUP_SIZE = 16
+PortGroup = tuple[str, list[tuple[Port, float, float]]]
+_STEM_RE = re.compile(r"\[?\d+\]?$")
+_port_side = operator.attrgetter("side")
+
+
+def is_dense(node: Node) -> bool:
+    if node.kind != "BLOCK":
+        return False
+    return (
+        max(len(node.inputs), len(node.outputs)) > DENSE_PORTS
+        or any(map(_port_side, node.inputs))
+        or any(map(_port_side, node.outputs))
+    )
+
+
+def port_sides(node: Node) -> dict[str, list[Port]]:
+    sides: dict[str, list[Port]] = {side: [] for side in PORT_SIDES}
+    for ports, primary, spill in ((node.inputs, "left", "top"), (node.outputs, "right", "bottom")):
+        automatic = sum(1 for port in ports if port.side is None)
+        half = (automatic + 1) // 2 if automatic > DENSE_PORTS else automatic
+        seen = 0
+        for port in ports:
+            if port.side is not None:
+                sides[port.side].append(port)
+                continue
+            sides[primary if seen < half else spill].append(port)
+            seen += 1
+    return sides
+
+
+def _chunks(ports: list[Port]) -> list[list[Port]]:
+    chunks: list[list[Port]] = []
+    stem = None
+    for port in ports:
+        port_stem = _STEM_RE.sub("", port.name)
+        if not chunks or port_stem != stem or len(chunks[-1]) >= PORT_GROUP_SIZE:
+            chunks.append([])
+            stem = port_stem
+        chunks[-1].append(port)
+    return chunks
+
+
+def side_pitch(count: int) -> int:
+    return SPARSE_PITCH if count <= DENSE_PORTS // 4 else DENSE_PITCH
+
+
+def _side_length(chunks: list[list[Port]]) -> int:
+    count = sum(len(chunk) for chunk in chunks)
+    if not count:
+        return 0
+    pitch = side_pitch(count)
+    return 2 * DENSE_MARGIN + (count - 1) * pitch + (len(chunks) - 1) * 2 * pitch
+
+
+def dense_size(node: Node) -> tuple[int, int]:
+    lengths = {side: _side_length(_chunks(ports)) for side, ports in port_sides(node).items()}
+    width = max(160, lengths["top"], lengths["bottom"])
+    height = max(100, lengths["left"], lengths["right"])
+    return width, height
+
+
+def port_groups(node: Node) -> list[PortGroup]:
+    x1, y1 = node.x, node.y
+    x2, y2 = node.x + node.width, node.y + node.height
+    groups: list[PortGroup] = []
+    for side, ports in port_sides(node).items():
+        offset = DENSE_MARGIN
+        pitch = side_pitch(len(ports))
+        for chunk in _chunks(ports):
+            entries = []
+            for port in chunk:
+                if side == "left":
+                    entries.append((port, x1, y1 + offset))
+                elif side == "right":
+                    entries.append((port, x2, y1 + offset))
+                elif side == "top":
+                    entries.append((port, x1 + offset, y1))
+                else:
+                    entries.append((port, x1 + offset, y2))
+                offset += pitch
+            groups.append((side, entries))
+            offset += pitch
+    return groups
+
+
+def is_packed(entries: list[tuple[Port, float, float]]) -> bool:
+    if len(entries) < 2:
+        return False
+    x1, y1 = entries[0][1:]
+    x2, y2 = entries[1][1:]
+    return abs(x2 - x1) + abs(y2 - y1) < SPARSE_PITCH
+
+
+def port_positions(node: Node) -> list[tuple[Port, float, float]]:
+    if is_dense(node):
+        return [entry for _side, entries in port_groups(node) for entry in entries]
+    x1, y1 = node.x, node.y
+    x2, y2 = node.x + node.width, node.y + node.height
+    positions: list[tuple[Port, float, float]] = []
+    if node.kind == "BLOCK":
+        port_gap = max(node.base_height - 60, 40)
+        for px, ports in ((x1, node.inputs), (x2, node.outputs)):
+            step = port_gap // max(len(ports), 1)
+            for idx, port in enumerate(ports, start=1):
+                py = port.manual_y if port.manual_y is not None else y1 + 50 + idx * step
+                positions.append((port, px, py))
+        return positions
+    for px, ports in ((x1, node.inputs), (x2, node.outputs)):
+        for idx, port in enumerate(ports, start=1):
+            py = port.manual_y if port.manual_y is not None else y1 + (idx / (len(ports) + 1)) * (y2 - y1)
+            positions.append((port, px, py))
+    return positions
+
+
+@dataclass
+class Connection:
+    src: tuple[str, str] | None
+    dst: tuple[str, str] | None
+    line_id: int | None = None
+    manual_mid_x: float | None = None
+    label: str | None = None
+    label_id: int | None = None
+
+
+def make_block(
+    name: str,
+    inputs: list[str],
+    outputs: list[str],
+    x: int,
+    y: int,
+    child: ChildRef | None = None,
+    in_side: str | None = None,
+    out_side: str | None = None,
+) -> Node:
+    base_height = max(100, 40 + 20 * max(len(inputs), len(outputs), 1))
+    node = Node(
+        name=name,
+        kind="BLOCK",
+        inputs=[Port(port, "in", None, True, None, "black", in_side) for port in inputs],
+        outputs=[Port(port, "out", None, True, None, "black", out_side) for port in outputs],
+        x=x,
+        y=y,
+        width=160,
+        height=base_height,
+        base_height=base_height,
+        child=child,
+    )
+    if in_side or out_side or max(len(inputs), len(outputs)) > DENSE_PORTS:
+        node.width, node.height = dense_size(node)
+        node.base_height = node.height
+    return node
+
+
+def make_gate(name: str, kind: str, x: int, y: int) -> Node:
+    gate_def = GATE_DEFINITIONS[kind]
+    return Node(
+        name=name,
+        kind=kind,
+        inputs=[Port(name=f"in{idx}", kind="in") for idx in range(1, gate_def["inputs"] + 1)],
+        outputs=[Port(name=f"out{idx}", kind="out") for idx in range(1, gate_def["outputs"] + 1)],
+        x=x,
+        y=y,
+        width=gate_def["width"],
+        height=gate_def["height"],
+        base_height=gate_def["height"],
+    )
+
+
+@dataclass(frozen=True)
+class ModelChange:
+    op: str
+    node: str | None = None
+    connection: Connection | None = None
+    origin: object = None
+
+
+class DiagramModel:
+    def __init__(self, nodes: dict[str, Node] | None = None, connections: list[Connection] | None = None):
+        self.nodes = nodes if nodes is not None else {}
+        self.connections = connections if connections is not None else []
+        self._listeners: list[Callable[[list[ModelChange]], None]] = []
+        self._pending: list[ModelChange] = []
+        self._depth = 0
+        self._bottom = 0.0
+        self._right = 0.0
+        self._extent_stale = True
+
+    def subscribe(self, listener: Callable[[list[ModelChange]], None]):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[list[ModelChange]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @contextmanager
+    def batch(self) -> Iterator["DiagramModel"]:
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if not self._depth and self._pending:
+                changes, self._pending = self._pending, []
+                self._notify(changes)
+
+    def _emit(self, op: str, node: str | None = None, connection: Connection | None = None, origin: object = None):
+        if not self._listeners:
+            return
+        change = ModelChange(op, node, connection, origin)
+        if self._depth:
+            self._pending.append(change)
+        else:
+            self._notify([change])
+
+    def _notify(self, changes: list[ModelChange]):
+        for listener in list(self._listeners):
+            listener(changes)
+
+    def _node(self, name: str) -> Node:
+        node = self.nodes.get(name)
+        if node is None:
+            raise KeyError(f"블록/게이트가 없습니다: {name}")
+        return node
+
+    def find_port(self, node_name: str, port_name: str, kind: str) -> tuple[Node, Port] | None:
+        node = self.nodes.get(node_name)
+        if node is None:
+            return None
+        ports = node.inputs if kind == "in" else node.outputs
+        port = next((port for port in ports if port.name == port_name), None)
+        return (node, port) if port else None
+
+    def _extend(self, node: Node, old: tuple[float, float] | None = None):
+        if self._extent_stale:
+            return
+        bottom, right = node.y + node.height, node.x + node.width
+        shrunk = old is not None and (
+            (bottom < old[0] and old[0] >= self._bottom) or (right < old[1] and old[1] >= self._right)
+        )
+        if shrunk:
+            self._extent_stale = True
+            return
+        self._bottom = max(self._bottom, bottom)
+        self._right = max(self._right, right)
+
+    def extent(self) -> tuple[float, float]:
+        if self._extent_stale:
+            nodes = self.nodes.values()
+            self._bottom = max((node.y + node.height for node in nodes), default=0.0)
+            self._right = max((node.x + node.width for node in nodes), default=0.0)
+            self._extent_stale = False
+        return self._bottom, self._right
+
+    def next_position(self) -> tuple[int, int]:
+        if not self.nodes:
+            return (80, 80)
+        bottom, right = self.extent()
+        x = 80
+        y = bottom + 60
+        if y > 600:
+            y = 80
+            x = right + 60
+        return x, y
+
+    def add_node(self, node: Node, origin: object = None) -> Node:
+        if node.name in self.nodes:
+            raise ValueError(f"이미 있는 이름입니다: {node.name}")
+        self.nodes[node.name] = node
+        self._extend(node)
+        self._emit("add_node", node=node.name, origin=origin)
+        return node
+
+    def add_block(
+        self,
+        name: str,
+        inputs: int = 0,
+        outputs: int = 0,
+        x: int | None = None,
+        y: int | None = None,
+        origin: object = None,
+    ) -> Node:
+        if x is None or y is None:
+            x, y = self.next_position()
+        in_names = [f"in{idx}" for idx in range(1, inputs + 1)]
+        out_names = [f"out{idx}" for idx in range(1, outputs + 1)]
+        return self.add_node(make_block(name, in_names, out_names, x, y), origin)
+
+    def add_gate(self, name: str, kind: str, x: int | None = None, y: int | None = None, origin: object = None) -> Node:
+        if kind not in GATE_DEFINITIONS:
+            raise ValueError(f"알 수 없는 게이트 종류입니다: {kind}")
+        if x is None or y is None:
+            x, y = self.next_position()
+        return self.add_node(make_gate(name, kind, x, y), origin)
+
+    def remove_node(self, name: str, origin: object = None):
+        self._node(name)
+        self.remove_connections(
+            [
+                connection
+                for connection in self.connections
+                if (connection.src and connection.src[0] == name) or (connection.dst and connection.dst[0] == name)
+            ],
+            origin,
+        )
+        node = self.nodes.pop(name)
+        if not self._extent_stale and (node.y + node.height >= self._bottom or node.x + node.width >= self._right):
+            self._extent_stale = True
+        self._emit("remove_node", node=name, origin=origin)
+
+    def move_node(self, name: str, dx: float, dy: float, origin: object = None):
+        self.move_nodes([name], dx, dy, origin=origin)
+
+    def move_nodes(
+        self,
+        names: Iterable[str],
+        dx: float,
+        dy: float,
+        connections: Iterable[Connection] | None = None,
+        origin: object = None,
+    ):
+        names = list(names)
+        moving = set(names)
+        for name in names:
+            node = self._node(name)
+            old = (node.y + node.height, node.x + node.width)
+            node.x += dx
+            node.y += dy
+            self._extend(node, old)
+            for port in node.inputs + node.outputs:
+                if port.manual_y is not None:
+                    port.manual_y += dy
+        if connections is None:
+            connections = [
+                connection
+                for connection in self.connections
+                if connection.src
+                and connection.dst
+                and connection.src[0] in moving
+                and connection.dst[0] in moving
+            ]
+        for connection in connections:
+            if connection.manual_mid_x is not None:
+                connection.manual_mid_x += dx
+        for name in names:
+            self._emit("move_node", node=name, origin=origin)
+
+    def resize_node(
+        self,
+        name: str,
+        x: int | None = None,
+        y: int | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        origin: object = None,
+    ):
+        node = self._node(name)
+        old = (node.y + node.height, node.x + node.width)
+        node.x = node.x if x is None else x
+        node.y = node.y if y is None else y
+        node.width = node.width if width is None else width
+        node.height = node.height if height is None else height
+        self._extend(node, old)
+        self._emit("resize_node", node=name, origin=origin)
+
+    def add_port(self, name: str, kind: str, port_name: str | None = None, origin: object = None) -> Port:
+        node = self._node(name)
+        ports = node.inputs if kind == "in" else node.outputs
+        port_name = port_name or f"{kind}{len(ports) + 1}"
+        if any(port.name == port_name for port in ports):
+            raise ValueError(f"이미 있는 포트입니다: {name}.{port_name}")
+        port = Port(name=port_name, kind=kind)
+        ports.append(port)
+        if is_dense(node):
+            width, node.base_height = dense_size(node)
+            node.width = max(node.width, width)
+            node.height = max(node.height, node.base_height)
+        elif node.kind == "BLOCK":
+            node.base_height = max(100, 40 + 20 * max(len(node.inputs), len(node.outputs), 1))
+            node.height = max(node.height, node.base_height)
+        self._extend(node)
+        self._emit("add_port", node=name, origin=origin)
+        return port
+
+    def remove_port(self, name: str, kind: str, port_name: str, origin: object = None):
+        node = self._node(name)
+        endpoint = (name, port_name)
+        self.remove_connections(
+            [
+                connection
+                for connection in self.connections
+                if (kind == "out" and connection.src == endpoint) or (kind == "in" and connection.dst == endpoint)
+            ],
+            origin,
+        )
+        if kind == "in":
+            node.inputs = [port for port in node.inputs if port.name != port_name]
+        else:
+            node.outputs = [port for port in node.outputs if port.name != port_name]
+        self._emit("remove_port", node=name, origin=origin)
+
+    def move_port(self, name: str, kind: str, port_name: str, y: float, origin: object = None):
+        port_data = self.find_port(name, port_name, kind)
+        if not port_data:
+            raise KeyError(f"포트가 없습니다: {name}.{port_name}")
+        port_data[1].manual_y = y
+        self._emit("move_port", node=name, origin=origin)
+
+    def connect(
+        self,
+        src: tuple[str, str] | None,
+        dst: tuple[str, str] | None,
+        label: str | None = None,
+        origin: object = None,
+    ) -> Connection:
+        if src and not self.find_port(src[0], src[1], "out"):
+            raise KeyError(f"출력 포트가 없습니다: {src[0]}.{src[1]}")
+        if dst and not self.find_port(dst[0], dst[1], "in"):
+            raise KeyError(f"입력 포트가 없습니다: {dst[0]}.{dst[1]}")
+        return self.add_connection(Connection(src=src, dst=dst, label=label), origin)
+
+    def add_connection(self, connection: Connection, origin: object = None) -> Connection:
+        self.connections.append(connection)
+        self._emit("add_connection", connection=connection, origin=origin)
+        return connection
+
+    def remove_connection(self, connection: Connection, origin: object = None):
+        self.remove_connections([connection], origin)
+
+    def remove_connections(self, connections: Iterable[Connection], origin: object = None):
+        removed = {id(connection): connection for connection in connections}
+        if not removed:
+            return
+        self.connections[:] = [connection for connection in self.connections if id(connection) not in removed]
+        for connection in removed.values():
+            self._emit("remove_connection", connection=connection, origin=origin)
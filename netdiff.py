@@ -0,0 +1,213 @@
+import argparse
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from diagram import parse_blocks, parse_connections
+from model import Connection, Node, Port
+
+ADDED = "#2e9e44"
+REMOVED = "#d9342b"
+CHANGED = "#e8a317"
+ConnectionKey = tuple[tuple[str, str] | None, tuple[str, str] | None, int]
+
+
+@dataclass
+class NetlistDiff:
+    added_nodes: list[str] = field(default_factory=list)
+    removed_nodes: list[str] = field(default_factory=list)
+    changed_nodes: list[str] = field(default_factory=list)
+    added_connections: list[Connection] = field(default_factory=list)
+    removed_connections: list[Connection] = field(default_factory=list)
+    changed_connections: list[tuple[Connection, Connection]] = field(default_factory=list)
+    unchanged_nodes: int = 0
+    unchanged_connections: int = 0
+
+    def is_empty(self) -> bool:
+        return not (
+            self.added_nodes
+            or self.removed_nodes
+            or self.changed_nodes
+            or self.added_connections
+            or self.removed_connections
+            or self.changed_connections
+        )
+
+    def summary_lines(self) -> list[str]:
+        return [
+            f"nodes: +{len(self.added_nodes)} -{len(self.removed_nodes)} ~{len(self.changed_nodes)} "
+            f"(unchanged {self.unchanged_nodes})",
+            f"nets:  +{len(self.added_connections)} -{len(self.removed_connections)} "
+            f"~{len(self.changed_connections)} (unchanged {self.unchanged_connections})",
+        ]
+
+    def detail_lines(self) -> list[str]:
+        lines = [f"+ node {name}" for name in self.added_nodes]
+        lines.extend(f"- node {name}" for name in self.removed_nodes)
+        lines.extend(f"~ node {name}" for name in self.changed_nodes)
+        lines.extend(f"+ net {_describe(connection)}" for connection in self.added_connections)
+        lines.extend(f"- net {_describe(connection)}" for connection in self.removed_connections)
+        lines.extend(f"~ net {_describe(old)} => {_label(new)}" for old, new in self.changed_connections)
+        return lines
+
+
+def _endpoint(endpoint: tuple[str, str] | None) -> str:
+    return f"{endpoint[0]}.{endpoint[1]}" if endpoint else ""
+
+
+def _label(connection: Connection) -> str:
+    return (connection.label or "").replace("\n", "\\n")
+
+
+def _describe(connection: Connection) -> str:
+    text = f"{_endpoint(connection.src)} -> {_endpoint(connection.dst)}"
+    return f"{text} | {_label(connection)}" if connection.label else text
+
+
+def _node_signature(node: Node) -> tuple:
+    return (
+        node.kind,
+        tuple([port.name for port in node.inputs]),
+        tuple([port.name for port in node.outputs]),
+        node.child,
+    )
+
+
+def _keyed(connections: list[Connection]) -> dict[ConnectionKey, Connection]:
+    seen: dict[tuple, int] = {}
+    keyed: dict[ConnectionKey, Connection] = {}
+    for connection in connections:
+        pair = (connection.src, connection.dst)
+        occurrence = seen.get(pair, 0)
+        seen[pair] = occurrence + 1
+        keyed[(connection.src, connection.dst, occurrence)] = connection
+    return keyed
+
+
+def diff_models(
+    old_nodes: dict[str, Node],
+    old_connections: list[Connection],
+    new_nodes: dict[str, Node],
+    new_connections: list[Connection],
+) -> NetlistDiff:
+    diff = NetlistDiff()
+    for name, node in new_nodes.items():
+        old = old_nodes.get(name)
+        if old is None:
+            diff.added_nodes.append(name)
+        elif _node_signature(old) != _node_signature(node):
+            diff.changed_nodes.append(name)
+        else:
+            diff.unchanged_nodes += 1
+    diff.removed_nodes = [name for name in old_nodes if name not in new_nodes]
+    old_keyed = _keyed(old_connections)
+    new_keyed = _keyed(new_connections)
+    for key, connection in new_keyed.items():
+        old = old_keyed.get(key)
+        if old is None:
+            diff.added_connections.append(connection)
+        elif (old.label or "") != (connection.label or ""):
+            diff.changed_connections.append((old, connection))
+        else:
+            diff.unchanged_connections += 1
+    diff.removed_connections = [connection for key, connection in old_keyed.items() if key not in new_keyed]
+    return diff
+
+
+def _shift(node: Node, x: int, y: int):
+    dy = y - node.y
+    node.x, node.y = x, y
+    for port in node.inputs + node.outputs:
+        if port.manual_y is not None:
+            port.manual_y += dy
+
+
+def merge_models(
+    old_nodes: dict[str, Node],
+    old_connections: list[Connection],
+    new_nodes: dict[str, Node],
+    new_connections: list[Connection],
+    diff: NetlistDiff,
+) -> tuple[dict[str, Node], list[Connection], dict[str, str], dict[int, str]]:
+    nodes: dict[str, Node] = {}
+    for name, node in new_nodes.items():
+        old = old_nodes.get(name)
+        if old is not None:
+            _shift(node, old.x, old.y)
+            nodes[name] = node
+    for name in diff.changed_nodes:
+        node, old = new_nodes[name], old_nodes[name]
+        inputs = {port.name for port in node.inputs}
+        outputs = {port.name for port in node.outputs}
+        node.inputs.extend(Port(name=port.name, kind="in") for port in old.inputs if port.name not in inputs)
+        node.outputs.extend(Port(name=port.name, kind="out") for port in old.outputs if port.name not in outputs)
+    for name in diff.removed_nodes:
+        nodes[name] = old_nodes[name]
+    x = max((node.x + node.width for node in old_nodes.values()), default=0) + 100
+    y, column_width = 80, 0
+    for name in diff.added_nodes:
+        node = new_nodes[name]
+        if y > 80 and y + node.height > 680:
+            x, y, column_width = x + column_width + 100, 80, 0
+        _shift(node, x, y)
+        nodes[name] = node
+        y += node.height + 60
+        column_width = max(column_width, node.width)
+    node_colors = {name: ADDED for name in diff.added_nodes}
+    node_colors.update((name, REMOVED) for name in diff.removed_nodes)
+    node_colors.update((name, CHANGED) for name in diff.changed_nodes)
+    wire_colors = {id(connection): ADDED for connection in diff.added_connections}
+    wire_colors.update((id(new), CHANGED) for _old, new in diff.changed_connections)
+    wire_colors.update((id(connection), REMOVED) for connection in diff.removed_connections)
+    return nodes, new_connections + diff.removed_connections, node_colors, wire_colors
+
+
+def load(blocks_path: Path, connections_path: Path) -> tuple[dict[str, Node], list[Connection]]:
+    nodes = parse_blocks(blocks_path)
+    return nodes, parse_connections(connections_path, nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="두 버전의 input.txt/connections.txt 비교")
+    parser.add_argument("old_blocks")
+    parser.add_argument("old_connections")
+    parser.add_argument("new_blocks")
+    parser.add_argument("new_connections")
+    parser.add_argument("--report", metavar="PATH", help="변경 목록을 파일로 저장")
+    parser.add_argument("--png", metavar="PATH", help="GUI 없이 강조 표시된 다이어그램을 PNG로 저장")
+    parser.add_argument("--show", action="store_true", help="강조 표시된 다이어그램을 창으로 표시")
+    args = parser.parse_args()
+    for path in (args.old_blocks, args.old_connections, args.new_blocks, args.new_connections):
+        if not Path(path).exists():
+            print(f"파일이 없습니다: {path}")
+            sys.exit(2)
+    old_nodes, old_connections = load(Path(args.old_blocks), Path(args.old_connections))
+    new_nodes, new_connections = load(Path(args.new_blocks), Path(args.new_connections))
+    diff = diff_models(old_nodes, old_connections, new_nodes, new_connections)
+    for line in diff.summary_lines():
+        print(line)
+    if args.report:
+        Path(args.report).write_text("\n".join(diff.detail_lines()) + "\n", encoding="utf-8")
+    if args.png or args.show:
+        nodes, connections, node_colors, wire_colors = merge_models(
+            old_nodes, old_connections, new_nodes, new_connections, diff
+        )
+        if args.png:
+            from export import DiagramRenderer, export_png
+
+            renderer = DiagramRenderer(nodes, connections, node_colors=node_colors, wire_colors=wire_colors)
+            export_png(renderer, Path(args.png))
+        if args.show:
+            from diagram import DiagramApp
+
+            output_path = Path(args.png or "diff.png")
+            app = DiagramApp(
+                nodes, connections, output_path, autosave=False, node_colors=node_colors, wire_colors=wire_colors
+            )
+            app.root.title("Netlist Diff")
+            app.run()
+    sys.exit(0 if diff.is_empty() else 1)
+
+
+if __name__ == "__main__":
+    main()
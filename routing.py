@@ -0,0 +1,205 @@
+import bisect
+import heapq
+from typing import Hashable
+
+Channel = tuple[float, float]
+
+
+def assign_tracks(intervals: list[tuple[Hashable, float, float]]) -> tuple[dict[Hashable, int], int]:
+    order = sorted(range(len(intervals)), key=lambda idx: (intervals[idx][1], intervals[idx][2], idx))
+    tracks: dict[Hashable, int] = {}
+    active: list[tuple[float, int]] = []
+    free: list[int] = []
+    count = 0
+    for idx in order:
+        key, low, high = intervals[idx]
+        while active and active[0][0] < low:
+            _high, track = heapq.heappop(active)
+            heapq.heappush(free, track)
+        if free:
+            track = heapq.heappop(free)
+        else:
+            track = count
+            count += 1
+        tracks[key] = track
+        heapq.heappush(active, (high, track))
+    return tracks, count
+
+
+def track_offset(channel: Channel, track: int, count: int, pitch: float) -> float:
+    left, right = channel
+    step = min(pitch, (right - left) / (count + 1)) if count else pitch
+    return (left + right) / 2 + (track - (count - 1) / 2) * step
+
+
+def column_intervals(blocks) -> list[tuple[float, float, bool]]:
+    delta: dict[float, int] = {}
+    for left, right in blocks:
+        if right > left:
+            delta[left] = delta.get(left, 0) + 1
+            delta[right] = delta.get(right, 0) - 1
+    edges = sorted(delta)
+    intervals = []
+    depth = 0
+    for left, right in zip(edges, edges[1:]):
+        depth += delta[left]
+        intervals.append((left, right, depth == 0))
+    return intervals
+
+
+class ChannelRouter:
+    def __init__(self, pitch: float = 10.0):
+        self.pitch = pitch
+        self._segments: dict[Hashable, tuple[Channel, float, float]] = {}
+        self._channel_of: dict[Hashable, Channel] = {}
+        self._channels: dict[Channel, dict[Hashable, None]] = {}
+        self._tracks: dict[Hashable, int] = {}
+        self._counts: dict[Channel, int] = {}
+        self._blocks: dict[Hashable, Channel] = {}
+        self._columns: list[tuple[float, float, bool]] = []
+        self._edges: list[float] = []
+        self._free: list[int] = []
+        self._columns_dirty = False
+        self._pending: dict[Hashable, None] = {}
+        self._shifted: dict[Hashable, float] = {}
+        self._dirty: set[Channel] = set()
+        self._changed: set[Hashable] = set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._segments
+
+    def set_block(self, key: Hashable, left: float, right: float):
+        if self._blocks.get(key) != (left, right):
+            self._blocks[key] = (left, right)
+            self._columns_dirty = True
+
+    def remove_block(self, key: Hashable):
+        if self._blocks.pop(key, None) is not None:
+            self._columns_dirty = True
+
+    def set_segment(self, key: Hashable, x1: float, x2: float, y1: float, y2: float):
+        segment = ((min(x1, x2), max(x1, x2)), min(y1, y2), max(y1, y2))
+        if self._segments.get(key) == segment:
+            return
+        self._segments[key] = segment
+        self._pending[key] = None
+
+    def translate(self, key: Hashable, dx: float, dy: float):
+        old = self._segments.get(key)
+        if old is None:
+            return
+        if dx and key in self._tracks:
+            expected = self._shifted.get(key)
+            self._shifted[key] = (self._offset(key) if expected is None else expected) + dx
+        (left, right), low, high = old
+        self.set_segment(key, left + dx, right + dx, low + dy, high + dy)
+
+    def remove(self, key: Hashable):
+        if self._segments.pop(key, None) is None:
+            return
+        channel = self._channel_of.pop(key, None)
+        if channel is not None:
+            self._detach(key, channel)
+        self._tracks.pop(key, None)
+        self._pending.pop(key, None)
+        self._shifted.pop(key, None)
+        self._changed.discard(key)
+
+    def _detach(self, key: Hashable, channel: Channel):
+        members = self._channels.get(channel)
+        if members is None:
+            return
+        members.pop(key, None)
+        self._dirty.add(channel)
+        if not members:
+            del self._channels[channel]
+
+    def _refresh_columns(self):
+        self._columns_dirty = False
+        columns = column_intervals(self._blocks.values())
+        if columns == self._columns:
+            return
+        old = self._columns
+        head = 0
+        while head < min(len(old), len(columns)) and old[head] == columns[head]:
+            head += 1
+        tail = 0
+        while tail < min(len(old), len(columns)) - head and old[-1 - tail] == columns[-1 - tail]:
+            tail += 1
+        changed = old[head : len(old) - tail] + columns[head : len(columns) - tail]
+        low = min(column[0] for column in changed)
+        high = max(column[1] for column in changed)
+        self._columns = columns
+        self._edges = [column[0] for column in columns] + [columns[-1][1]] if columns else []
+        self._free = [idx for idx, column in enumerate(columns) if column[2]]
+        self._pending.update(
+            (key, None) for key, (span, _low, _high) in self._segments.items() if span[0] <= high and span[1] >= low
+        )
+
+    def _channel(self, span: Channel) -> Channel:
+        low, high = span
+        edges = self._edges
+        first = bisect.bisect_left(edges, low)
+        last = bisect.bisect_right(edges, high) - 1
+        if first >= last:
+            return span
+        mid = (low + high) / 2
+        middle = min(max(bisect.bisect_right(edges, mid) - 1, first), last - 1)
+        free = self._free
+        start, stop = bisect.bisect_left(free, first), bisect.bisect_left(free, last)
+        if start < stop:
+            pos = bisect.bisect_left(free, middle, start, stop)
+            choices = [free[idx] for idx in (pos - 1, pos) if start <= idx < stop]
+            middle = min(choices, key=lambda idx: abs(edges[idx] + edges[idx + 1] - 2 * mid))
+        return edges[middle], edges[middle + 1]
+
+    def flush(self):
+        if self._columns_dirty:
+            self._refresh_columns()
+        for key in self._pending:
+            channel = self._channel(self._segments[key][0])
+            old = self._channel_of.get(key)
+            if old != channel:
+                if old is not None:
+                    self._detach(key, old)
+                self._channel_of[key] = channel
+                self._channels.setdefault(channel, {})[key] = None
+                self._changed.add(key)
+            self._dirty.add(channel)
+        self._pending.clear()
+        changed = self._changed
+        for channel in self._dirty:
+            members = self._channels.get(channel)
+            if not members:
+                self._counts.pop(channel, None)
+                continue
+            intervals = [(key, self._segments[key][1], self._segments[key][2]) for key in members]
+            tracks, count = assign_tracks(intervals)
+            count_changed = self._counts.get(channel) != count
+            self._counts[channel] = count
+            for key, track in tracks.items():
+                if count_changed or self._tracks.get(key) != track:
+                    changed.add(key)
+                self._tracks[key] = track
+        self._dirty.clear()
+        for key, expected in self._shifted.items():
+            if self._offset(key) != expected:
+                changed.add(key)
+        self._shifted.clear()
+
+    def take_changed(self) -> set[Hashable]:
+        self.flush()
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def mid_x(self, key: Hashable) -> float | None:
+        if key not in self._segments:
+            return None
+        if self._dirty or self._pending or self._columns_dirty:
+            self.flush()
+        return self._offset(key)
+
+    def _offset(self, key: Hashable) -> float:
+        channel = self._channel_of[key]
+        return track_offset(channel, self._tracks[key], self._counts[channel], self.pitch)
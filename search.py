@@ -0,0 +1,161 @@
+import bisect
+from itertools import accumulate
+from typing import Hashable, Iterable
+
+from model import Connection, DiagramModel, ModelChange, Node
+
+REBUILD_THRESHOLD = 200
+SEPARATOR = "\n"
+
+
+class SearchIndex:
+    def __init__(self):
+        self._sorted: list[tuple[str, int]] = []
+        self._entries: dict[Hashable, tuple[str, str, int]] = {}
+        self._keys: dict[int, Hashable] = {}
+        self._haystack: str | None = None
+        self._offsets: list[int] = []
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def clear(self):
+        self._sorted.clear()
+        self._entries.clear()
+        self._keys.clear()
+        self._haystack = None
+
+    def text(self, key: Hashable) -> str | None:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def _insert(self, key: Hashable, text: str) -> tuple[str, int]:
+        if key in self._entries:
+            self.remove(key)
+        folded = text.replace(SEPARATOR, " ").casefold()
+        seq = self._next
+        self._next += 1
+        self._entries[key] = (text, folded, seq)
+        self._keys[seq] = key
+        self._haystack = None
+        return folded, seq
+
+    def add(self, key: Hashable, text: str):
+        bisect.insort(self._sorted, self._insert(key, text))
+
+    def update(self, items: Iterable[tuple[Hashable, str]]):
+        for key, text in items:
+            self._sorted.append(self._insert(key, text))
+        self._sorted.sort()
+
+    def remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _text, folded, seq = entry
+        del self._keys[seq]
+        del self._sorted[bisect.bisect_left(self._sorted, (folded, seq))]
+        self._haystack = None
+
+    def search(self, query: str, limit: int = 50) -> list[Hashable]:
+        folded = query.replace(SEPARATOR, " ").casefold()
+        if not folded or limit <= 0:
+            return []
+        found: list[int] = []
+        idx = bisect.bisect_left(self._sorted, (folded, -1))
+        while idx < len(self._sorted) and len(found) < limit and self._sorted[idx][0].startswith(folded):
+            found.append(self._sorted[idx][1])
+            idx += 1
+        if len(found) < limit:
+            found.extend(self._substring(folded, limit - len(found)))
+        return [self._keys[seq] for seq in found]
+
+    def _build_haystack(self) -> str:
+        texts = [folded for folded, _seq in self._sorted]
+        self._offsets = list(accumulate((len(text) + 1 for text in texts), initial=0))
+        self._haystack = SEPARATOR.join(texts)
+        return self._haystack
+
+    def _substring(self, folded: str, limit: int) -> list[int]:
+        haystack = self._haystack if self._haystack is not None else self._build_haystack()
+        offsets = self._offsets
+        matches: list[int] = []
+        position = haystack.find(folded)
+        while position >= 0 and len(matches) < limit:
+            idx = bisect.bisect_right(offsets, position) - 1
+            if position != offsets[idx]:
+                matches.append(self._sorted[idx][1])
+            if idx + 1 >= len(offsets):
+                break
+            position = haystack.find(folded, offsets[idx + 1])
+        return matches
+
+
+class DiagramSearch:
+    def __init__(self, model: DiagramModel):
+        self.model = model
+        self.index = SearchIndex()
+        self._connections: dict[int, Connection] = {}
+        self._port_keys: dict[str, list[tuple]] = {}
+        self.rebuild()
+        model.subscribe(self._on_changes)
+
+    def close(self):
+        self.model.unsubscribe(self._on_changes)
+
+    def rebuild(self):
+        self.index.clear()
+        self._connections.clear()
+        self._port_keys.clear()
+        items: list[tuple[tuple, str]] = []
+        for node in self.model.nodes.values():
+            items.extend(self._node_items(node))
+        for connection in self.model.connections:
+            items.extend(self._connection_items(connection))
+        self.index.update(items)
+
+    def _node_items(self, node: Node) -> list[tuple[tuple, str]]:
+        ports = [(("port", node.name, port.kind, port.name), f"{node.name}.{port.name}") for port in node.inputs + node.outputs]
+        self._port_keys[node.name] = [key for key, _text in ports]
+        return [(("node", node.name), node.name), *ports]
+
+    def _connection_items(self, connection: Connection) -> list[tuple[tuple, str]]:
+        if not connection.label:
+            return []
+        self._connections[id(connection)] = connection
+        return [(("net", id(connection)), " ".join(connection.label.split()))]
+
+    def _forget_node(self, name: str):
+        self.index.remove(("node", name))
+        for key in self._port_keys.pop(name, []):
+            self.index.remove(key)
+
+    def _on_changes(self, changes: list[ModelChange]):
+        if len(changes) > REBUILD_THRESHOLD:
+            self.rebuild()
+            return
+        for change in changes:
+            if change.op in ("add_node", "add_port", "remove_port"):
+                self._forget_node(change.node)
+                node = self.model.nodes.get(change.node)
+                if node is not None:
+                    for key, text in self._node_items(node):
+                        self.index.add(key, text)
+            elif change.op == "remove_node":
+                self._forget_node(change.node)
+            elif change.op == "add_connection":
+                for key, text in self._connection_items(change.connection):
+                    self.index.add(key, text)
+            elif change.op == "remove_connection":
+                self._connections.pop(id(change.connection), None)
+                self.index.remove(("net", id(change.connection)))
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[str, tuple]]:
+        return [(self.index.text(key), key) for key in self.index.search(query, limit)]
+
+    def connection(self, key: tuple) -> Connection | None:
+        return self._connections.get(key[1]) if key[0] == "net" else None
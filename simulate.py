@@ -0,0 +1,442 @@
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from model import GATE_DEFINITIONS, Connection, Node
+
+Endpoint = tuple[str, str]
+WORD_BITS = 64
+ZERO = 0
+
+
+@dataclass
+class Op:
+    family: str
+    inputs: list[int]
+    outputs: list[int]
+    width: int = 1
+    name: str = ""
+
+
+@dataclass
+class OpGroup:
+    family: str
+    inputs: np.ndarray
+    outputs: np.ndarray
+    width: int = 1
+
+
+@dataclass
+class Loop:
+    steps: list[OpGroup]
+    dffs: OpGroup
+
+
+@dataclass
+class SimResult:
+    values: np.ndarray
+    cycles: int
+    slots: dict[Endpoint, int] = field(default_factory=dict)
+
+    def bits(self, cycle: int) -> np.ndarray:
+        word = self.values[:, cycle // WORD_BITS]
+        return ((word >> np.uint64(cycle % WORD_BITS)) & np.uint64(1)).astype(np.uint8)
+
+    def value(self, node: str, port: str, cycle: int) -> int:
+        slot = self.slots[(node, port)]
+        return int(self.values[slot, cycle // WORD_BITS] >> np.uint64(cycle % WORD_BITS)) & 1
+
+    def trace(self, slots: list[int]) -> np.ndarray:
+        words = np.ascontiguousarray(self.values[slots]).view(np.uint8)
+        return np.unpackbits(words, axis=1, bitorder="little")[:, : self.cycles]
+
+
+@dataclass
+class WireValues:
+    members: np.ndarray
+    starts: np.ndarray
+    sizes: np.ndarray
+    previous: np.ndarray | None = None
+
+    @classmethod
+    def build(cls, wires: list[list[int]]) -> "WireValues":
+        sizes = np.array([len(slots) for slots in wires], dtype=np.intp)
+        starts = np.zeros(len(wires), dtype=np.intp)
+        np.cumsum(sizes[:-1], out=starts[1:])
+        members = np.fromiter((slot for slots in wires for slot in slots), dtype=np.intp, count=int(sizes.sum()))
+        return cls(members, starts, sizes)
+
+    def update(self, bits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if not len(self.sizes):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64)
+        counts = np.add.reduceat(bits[self.members], self.starts, dtype=np.int64)
+        if self.previous is None:
+            changed = np.arange(len(counts))
+        else:
+            changed = np.flatnonzero(counts != self.previous)
+        self.previous = counts
+        return changed, counts
+
+
+def _family(kind: str) -> str:
+    for family in ("DEMUX", "MUX", "AND", "OR", "DFF"):
+        if kind.startswith(family):
+            return family
+    raise ValueError(f"시뮬레이션할 수 없는 게이트입니다: {kind}")
+
+
+def _select_bits(width: int) -> int:
+    return max(width - 1, 0).bit_length()
+
+
+def _make_op(node: Node, inputs: list[int], outputs: list[int]) -> Op:
+    family = _family(node.kind)
+    width = 1
+    if family == "MUX":
+        width = int(node.kind.split("_", 1)[1].split("x", 1)[0])
+        count = width + _select_bits(width)
+        inputs = (inputs + [ZERO] * count)[:count]
+    elif family == "DEMUX":
+        width = int(node.kind.rsplit("x", 1)[1])
+        count = 1 + _select_bits(width)
+        inputs = (inputs + [ZERO] * count)[:count]
+    elif family == "DFF":
+        inputs = inputs[:1] or [ZERO]
+    elif not inputs:
+        inputs = [ZERO]
+    return Op(family, inputs, outputs, width, node.name)
+
+
+def _group(ops: list[Op]) -> list[OpGroup]:
+    buckets: dict[tuple, list[Op]] = {}
+    for op in ops:
+        buckets.setdefault((op.family, op.width, len(op.inputs), len(op.outputs)), []).append(op)
+    return [
+        OpGroup(
+            family,
+            np.array([op.inputs for op in members], dtype=np.intp),
+            np.array([op.outputs for op in members], dtype=np.intp),
+            width,
+        )
+        for (family, width, _inputs, _outputs), members in buckets.items()
+    ]
+
+
+def _match(select: np.ndarray, index: int) -> np.ndarray | None:
+    match = None
+    for bit in range(select.shape[1]):
+        term = select[:, bit] if index >> bit & 1 else ~select[:, bit]
+        match = term if match is None else match & term
+    return match
+
+
+def _evaluate(values: np.ndarray, group: OpGroup, columns: slice):
+    data = values[group.inputs, columns]
+    if group.family == "AND":
+        values[group.outputs[:, 0], columns] = np.bitwise_and.reduce(data, axis=1)
+    elif group.family == "OR":
+        values[group.outputs[:, 0], columns] = np.bitwise_or.reduce(data, axis=1)
+    elif group.family == "MUX":
+        select = data[:, group.width :]
+        result = np.zeros_like(data[:, 0])
+        for index in range(group.width):
+            match = _match(select, index)
+            result |= data[:, index] if match is None else data[:, index] & match
+        values[group.outputs[:, 0], columns] = result
+    elif group.family == "DEMUX":
+        select = data[:, 1:]
+        for index in range(group.outputs.shape[1]):
+            match = _match(select, index)
+            values[group.outputs[:, index], columns] = data[:, 0] if match is None else data[:, 0] & match
+    elif group.family == "DFF":
+        values[group.outputs[:, 0], columns] = _shift(data[:, 0])
+
+
+def _shift(words: np.ndarray, carry: np.ndarray | None = None) -> np.ndarray:
+    shifted = words << np.uint64(1)
+    shifted[:, 1:] |= words[:, :-1] >> np.uint64(WORD_BITS - 1)
+    if carry is not None:
+        shifted[:, 0] |= carry
+    return shifted
+
+
+def _components(count: int, edges: list[list[int]]) -> list[list[int]]:
+    index = [0] * count
+    low = [0] * count
+    on_stack = [False] * count
+    visited = [False] * count
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 1
+    for root in range(count):
+        if visited[root]:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                visited[node] = True
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            if child < len(edges[node]):
+                work.append((node, child + 1))
+                succ = edges[node][child]
+                if not visited[succ]:
+                    work.append((succ, 0))
+                elif on_stack[succ]:
+                    low[node] = min(low[node], index[succ])
+                continue
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+    components.reverse()
+    return components
+
+
+class Simulator:
+    def __init__(self, nodes: dict[str, Node], connections: list[Connection]):
+        self.slots: dict[Endpoint, int] = {}
+        self.inputs: dict[str, int] = {}
+        self._count = 1
+        self._wire_slots: dict[int, int] = {}
+        ops: list[Op] = []
+        for node in nodes.values():
+            for port in node.outputs:
+                self.slots[(node.name, port.name)] = self._allocate()
+                if node.kind not in GATE_DEFINITIONS:
+                    self.inputs[f"{node.name}.{port.name}"] = self.slots[(node.name, port.name)]
+        drivers: dict[Endpoint, int] = {}
+        for connection in connections:
+            if connection.dst is None or connection.dst in drivers:
+                continue
+            if connection.src is None:
+                slot = self._stimulus(connection.dst)
+            else:
+                slot = self.slots.get(connection.src, ZERO)
+            drivers[connection.dst] = slot
+        for connection in connections:
+            if connection.src is not None:
+                self._wire_slots[id(connection)] = self.slots.get(connection.src, ZERO)
+            elif connection.dst is not None:
+                self._wire_slots[id(connection)] = drivers[connection.dst]
+        for node in nodes.values():
+            if node.kind in GATE_DEFINITIONS:
+                inputs = [drivers.get((node.name, port.name)) for port in node.inputs]
+                inputs = [
+                    slot if slot is not None else self._stimulus((node.name, port.name))
+                    for slot, port in zip(inputs, node.inputs)
+                ]
+                outputs = [self.slots[(node.name, port.name)] for port in node.outputs]
+                ops.append(_make_op(node, inputs, outputs))
+            else:
+                for port in node.inputs:
+                    self.slots.setdefault((node.name, port.name), drivers.get((node.name, port.name), ZERO))
+        self.gates = len(ops)
+        self._plan(ops)
+
+    def _allocate(self) -> int:
+        slot = self._count
+        self._count += 1
+        return slot
+
+    def _stimulus(self, endpoint: Endpoint) -> int:
+        slot = self.slots.get(endpoint)
+        if slot is None:
+            slot = self.slots[endpoint] = self._allocate()
+            self.inputs[f"{endpoint[0]}.{endpoint[1]}"] = slot
+        return slot
+
+    def _plan(self, ops: list[Op]):
+        producer = {slot: idx for idx, op in enumerate(ops) for slot in op.outputs}
+        edges: list[list[int]] = [[] for _op in ops]
+        for idx, op in enumerate(ops):
+            for slot in set(op.inputs):
+                if slot in producer:
+                    edges[producer[slot]].append(idx)
+        levels = [0] * len(ops)
+        self._levels: list[list[OpGroup | Loop]] = []
+        staged: dict[int, list[Op]] = {}
+        loops: dict[int, list[Loop]] = {}
+        for component in _components(len(ops), edges):
+            level = 0
+            members = set(component)
+            for idx in component:
+                for pred_slot in ops[idx].inputs:
+                    pred = producer.get(pred_slot)
+                    if pred is not None and pred not in members:
+                        level = max(level, levels[pred] + 1)
+            for idx in component:
+                levels[idx] = level
+            cyclic = len(component) > 1 or component[0] in edges[component[0]]
+            if not cyclic:
+                staged.setdefault(level, []).append(ops[component[0]])
+                continue
+            loop_ops = [ops[idx] for idx in component]
+            if not any(op.family == "DFF" for op in loop_ops):
+                names = ", ".join(sorted(op.name for op in loop_ops))
+                raise ValueError(f"조합 회로에 루프가 있습니다: {names}")
+            loops.setdefault(level, []).append(self._plan_loop(loop_ops))
+        self.depth = max(staged.keys() | loops.keys(), default=-1) + 1
+        for level in range(self.depth):
+            self._levels.append([*_group(staged.get(level, [])), *loops.get(level, [])])
+
+    def _plan_loop(self, ops: list[Op]) -> Loop:
+        comb = [op for op in ops if op.family != "DFF"]
+        producer = {slot: idx for idx, op in enumerate(comb) for slot in op.outputs}
+        levels: dict[int, int] = {}
+
+        def level_of(idx: int, path: frozenset = frozenset()) -> int:
+            if idx in levels:
+                return levels[idx]
+            preds = [producer[slot] for slot in comb[idx].inputs if slot in producer]
+            if any(pred in path or pred == idx for pred in preds):
+                names = ", ".join(sorted(op.name for op in comb))
+                raise ValueError(f"조합 회로에 루프가 있습니다: {names}")
+            levels[idx] = max((level_of(pred, path | {idx}) + 1 for pred in preds), default=0)
+            return levels[idx]
+
+        staged: dict[int, list[Op]] = {}
+        for idx in range(len(comb)):
+            staged.setdefault(level_of(idx), []).append(comb[idx])
+        steps = [group for level in sorted(staged) for group in _group(staged[level])]
+        dffs = _group([op for op in ops if op.family == "DFF"])[0]
+        return Loop(steps, dffs)
+
+    def wire_slot(self, connection: Connection) -> int:
+        return self._wire_slots.get(id(connection), ZERO)
+
+    def pack(self, names: list[str], vectors: np.ndarray) -> np.ndarray:
+        cycles = vectors.shape[0]
+        words = max(1, -(-cycles // WORD_BITS))
+        values = np.zeros((self._count, words), dtype=np.uint64)
+        unknown = [name for name in names if name not in self.inputs]
+        if unknown:
+            raise ValueError(f"입력으로 지정할 수 없는 포트입니다: {', '.join(unknown[:5])}")
+        padded = np.zeros((words * WORD_BITS, len(names)), dtype=np.uint8)
+        padded[:cycles] = vectors
+        packed = np.packbits(padded, axis=0, bitorder="little")
+        values[[self.inputs[name] for name in names]] = np.ascontiguousarray(packed.T).view("<u8")
+        return values
+
+    def run(self, names: list[str], vectors: np.ndarray) -> SimResult:
+        values = self.pack(names, vectors)
+        everything = slice(None)
+        for level in self._levels:
+            for step in level:
+                if isinstance(step, Loop):
+                    self._run_loop(values, step)
+                else:
+                    _evaluate(values, step, everything)
+        return SimResult(values, vectors.shape[0], self.slots)
+
+    def _run_loop(self, values: np.ndarray, loop: Loop):
+        d_slots = loop.dffs.inputs[:, 0]
+        words = values.shape[1]
+        if self._settle(values, loop, slice(None), None, WORD_BITS) is not None:
+            return
+        start, width = 1, 1
+        while start < words:
+            stop = min(words, start + width)
+            carry = values[d_slots, start - 1] >> np.uint64(WORD_BITS - 1)
+            rounds = self._settle(values, loop, slice(start, stop), carry, (stop - start) * WORD_BITS + 1)
+            width = width * 2 if rounds * 2 <= (stop - start) * WORD_BITS else max(1, width // 2)
+            start = stop
+
+    @staticmethod
+    def _settle(values: np.ndarray, loop: Loop, columns: slice, carry: np.ndarray | None, limit: int) -> int | None:
+        d_slots = loop.dffs.inputs[:, 0]
+        q_slots = loop.dffs.outputs[:, 0]
+        for rounds in range(1, limit + 1):
+            for step in loop.steps:
+                _evaluate(values, step, columns)
+            state = _shift(values[d_slots, columns], carry)
+            if np.array_equal(state, values[q_slots, columns]):
+                return rounds
+            values[q_slots, columns] = state
+        return None
+
+
+def read_vectors(path: Path) -> tuple[list[str], np.ndarray]:
+    lines = [line.split(b"#", 1)[0].strip() for line in path.read_bytes().splitlines()]
+    lines = [line for line in lines if line]
+    if not lines:
+        raise ValueError(f"{path}: 입력 이름 줄이 없습니다")
+    names = lines[0].decode("utf-8").split()
+    body = b"".join(lines[1:]).translate(None, b" \t,")
+    if len(names) == 0 or len(body) % len(names):
+        raise ValueError(f"{path}: 각 줄의 값 개수가 입력 개수({len(names)})와 다릅니다")
+    vectors = np.frombuffer(body, dtype=np.uint8).reshape(-1, len(names)) - ord("0")
+    if vectors.size and vectors.max() > 1:
+        raise ValueError(f"{path}: 값은 0 또는 1이어야 합니다")
+    return names, vectors
+
+
+def _observed(nodes: dict[str, Node], simulator: Simulator) -> list[tuple[str, int]]:
+    return [
+        (f"{node.name}.{port.name}", simulator.slots[(node.name, port.name)])
+        for node in nodes.values()
+        if node.kind not in GATE_DEFINITIONS
+        for port in node.inputs
+    ]
+
+
+def write_trace(path: Path, observed: list[tuple[str, int]], result: SimResult):
+    bits = result.trace([slot for _name, slot in observed]) if observed else np.zeros((0, result.cycles), np.uint8)
+    rows = np.full((result.cycles, len(observed) + 1), ord(" "), dtype=np.uint8)
+    rows[:, :-1] = bits.T + ord("0")
+    rows[:, -1] = ord("\n")
+    with path.open("wb") as handle:
+        handle.write((" ".join(name for name, _slot in observed) + "\n").encode("utf-8"))
+        handle.write(rows.tobytes())
+
+
+def main():
+    from diagram import parse_blocks, parse_connections
+
+    parser = argparse.ArgumentParser(description="게이트 회로 비트 병렬 시뮬레이션")
+    parser.add_argument("blocks")
+    parser.add_argument("connections")
+    parser.add_argument("vectors", help="첫 줄은 입력 포트 이름, 이후 한 줄에 한 클럭씩 0/1 값")
+    parser.add_argument("--out", metavar="PATH", help="블록 입력 포트 값을 클럭별로 저장")
+    args = parser.parse_args()
+    for path in (args.blocks, args.connections, args.vectors):
+        if not Path(path).exists():
+            print(f"파일이 없습니다: {path}")
+            sys.exit(2)
+    nodes = parse_blocks(Path(args.blocks))
+    connections = parse_connections(Path(args.connections), nodes)
+    try:
+        names, vectors = read_vectors(Path(args.vectors))
+        started = time.perf_counter()
+        simulator = Simulator(nodes, connections)
+        compiled = time.perf_counter()
+        result = simulator.run(names, vectors)
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+    finished = time.perf_counter()
+    print(
+        f"gates {simulator.gates}, levels {simulator.depth}, cycles {result.cycles}: "
+        f"compile {(compiled - started) * 1000:.1f} ms, run {(finished - compiled) * 1000:.1f} ms"
+    )
+    if args.out:
+        write_trace(Path(args.out), _observed(nodes, simulator), result)
+
+
+if __name__ == "__main__":
+    main()
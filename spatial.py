@@ -0,0 +1,64 @@
+from typing import Hashable, Iterator
+
+Rect = tuple[float, float, float, float]
+
+
+def rects_intersect(a: Rect, b: Rect) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[Hashable]] = {}
+        self._rects: dict[Hashable, Rect] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rects
+
+    def _cell_range(self, rect: Rect) -> Iterator[tuple[int, int]]:
+        size = self.cell_size
+        x1, y1, x2, y2 = rect
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield cx, cy
+
+    def get(self, key: Hashable) -> Rect | None:
+        return self._rects.get(key)
+
+    def insert(self, key: Hashable, rect: Rect):
+        if key in self._rects:
+            self.remove(key)
+        self._rects[key] = rect
+        for cell in self._cell_range(rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable):
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cell_range(rect):
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def query(self, rect: Rect) -> set[Hashable]:
+        found: set[Hashable] = set()
+        for cell in self._cell_range(rect):
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return {key for key in found if rects_intersect(self._rects[key], rect)}
+
+    def items(self) -> Iterator[tuple[Hashable, Rect]]:
+        return iter(self._rects.items())
+
+    def clear(self):
+        self._cells.clear()
+        self._rects.clear()
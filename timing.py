@@ -0,0 +1,260 @@
+import heapq
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from model import GATE_DEFINITIONS, Connection, DiagramModel, ModelChange, Node
+
+Endpoint = tuple[str, str]
+STRUCTURE_OPS = frozenset(("add_node", "remove_node", "add_connection", "remove_connection"))
+DEFAULT_DELAYS: dict[str, float] = {kind: 0.0 if kind == "DFF" else 1.0 for kind in GATE_DEFINITIONS}
+
+
+@dataclass
+class TimingPath:
+    endpoint: Endpoint
+    arrival: float
+    depth: int = 0
+    nodes: list[str] = field(default_factory=list)
+    connections: list[Connection] = field(default_factory=list)
+
+
+def parse_delays(text: str) -> dict[str, float]:
+    delays: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        kind, sep, value = item.partition("=")
+        kind = kind.strip()
+        if not sep or kind not in GATE_DEFINITIONS:
+            raise ValueError(f"게이트 지연 형식이 잘못되었습니다: {item} (예: AND2=1.5)")
+        try:
+            delays[kind] = float(value)
+        except ValueError:
+            raise ValueError(f"게이트 지연 값이 숫자가 아닙니다: {item}") from None
+    return delays
+
+
+def launches(node: Node) -> bool:
+    return node.kind == "DFF" or node.kind not in GATE_DEFINITIONS
+
+
+class TimingGraph:
+    def __init__(self, model: DiagramModel, delays: dict[str, float] | None = None):
+        self.model = model
+        self.delays = {**DEFAULT_DELAYS, **(delays or {})}
+        self.arrival: dict[str, float] = {}
+        self.level: dict[str, int] = {}
+        self.loops: set[str] = set()
+        self._fanin: dict[str, list[Connection]] = {}
+        self._fanout: dict[str, list[Connection]] = {}
+        self._ends: dict[Endpoint, float] = {}
+        self.rebuild()
+        model.subscribe(self._on_changes)
+
+    def close(self):
+        self.model.unsubscribe(self._on_changes)
+
+    def rebuild(self):
+        self.arrival.clear()
+        self.level.clear()
+        self.loops.clear()
+        self._fanin.clear()
+        self._fanout.clear()
+        self._ends.clear()
+        for connection in self.model.connections:
+            self._add(connection)
+        nodes = self.model.nodes
+        pending: dict[str, int] = {}
+        for node in nodes.values():
+            if launches(node):
+                self.arrival[node.name] = self.delays.get(node.kind, 0.0)
+            else:
+                pending[node.name] = sum(
+                    1 for wire in self._fanin.get(node.name, ()) if wire.src and self._is_gate(wire.src[0])
+                )
+        ready = [name for name, count in pending.items() if not count]
+        while ready:
+            name = ready.pop()
+            del pending[name]
+            sources = [wire.src[0] for wire in self._fanin.get(name, ()) if wire.src]
+            self.level[name] = 1 + max((self.level.get(source, 0) for source in sources), default=0)
+            self.arrival[name] = self._arrival(nodes[name])
+            for wire in self._fanout.get(name, ()):
+                target = wire.dst[0] if wire.dst else None
+                if target in pending:
+                    pending[target] -= 1
+                    if not pending[target]:
+                        ready.append(target)
+        self.loops.update(pending)
+        for connection in self.model.connections:
+            if connection.dst and self._is_end(connection.dst):
+                self._refresh_end(connection.dst)
+
+    def _add(self, connection: Connection):
+        if connection.src:
+            self._fanout.setdefault(connection.src[0], []).append(connection)
+        if connection.dst:
+            self._fanin.setdefault(connection.dst[0], []).append(connection)
+
+    def _discard(self, connection: Connection):
+        for table, endpoint in ((self._fanout, connection.src), (self._fanin, connection.dst)):
+            wires = table.get(endpoint[0]) if endpoint else None
+            if not wires:
+                continue
+            wires[:] = [wire for wire in wires if wire is not connection]
+            if not wires:
+                del table[endpoint[0]]
+
+    def _is_end(self, endpoint: Endpoint) -> bool:
+        node = self.model.nodes.get(endpoint[0])
+        return node is not None and launches(node)
+
+    def _refresh_end(self, endpoint: Endpoint):
+        arrivals = [
+            self.arrival[wire.src[0]]
+            for wire in self._fanin.get(endpoint[0], ())
+            if wire.dst == endpoint and wire.src and wire.src[0] in self.arrival
+        ]
+        if arrivals:
+            self._ends[endpoint] = max(arrivals)
+        else:
+            self._ends.pop(endpoint, None)
+
+    def _arrival(self, node: Node) -> float:
+        if launches(node):
+            return self.delays.get(node.kind, 0.0)
+        inputs = (self.arrival.get(wire.src[0], 0.0) for wire in self._fanin.get(node.name, ()) if wire.src)
+        return self.delays.get(node.kind, 1.0) + max(inputs, default=0.0)
+
+    def _is_gate(self, name: str) -> bool:
+        node = self.model.nodes.get(name)
+        return node is not None and not launches(node)
+
+    def _on_changes(self, changes: list[ModelChange]):
+        if self.loops:
+            if any(change.op in STRUCTURE_OPS for change in changes):
+                self.rebuild()
+            return
+        seeds: set[str] = set()
+        for change in changes:
+            if change.op in ("add_connection", "remove_connection"):
+                connection = change.connection
+                if change.op == "add_connection":
+                    self._add(connection)
+                else:
+                    self._discard(connection)
+                if connection.dst is None:
+                    continue
+                if connection.dst[0] not in self.model.nodes:
+                    self._ends.pop(connection.dst, None)
+                    continue
+                if self._is_end(connection.dst):
+                    self._refresh_end(connection.dst)
+                    continue
+                if change.op == "add_connection" and connection.src and connection.src[0] in self.level:
+                    if not self._raise(connection.src[0], connection.dst[0]):
+                        self.rebuild()
+                        return
+                seeds.add(connection.dst[0])
+            elif change.op == "add_node":
+                node = self.model.nodes[change.node]
+                self.arrival[node.name] = self._arrival(node)
+                if not launches(node):
+                    self.level[node.name] = 1
+            elif change.op == "remove_node":
+                self.arrival.pop(change.node, None)
+                self.level.pop(change.node, None)
+        self._update(seeds)
+
+    def _raise(self, source: str, target: str) -> bool:
+        if target not in self.level or self.level[target] > self.level[source]:
+            return True
+        self.level[target] = self.level[source] + 1
+        stack = [target]
+        while stack:
+            name = stack.pop()
+            for wire in self._fanout.get(name, ()):
+                following = wire.dst[0] if wire.dst else None
+                if following not in self.level or self.level[following] > self.level[name]:
+                    continue
+                if following == source:
+                    return False
+                self.level[following] = self.level[name] + 1
+                stack.append(following)
+        return True
+
+    def _update(self, seeds: set[str]):
+        queue = [(self.level[name], name) for name in seeds if name in self.level]
+        heapq.heapify(queue)
+        queued = {name for _level, name in queue}
+        while queue:
+            _level, name = heapq.heappop(queue)
+            arrival = self._arrival(self.model.nodes[name])
+            if arrival == self.arrival.get(name):
+                continue
+            self.arrival[name] = arrival
+            for wire in self._fanout.get(name, ()):
+                if not wire.dst:
+                    continue
+                target = wire.dst[0]
+                if self._is_end(wire.dst):
+                    self._refresh_end(wire.dst)
+                elif target in self.level and target not in queued:
+                    queued.add(target)
+                    heapq.heappush(queue, (self.level[target], target))
+
+    def path(self, endpoint: Endpoint) -> TimingPath:
+        result = TimingPath(endpoint, self._ends.get(endpoint, 0.0), 0, [endpoint[0]])
+        wires = [wire for wire in self._fanin.get(endpoint[0], ()) if wire.dst == endpoint]
+        while True:
+            wires = [wire for wire in wires if wire.src and wire.src[0] in self.arrival]
+            if not wires:
+                break
+            wire = max(wires, key=lambda wire: self.arrival[wire.src[0]])
+            result.connections.append(wire)
+            result.nodes.append(wire.src[0])
+            node = self.model.nodes[wire.src[0]]
+            if launches(node):
+                break
+            result.depth += 1
+            wires = self._fanin.get(node.name, [])
+        result.nodes.reverse()
+        result.connections.reverse()
+        return result
+
+    def worst_paths(self, count: int) -> list[TimingPath]:
+        ends = heapq.nlargest(count, self._ends.items(), key=lambda item: item[1])
+        return [self.path(endpoint) for endpoint, _arrival in ends]
+
+
+def main():
+    import argparse
+
+    from diagram import parse_blocks, parse_connections
+
+    parser = argparse.ArgumentParser(description="게이트 회로 논리 깊이/크리티컬 패스 분석")
+    parser.add_argument("blocks")
+    parser.add_argument("connections")
+    parser.add_argument("--delays", default="", help="게이트 종류별 지연 (예: AND2=1.5,MUX_4x1=2, 기본: DFF 0, 나머지 1)")
+    parser.add_argument("--paths", type=int, default=5, help="출력할 최악 경로 수")
+    args = parser.parse_args()
+    for path in (args.blocks, args.connections):
+        if not Path(path).exists():
+            print(f"파일이 없습니다: {path}")
+            sys.exit(2)
+    try:
+        delays = parse_delays(args.delays)
+    except ValueError as exc:
+        print(exc)
+        sys.exit(2)
+    nodes = parse_blocks(Path(args.blocks))
+    connections = parse_connections(Path(args.connections), nodes)
+    timing = TimingGraph(DiagramModel(nodes, connections), delays)
+    if timing.loops:
+        print(f"DFF를 거치지 않는 루프에 걸린 게이트 {len(timing.loops)}개는 제외했습니다.")
+    for rank, path in enumerate(timing.worst_paths(args.paths), 1):
+        print(f"{rank}. {path.endpoint[0]}.{path.endpoint[1]}: arrival {path.arrival:g}, depth {path.depth}")
+        print("   " + " -> ".join(path.nodes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from model import GATE_DEFINITIONS, Connection, Node, Port
+
+_IDENT = r"(?:\\\S+|[A-Za-z_][\w$]*)"
+_MODULE_RE = re.compile(rf"^module\s+({_IDENT})\s*(?:#\s*\(.*?\)\s*)?(?:\((.*)\))?\s*$", re.S)
+_DECL_RE = re.compile(r"^(input|output|inout)\b(.*)$", re.S)
+_ASSIGN_RE = re.compile(r"^assign\s+(.+?)\s*=\s*(.+)$", re.S)
+_INSTANCE_RE = re.compile(
+    rf"^({_IDENT})\s*(?:#\s*\((?:[^()]|\([^()]*\))*\)\s*)?({_IDENT})\s*(?:\[[^\]]*\]\s*)?\((.*)\)\s*$",
+    re.S,
+)
+_PIN_RE = re.compile(rf"\.({_IDENT})\s*\(((?:[^()]|\([^()]*\))*)\)")
+_ENDMODULE_RE = re.compile(r"\bendmodule\b")
+_CONST_RE = re.compile(r"^(?:\d*'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_?]+|\d+)$")
+_OUTPUT_PIN_RE = re.compile(r"^(?:Y|Z|ZN|Q|QN|Q_N|QB|O|X|CO|OUT\d*)$", re.I)
+_SKIP_KEYWORDS = (
+    "wire",
+    "reg",
+    "tri",
+    "supply0",
+    "supply1",
+    "parameter",
+    "localparam",
+    "defparam",
+    "specify",
+    "endspecify",
+    "timeunit",
+    "timeprecision",
+)
+_PRIMITIVES = {"and", "or", "nand", "nor", "xor", "xnor", "buf", "not"}
+
+
+@dataclass
+class _ModuleState:
+    name: str
+    materialize: bool
+    port_order: list[str] = field(default_factory=list)
+    port_dirs: dict[str, str] = field(default_factory=dict)
+    port_ranges: dict[str, str] = field(default_factory=dict)
+    nodes: dict[str, Node] = field(default_factory=dict)
+    drivers: dict[str, tuple[str, str]] = field(default_factory=dict)
+    loads: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+    aliases: dict[str, str] = field(default_factory=dict)
+    x: int = 80
+    y: int = 80
+
+
+def _statements(path: Path) -> Iterator[str]:
+    in_comment = False
+    buffer: list[str] = []
+    with path.open(encoding="utf-8", errors="replace") as handle:
+        for raw in handle:
+            line = raw
+            text = []
+            while line:
+                if in_comment:
+                    end = line.find("*/")
+                    if end < 0:
+                        line = ""
+                        break
+                    line = line[end + 2 :]
+                    in_comment = False
+                    continue
+                block = line.find("/*")
+                comment = line.find("//")
+                if comment >= 0 and (block < 0 or comment < block):
+                    text.append(line[:comment])
+                    line = ""
+                    break
+                if block >= 0:
+                    text.append(line[:block])
+                    line = line[block + 2 :]
+                    in_comment = True
+                    continue
+                text.append(line)
+                line = ""
+            cleaned = "".join(text).strip()
+            if not cleaned or cleaned.startswith("`"):
+                continue
+            parts = cleaned.split(";")
+            for part in parts[:-1]:
+                buffer.append(part)
+                yield from _split_endmodule(" ".join(buffer))
+                buffer = []
+            if parts[-1].strip():
+                buffer.append(parts[-1])
+    if buffer:
+        yield from _split_endmodule(" ".join(buffer))
+
+
+def _split_endmodule(statement: str) -> Iterator[str]:
+    text = statement.strip()
+    if "endmodule" not in text:
+        if text:
+            yield text
+        return
+    while True:
+        match = _ENDMODULE_RE.search(text)
+        if not match:
+            break
+        head = text[: match.start()].strip()
+        if head:
+            yield head
+        yield "endmodule"
+        text = text[match.end() :].strip()
+    if text:
+        yield text
+
+
+def _split_top_level(text: str) -> list[str]:
+    if "(" not in text and "{" not in text:
+        return [item.strip() for item in text.split(",") if item.strip()]
+    items: list[str] = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(text):
+        if char in "({":
+            depth += 1
+        elif char in ")}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(text[start:index])
+            start = index + 1
+    items.append(text[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _net_names(expression: str) -> list[str]:
+    text = expression.strip()
+    if text.startswith("{") and text.endswith("}"):
+        nets: list[str] = []
+        for item in _split_top_level(text[1:-1]):
+            nets.extend(_net_names(item))
+        return nets
+    if " " in text or "\t" in text or "\n" in text:
+        text = re.sub(r"\s+", "", text)
+    if not text or ("'" in text or text[0].isdigit()) and _CONST_RE.match(text):
+        return []
+    return [text]
+
+
+def _net_base(net: str) -> str:
+    return net.split("[", 1)[0]
+
+
+def _gate_kind(cell_type: str, input_count: int, output_count: int) -> str:
+    name = cell_type.split("__")[-1].upper()
+    if name.startswith("DEMUX"):
+        return "DEMUX_1x2" if output_count <= 2 else "DEMUX_1x4"
+    if name.startswith(("MUX", "MX")):
+        return "MUX_2x1" if input_count <= 3 else "MUX_4x1"
+    if name.startswith(("DFF", "SDFF", "DF")):
+        return "DFF"
+    if name.startswith("AND") and input_count <= 4:
+        return "AND2" if input_count <= 2 else "AND4"
+    if name.startswith("OR") and input_count <= 4:
+        return "OR2" if input_count <= 2 else "OR4"
+    return "BLOCK"
+
+
+def _parse_port_declarations(state: _ModuleState, direction: str, body: str):
+    body = re.sub(r"^\s*(?:wire|reg|logic|signed)\b", "", body.strip())
+    width = ""
+    range_match = re.match(r"^\s*(\[[^\]]*\])", body)
+    if range_match:
+        width = re.sub(r"\s+", "", range_match.group(1))
+        body = body[range_match.end() :]
+    for name in _split_top_level(body):
+        name = name.split("=", 1)[0].strip()
+        if not name:
+            continue
+        if name not in state.port_ranges:
+            state.port_order.append(name)
+        state.port_dirs[name] = direction
+        state.port_ranges[name] = width
+
+
+def _parse_module_header(state: _ModuleState, header: str | None):
+    if not header:
+        return
+    direction = None
+    for item in _split_top_level(header):
+        decl = _DECL_RE.match(item)
+        if decl:
+            direction = decl.group(1)
+            _parse_port_declarations(state, direction, decl.group(2))
+            continue
+        if direction:
+            _parse_port_declarations(state, direction, item)
+            continue
+        name = item.strip()
+        if name and name not in state.port_ranges:
+            state.port_order.append(name)
+            state.port_ranges[name] = ""
+
+
+def _place(state: _ModuleState, height: int) -> tuple[int, int]:
+    position = (state.x, state.y)
+    state.y += max(height, 100) + 60
+    if state.y > 600:
+        state.y = 80
+        state.x += 260
+    return position
+
+
+def _add_instance(
+    state: _ModuleState,
+    cell_type: str,
+    instance: str,
+    body: str,
+    module_ports: dict[str, tuple[list[str], dict[str, str]]],
+):
+    pins: list[tuple[str, list[str]]] = []
+    named = "." in body
+    if named:
+        for match in _PIN_RE.finditer(body):
+            pins.append((match.group(1), _net_names(match.group(2))))
+    else:
+        order = module_ports.get(cell_type, ([], {}))[0]
+        for index, item in enumerate(_split_top_level(body)):
+            pin = order[index] if index < len(order) else f"p{index + 1}"
+            pins.append((pin, _net_names(item)))
+
+    known = module_ports.get(cell_type)
+    directions: dict[str, str] = {}
+    for index, (pin, _nets) in enumerate(pins):
+        if known and pin in known[1]:
+            directions[pin] = "out" if known[1][pin] == "output" else "in"
+        elif cell_type in _PRIMITIVES and not named:
+            directions[pin] = "out" if index == 0 else "in"
+        else:
+            directions[pin] = "out" if _OUTPUT_PIN_RE.match(pin) else "in"
+    input_pins = [pin for pin, _nets in pins if directions[pin] == "in"]
+    output_pins = [pin for pin, _nets in pins if directions[pin] == "out"]
+
+    kind = _gate_kind(cell_type, len(input_pins), len(output_pins))
+    if kind == "BLOCK":
+        names = {pin: pin for pin in input_pins + output_pins}
+        height = max(100, 40 + 20 * max(len(input_pins), len(output_pins), 1))
+        width = 160
+    else:
+        names = {pin: f"in{idx}" for idx, pin in enumerate(input_pins, start=1)}
+        if len(output_pins) == 1:
+            names[output_pins[0]] = "out"
+        else:
+            names.update({pin: f"out{idx}" for idx, pin in enumerate(output_pins, start=1)})
+        gate_def = GATE_DEFINITIONS[kind]
+        width = gate_def["width"]
+        height = gate_def["height"]
+    x, y = _place(state, height)
+    state.nodes[instance] = Node(
+        name=instance,
+        kind=kind,
+        inputs=[Port(name=names[pin], kind="in") for pin in input_pins],
+        outputs=[Port(name=names[pin], kind="out") for pin in output_pins],
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        base_height=height,
+    )
+    for pin, nets in pins:
+        endpoint = (instance, names[pin])
+        for net in nets:
+            if directions[pin] == "out":
+                state.drivers.setdefault(net, endpoint)
+            else:
+                state.loads.setdefault(net, []).append(endpoint)
+
+
+def _resolve_alias(aliases: dict[str, str], net: str) -> str:
+    seen = set()
+    while net in aliases and net not in seen:
+        seen.add(net)
+        net = aliases[net]
+    return net
+
+
+def _finish_module(state: _ModuleState, labels: bool) -> tuple[dict[str, Node], list[Connection]]:
+    nodes: dict[str, Node] = {}
+    inputs = [name for name in state.port_order if state.port_dirs.get(name) in ("input", "inout")]
+    outputs = [name for name in state.port_order if state.port_dirs.get(name) == "output"]
+    in_block = f"{state.name}_IN"
+    out_block = f"{state.name}_OUT"
+    if inputs:
+        height = max(100, 40 + 20 * len(inputs))
+        nodes[in_block] = Node(
+            name=in_block,
+            kind="BLOCK",
+            inputs=[],
+            outputs=[Port(name=name, kind="out") for name in inputs],
+            x=80,
+            y=80,
+            height=height,
+            base_height=height,
+        )
+    shift = 260 if inputs else 0
+    for node in state.nodes.values():
+        node.x += shift
+        nodes[node.name] = node
+    if outputs:
+        height = max(100, 40 + 20 * len(outputs))
+        right = max((node.x + node.width for node in nodes.values()), default=80)
+        nodes[out_block] = Node(
+            name=out_block,
+            kind="BLOCK",
+            inputs=[Port(name=name, kind="in") for name in outputs],
+            outputs=[],
+            x=right + 100,
+            y=80,
+            height=height,
+            base_height=height,
+        )
+
+    drivers: dict[str, tuple[str, str]] = {}
+    loads: dict[str, list[tuple[str, str]]] = {}
+    for net, endpoint in state.drivers.items():
+        drivers.setdefault(_resolve_alias(state.aliases, net), endpoint)
+    for net, endpoints in state.loads.items():
+        loads.setdefault(_resolve_alias(state.aliases, net), []).extend(endpoints)
+    for alias in state.aliases:
+        base = _net_base(alias)
+        if state.port_dirs.get(base) == "output":
+            loads.setdefault(_resolve_alias(state.aliases, alias), []).append((out_block, base))
+    for net in list(drivers) + list(loads):
+        base = _net_base(net)
+        direction = state.port_dirs.get(base)
+        if direction in ("input", "inout") and net not in drivers:
+            drivers[net] = (in_block, base)
+        if direction == "output":
+            endpoint = (out_block, base)
+            net_loads = loads.setdefault(net, [])
+            if endpoint not in net_loads:
+                net_loads.append(endpoint)
+
+    connections: list[Connection] = []
+    for net in dict.fromkeys(list(drivers) + list(loads)):
+        label = net if labels else None
+        driver = drivers.get(net)
+        net_loads = loads.get(net, [])
+        if not net_loads:
+            connections.append(Connection(src=driver, dst=None, label=label))
+            continue
+        for load in net_loads:
+            connections.append(Connection(src=driver, dst=load, label=label))
+    return nodes, connections
+
+
+def parse_verilog(
+    path: Path,
+    top: str | None = None,
+    labels: bool = True,
+) -> tuple[dict[str, Node], list[Connection]]:
+    module_ports: dict[str, tuple[list[str], dict[str, str]]] = {}
+    state: _ModuleState | None = None
+    result: tuple[dict[str, Node], list[Connection]] | None = None
+    for statement in _statements(path):
+        if statement == "endmodule":
+            if state is None:
+                continue
+            module_ports[state.name] = (state.port_order, state.port_dirs)
+            if state.materialize:
+                result = _finish_module(state, labels)
+                if top is not None:
+                    return result
+            state = None
+            continue
+        module = _MODULE_RE.match(statement)
+        if module:
+            name = module.group(1)
+            state = _ModuleState(name=name, materialize=top is None or name == top)
+            _parse_module_header(state, module.group(2))
+            continue
+        if state is None:
+            continue
+        decl = _DECL_RE.match(statement)
+        if decl:
+            _parse_port_declarations(state, decl.group(1), decl.group(2))
+            continue
+        if statement.split(None, 1)[0] in _SKIP_KEYWORDS:
+            continue
+        if not state.materialize:
+            continue
+        assign = _ASSIGN_RE.match(statement)
+        if assign:
+            lhs = _net_names(assign.group(1))
+            rhs = _net_names(assign.group(2))
+            for left, right in zip(lhs, rhs):
+                if left != right:
+                    state.aliases[left] = right
+            continue
+        instance = _INSTANCE_RE.match(statement)
+        if instance:
+            cell_type, name, body = instance.groups()
+            _add_instance(state, cell_type, name, body, module_ports)
+            continue
+    if state is not None and state.materialize:
+        result = _finish_module(state, labels)
+    if result is None:
+        target = f"'{top}' " if top else ""
+        raise ValueError(f"Verilog 파일에서 모듈 {target}을(를) 찾을 수 없습니다: {path}")
+    return result